@@ -0,0 +1,17 @@
+"""Deterministic molecule generators shared by the benchmark scripts."""
+
+_FRAGMENTS = ["c1ccccc1", "C1CCCCC1", "c1ccncc1", "C(=O)N", "O", "N", "Cl", "C(F)(F)F"]
+
+
+def make_smiles(n: int) -> list[str]:
+    """Return `n` distinct, valid, drug-sized SMILES strings."""
+    smiles = []
+    for i in range(n):
+        fragments = []
+        while True:
+            i, digit = divmod(i, len(_FRAGMENTS))
+            fragments.append(_FRAGMENTS[digit])
+            if i == 0:
+                break
+        smiles.append("C" + "CC".join(f"({fragment})" for fragment in fragments))
+    return smiles
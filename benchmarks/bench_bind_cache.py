@@ -0,0 +1,51 @@
+"""RdkitMol bind throughput with and without the SMILES-to-pickle LRU cache.
+
+Binds `--binds` values drawn from a pool of `--distinct` SMILES, mimicking a
+service that repeatedly binds the same query/reference molecules.
+
+Usage::
+
+    python benchmarks/bench_bind_cache.py --binds 200000 --distinct 5000
+"""
+
+import argparse
+import random
+import time
+
+from _molecules import make_smiles
+
+from molalchemy.rdkit.types import RdkitMol
+
+
+def run(rdkit_mol: RdkitMol, values: list[str]) -> float:
+    process = rdkit_mol.bind_processor(None)
+    start = time.perf_counter()
+    for value in values:
+        process(value)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--binds", type=int, default=100_000)
+    parser.add_argument("--distinct", type=int, default=5_000)
+    parser.add_argument("--cache-size", type=int, default=50_000)
+    args = parser.parse_args()
+
+    pool = make_smiles(args.distinct)
+    rng = random.Random(0)
+    values = [rng.choice(pool) for _ in range(args.binds)]
+
+    baseline = run(RdkitMol(), values)
+    print(f"{'no cache':<12} {args.binds / baseline:>12,.0f} binds/s")
+
+    cached = RdkitMol(bind_cache_size=args.cache_size)
+    elapsed = run(cached, values)
+    print(
+        f"{'cache':<12} {args.binds / elapsed:>12,.0f} binds/s"
+        f"  (x{baseline / elapsed:.1f})  {cached.bind_cache.info()}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Statement cache hits and compile time of Bingo searches over many distinct queries.
+
+Compiles one substructure plus similarity search per query through
+SQLAlchemy's compiled statement cache, as `Connection.execute` does, with the
+query interpolated into the SQL text (the previous implementation of
+`molalchemy.bingo.functions`) and with bound parameters (the current one).
+No database is needed.
+
+Usage::
+
+    python benchmarks/bench_bingo_query_cache.py --queries 10000
+"""
+
+import argparse
+import time
+
+from _molecules import make_smiles
+from sqlalchemy import Column, Integer, MetaData, Table, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine.interfaces import CacheStats
+
+from molalchemy.bingo import functions as bingo_func
+from molalchemy.bingo.types import BingoMol
+
+
+def interpolated(column, query: str, threshold: float):
+    return select(column.table.c.id).where(
+        column.op("@")(text(f"('{query}', '')::bingo.sub")),
+        column.op("%")(text(f"('{query}', {threshold}, 1.0, 'Tanimoto')::bingo.sim")),
+    )
+
+
+def bound(column, query: str, threshold: float):
+    return select(column.table.c.id).where(
+        bingo_func.has_substructure(column, query),
+        bingo_func.similarity(column, query, threshold),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=10_000)
+    args = parser.parse_args()
+
+    table = Table(
+        "molecules",
+        MetaData(),
+        Column("id", Integer, primary_key=True),
+        Column("mol", BingoMol()),
+    )
+    queries = make_smiles(args.queries)
+    dialect = postgresql.psycopg.dialect()
+
+    print(f"{'statements':<14} {'cache hits':>11} {'distinct SQL':>13} {'us/query':>9}")
+    for label, build in (("interpolated", interpolated), ("bound", bound)):
+        cache: dict = {}
+        hits = 0
+        sql = set()
+        start = time.perf_counter()
+        for i, query in enumerate(queries):
+            stmt = build(table.c.mol, query, 0.5 + (i % 5) / 10)
+            compiled, _, status, *_ = stmt._compile_w_cache(
+                dialect,
+                compiled_cache=cache,
+                column_keys=[],
+                for_executemany=False,
+                schema_translate_map=None,
+            )
+            hits += status == CacheStats.CACHE_HIT
+            sql.add(compiled.string)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{label:<14} {hits / len(queries):>10.1%} {len(sql):>13,} "
+            f"{elapsed / len(queries) * 1e6:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
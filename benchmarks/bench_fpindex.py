@@ -0,0 +1,75 @@
+"""Top-k query latency of `molalchemy.rdkit.fpindex.FingerprintIndex`.
+
+Builds an index over random sparse fingerprints with a spread of popcounts,
+grouped in series of close analogues like a compound library, and compares popcount-pruned top-k search with
+a full vectorized scan of the same matrix.
+
+Usage::
+
+    python benchmarks/bench_fpindex.py --rows 5000000 --nbits 1024 --k 10
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from molalchemy.rdkit.fpindex import FingerprintIndex, _popcount, _to_words
+
+
+def random_fingerprints(rows: int, nbits: int, seed: int = 0) -> np.ndarray:
+    """Fingerprints of `rows // 50` random series of 50 close analogues."""
+    rng = np.random.default_rng(seed)
+    fps = np.empty((rows, nbits // 8), dtype=np.uint8)
+    for start in range(0, rows, 100_000):
+        stop = min(start + 100_000, rows)
+        n_series = -(-(stop - start) // 50)
+        density = rng.uniform(0.01, 0.08, size=(n_series, 1))
+        series = rng.random((n_series, nbits), dtype=np.float32) < density
+        bits = np.repeat(series, 50, axis=0)[: stop - start]
+        bits ^= rng.random(bits.shape, dtype=np.float32) < 0.005
+        fps[start:stop] = np.packbits(bits, axis=1, bitorder="little")
+    return fps
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--nbits", type=int, default=1024)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=20)
+    args = parser.parse_args()
+
+    fps = random_fingerprints(args.rows, args.nbits)
+    start = time.perf_counter()
+    index = FingerprintIndex.from_arrays(np.arange(args.rows), fps)
+    print(f"built index of {args.rows:,} fingerprints in {time.perf_counter() - start:.2f} s")
+
+    words = _to_words(fps)
+    popcounts = _popcount(words)
+    queries = fps[:: max(1, args.rows // args.queries)][: args.queries]
+
+    pruned, scan = [], []
+    for query in queries:
+        start = time.perf_counter()
+        hits = index.search(query, k=args.k)
+        pruned.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        q = _to_words(query[np.newaxis, :])
+        a = _popcount(q)[0]
+        common = _popcount(words & q)
+        scores = common / (a + popcounts - common)
+        top = np.argpartition(-scores, args.k - 1)[: args.k]
+        scan.append(time.perf_counter() - start)
+        assert np.allclose(np.sort(scores[top])[::-1], hits.scores)
+
+    print(f"{'method':<16} {'median ms':>10} {'max ms':>10}")
+    for label, times in (("pruned top-k", pruned), ("full scan", scan)):
+        print(
+            f"{label:<16} {np.median(times) * 1000:>10.2f} {max(times) * 1000:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Startup time of `FingerprintIndex` workers from a snapshot file.
+
+Saves an index over random fingerprints and compares opening the snapshot with
+`numpy.memmap` and reading it into memory, including the first query.
+
+Usage::
+
+    python benchmarks/bench_fpindex_snapshot.py --rows 5000000 --nbits 1024
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from bench_fpindex import random_fingerprints
+
+from molalchemy.rdkit.fpindex import FingerprintIndex
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--nbits", type=int, default=1024)
+    args = parser.parse_args()
+
+    fps = random_fingerprints(args.rows, args.nbits)
+    index = FingerprintIndex.from_arrays(np.arange(args.rows), fps)
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "index.fps"
+        start = time.perf_counter()
+        index.save(path)
+        print(
+            f"saved {args.rows:,} fingerprints ({path.stat().st_size / 2**20:.0f} MiB) "
+            f"in {time.perf_counter() - start:.2f} s"
+        )
+
+        print(f"{'open':<8} {'open ms':>10} {'first query ms':>16}")
+        for mmap in (True, False):
+            start = time.perf_counter()
+            opened = FingerprintIndex.open_snapshot(path, mmap=mmap)
+            opened_at = time.perf_counter()
+            opened.search(fps[0], k=10)
+            done = time.perf_counter()
+            print(
+                f"{'mmap' if mmap else 'read':<8} {(opened_at - start) * 1000:>10.1f} "
+                f"{(done - opened_at) * 1000:>16.1f}"
+            )
+            del opened
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Throughput of RdkitMol bind processing: serial vs. process pool.
+
+Usage::
+
+    python benchmarks/bench_parallel_bind.py --rows 200000 --workers 1 2 4 8
+"""
+
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from _molecules import make_smiles
+
+from molalchemy.rdkit.parallel import pickle_smiles
+from molalchemy.rdkit.types import RdkitMol
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--chunksize", type=int, default=1000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    smiles = make_smiles(args.rows)
+
+    process = RdkitMol().bind_processor(None)
+    start = time.perf_counter()
+    for value in smiles:
+        process(value)
+    serial = time.perf_counter() - start
+    print(f"{'serial bind_processor':<24} {args.rows / serial:>12,.0f} rows/s")
+
+    for workers in args.workers:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Warm up the pool so process start-up is not measured
+            pickle_smiles(smiles[: workers * 10], executor=pool, chunksize=10)
+            start = time.perf_counter()
+            pickle_smiles(smiles, executor=pool, chunksize=args.chunksize)
+            elapsed = time.perf_counter() - start
+        print(
+            f"{f'{workers} worker(s)':<24} {args.rows / elapsed:>12,.0f} rows/s"
+            f"  (x{serial / elapsed:.2f})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Bind payload sizes of RdkitMol for different pickle options.
+
+Reports the mean number of bytes sent per molecule for 2D molecules parsed from
+SMILES and for 3D molecules carrying a conformer and properties (as produced by
+typical registration/docking pipelines).
+
+Usage::
+
+    python benchmarks/bench_pickle_payload.py --rows 500
+"""
+
+import argparse
+
+from _molecules import make_smiles
+from rdkit import Chem
+from rdkit.Chem import AllChem
+
+from molalchemy.rdkit.types import RdkitMol
+
+OPTIONS = {
+    "default": RdkitMol(),
+    "AllProps": RdkitMol(pickle_props=Chem.PropertyPickleOptions.AllProps),
+    "NoProps": RdkitMol(pickle_props=Chem.PropertyPickleOptions.NoProps),
+    "NoProps, no conformers": RdkitMol(
+        pickle_props=Chem.PropertyPickleOptions.NoProps, keep_conformers=False
+    ),
+}
+
+
+def make_3d(smiles: str) -> Chem.Mol:
+    mol = Chem.AddHs(Chem.MolFromSmiles(smiles))
+    AllChem.EmbedMolecule(mol, randomSeed=0xF00D)
+    mol.SetProp("_Name", smiles)
+    mol.SetDoubleProp("score", 1.0)
+    AllChem.ComputeGasteigerCharges(mol)
+    return mol
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500)
+    args = parser.parse_args()
+
+    smiles = make_smiles(args.rows)
+    inputs = {
+        "2D from SMILES": [Chem.MolFromSmiles(s) for s in smiles],
+        "3D with props": [make_3d(s) for s in smiles],
+    }
+
+    print(f"{'input':<16} {'pickle options':<24} {'bytes/mol':>10}")
+    for label, mols in inputs.items():
+        for name, rdkit_mol in OPTIONS.items():
+            process = rdkit_mol.bind_processor(None)
+            size = sum(len(process(mol)) for mol in mols) / len(mols)
+            print(f"{label:<16} {name:<24} {size:>10,.0f}")
+
+
+if __name__ == "__main__":
+    main()
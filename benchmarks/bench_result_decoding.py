@@ -0,0 +1,72 @@
+"""Decoding throughput of pickled molecule result sets, serial vs. thread pool.
+
+Simulates a streamed result set whose partitions take `--fetch-ms` to arrive
+(network/database time, during which the GIL is released) and decodes the
+`mol_send` pickles either serially, as the `RdkitMol(return_type="mol")` result
+processor does, or with `molalchemy.rdkit.results.decode_partitions`.
+
+Usage::
+
+    python benchmarks/bench_result_decoding.py --rows 200000 --workers 1 4 16 32
+"""
+
+import argparse
+import time
+
+from _molecules import make_smiles
+from rdkit import Chem
+from sqlalchemy.engine.result import IteratorResult, SimpleResultMetaData
+
+from molalchemy.rdkit.results import decode_partitions
+from molalchemy.rdkit.types import RdkitMol
+
+
+def simulated_result(values, fetch_seconds: float, partition_size: int):
+    """A result that sleeps for `fetch_seconds` before each partition of rows."""
+
+    def rows():
+        for i, value in enumerate(values):
+            if i % partition_size == 0:
+                time.sleep(fetch_seconds)
+            yield (i, value)
+
+    return IteratorResult(SimpleResultMetaData(["id", "mol"]), rows())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--partition-size", type=int, default=10_000)
+    parser.add_argument("--fetch-ms", type=float, default=20.0)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    pickles = [Chem.MolFromSmiles(s).ToBinary() for s in make_smiles(5000)]
+    values = [memoryview(pickles[i % len(pickles)]) for i in range(args.rows)]
+    fetch = args.fetch_ms / 1000
+
+    process = RdkitMol(return_type="mol").result_processor(None, None)
+    start = time.perf_counter()
+    for partition in simulated_result(values, fetch, args.partition_size).partitions(
+        args.partition_size
+    ):
+        for _, value in partition:
+            process(value)
+    serial = time.perf_counter() - start
+    print(f"{'mode':<22} {'rows/s':>12} {'speedup':>8}")
+    print(f"{'serial processor':<22} {args.rows / serial:>12,.0f} {1.0:>7.2f}x")
+
+    for workers in args.workers:
+        result = simulated_result(values, fetch, args.partition_size)
+        start = time.perf_counter()
+        for _ in decode_partitions(
+            result, {"mol": "mol"}, size=args.partition_size, max_workers=workers
+        ):
+            pass
+        elapsed = time.perf_counter() - start
+        label = f"thread pool ({workers})"
+        print(f"{label:<22} {args.rows / elapsed:>12,.0f} {serial / elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
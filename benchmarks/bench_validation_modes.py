@@ -0,0 +1,43 @@
+"""Client CPU per bound row for the RdkitMol/RdkitReaction validation modes.
+
+Only the client-side bind processing is measured; with `validate="server"` the
+parsing cost moves to the database, with `validate="none"` it is skipped.
+
+Usage::
+
+    python benchmarks/bench_validation_modes.py --rows 100000
+"""
+
+import argparse
+import time
+
+from _molecules import make_smiles
+
+from molalchemy.rdkit.types import RdkitMol, RdkitReaction
+
+
+def per_row_us(type_, values: list[str]) -> float:
+    process = type_.bind_processor(None)
+    start = time.perf_counter()
+    for value in values:
+        process(value)
+    return (time.perf_counter() - start) / len(values) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50_000)
+    args = parser.parse_args()
+
+    smiles = make_smiles(args.rows)
+    reactions = [f"{a}>>{b}" for a, b in zip(smiles, reversed(smiles))]
+
+    print(f"{'type':<16} {'validate':<8} {'us/row':>10}")
+    for type_cls, values in ((RdkitMol, smiles), (RdkitReaction, reactions)):
+        for mode in ("client", "server", "none"):
+            cost = per_row_us(type_cls(validate=mode), values)
+            print(f"{type_cls.__name__:<16} {mode:<8} {cost:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -14,9 +14,12 @@ from molalchemy.bingo.types import (
     BingoReaction,
 )
 from molalchemy.exceptions import (
+    InvalidCursorError,
     InvalidMoleculeError,
     InvalidReactionError,
     MolAlchemyError,
+    SearchCancelledError,
+    SearchTimeoutError,
 )
 from molalchemy.rdkit.index import RdkitIndex
 from molalchemy.rdkit.types import (
@@ -38,6 +41,7 @@ __all__ = [
     "BingoMolIndex",
     "BingoReaction",
     "BingoRxnIndex",
+    "InvalidCursorError",
     "InvalidMoleculeError",
     "InvalidReactionError",
     "MolAlchemyError",
@@ -48,5 +52,7 @@ __all__ = [
     "RdkitReaction",
     "RdkitSparseFingerprint",
     "RdkitXQMol",
+    "SearchCancelledError",
+    "SearchTimeoutError",
     "__version__",
 ]
@@ -0,0 +1,569 @@
+"""Shared helpers for PostgreSQL run-time settings (GUC variables) used by the cartridge settings modules.
+
+With `track_settings(engine)`, the values of settings set or read through
+these helpers are cached per DBAPI connection, in its `info` dictionary, so
+that setting an unchanged value and reading a known one cost no round trip.
+`SET` is transactional in PostgreSQL, so values are only trusted once their
+transaction commits: values set or read in a transaction are kept pending and
+dropped when it rolls back (including the rollback of the pool's
+reset-on-return). Transaction-local values are never cached: names set with
+`local=True` are not remembered, even when read back, until their
+transaction ends.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import re
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from typing import TYPE_CHECKING, Any
+
+from loguru import logger
+from sqlalchemy import event, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from molalchemy.exceptions import SearchCancelledError, SearchTimeoutError
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator, Generator, Iterable, Mapping
+
+    from sqlalchemy import Connection, Engine, TextClause
+    from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+
+# SQLSTATE of statements cancelled by statement_timeout or a cancel request
+_QUERY_CANCELED = "57014"
+
+_COMMITTED = "molalchemy_settings"
+_PENDING = "molalchemy_settings_pending"
+_CONNECT = "molalchemy_connect_settings"
+# Names set for the current transaction only, whose values must not be cached
+_LOCAL = "molalchemy_settings_local"
+_SETTING_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_.]*$")
+
+
+def track_settings(
+    engine: Engine | AsyncEngine, *, reset_on_checkin: bool = False
+) -> None:
+    """Cache the settings of each pooled connection of `engine` on the client.
+
+    Once enabled, the setters of `molalchemy.rdkit.settings` skip `SET` when
+    the connection already has the value, and the getters answer from the
+    cache. Call once, when creating the engine.
+
+    Parameters
+    ----------
+    engine : sqlalchemy.Engine | sqlalchemy.ext.asyncio.AsyncEngine
+        The engine whose connections are tracked.
+    reset_on_checkin : bool, default False
+        Whether to `RESET` the settings changed through molalchemy when a
+        connection is returned to the pool, so that the next checkout starts
+        from the server defaults.
+
+    Notes
+    -----
+    Settings changed with plain SQL (or `RESET ALL`/`DISCARD ALL`) bypass the
+    cache and must not be mixed with tracked settings on the same connection.
+
+    Examples
+    --------
+    >>> engine = create_engine("postgresql+psycopg://...", pool_size=20)
+    >>> track_settings(engine)
+    >>> with Session(engine) as session:
+    ...     set_tanimoto_threshold(session, 0.7)  # SET, then cached once committed
+    ...     session.commit()
+    """
+    engine = getattr(engine, "sync_engine", engine)
+    event.listen(engine, "checkout", _on_checkout)
+    event.listen(engine, "commit", _on_commit)
+    event.listen(engine, "rollback", _on_rollback)
+    event.listen(engine, "rollback_savepoint", _on_rollback_savepoint)
+    event.listen(engine, "reset", _on_reset)
+    if reset_on_checkin:
+        event.listen(engine, "checkin", _reset_settings)
+
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+    info = connection_record.info
+    info.setdefault(_COMMITTED, dict(info.get(_CONNECT, {})))
+    info.setdefault(_PENDING, {})
+    info.setdefault(_LOCAL, set())
+
+
+def _on_commit(conn) -> None:
+    info = conn.info
+    if _PENDING in info:
+        info[_COMMITTED].update(info[_PENDING])
+        info[_PENDING].clear()
+    _end_local(info)
+
+
+def _on_rollback(conn) -> None:
+    _discard_pending(conn.info)
+    _end_local(conn.info)
+
+
+def _on_rollback_savepoint(conn, name, context) -> None:
+    # Which values the savepoint covered is not tracked, so all are dropped
+    _discard_pending(conn.info)
+
+
+def _on_reset(dbapi_connection, connection_record, reset_state) -> None:
+    _discard_pending(connection_record.info)
+    _end_local(connection_record.info)
+
+
+def _discard_pending(info: dict) -> None:
+    pending = info.get(_PENDING)
+    if pending:
+        pending.clear()
+
+
+def _end_local(info: dict) -> None:
+    local = info.get(_LOCAL)
+    if local:
+        local.clear()
+
+
+def _reset_settings(dbapi_connection, connection_record) -> None:
+    info = connection_record.info
+    committed = info.get(_COMMITTED)
+    defaults = info.get(_CONNECT, {})
+    if dbapi_connection is None or not committed:
+        return
+    # Settings applied at connect time are restored rather than reset
+    statements = [
+        f"SET {name} = {defaults[name]}" if name in defaults else f"RESET {name}"
+        for name, value in committed.items()
+        if _SETTING_NAME.match(name) and defaults.get(name) != value
+    ]
+    committed.clear()
+    committed.update(defaults)
+    if not statements:
+        return
+    try:
+        _execute_on(dbapi_connection, statements)
+    except Exception as exc:
+        committed.clear()
+        logger.warning(f"Could not reset settings on checkin: {exc}")
+
+
+def _execute_on(dbapi_connection, statements: Iterable[str]) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        for statement in statements:
+            cursor.execute(statement)
+    finally:
+        cursor.close()
+    dbapi_connection.commit()
+
+
+def apply_on_connect(engine: Engine | AsyncEngine, settings: Mapping[str, str]) -> None:
+    """Set `settings` on every new DBAPI connection of `engine`.
+
+    Values are interpolated into `SET` statements and must be trusted. With
+    `track_settings`, they are also the values connections are known to have,
+    and the values `reset_on_checkin` restores.
+    """
+    for name in settings:
+        if not _SETTING_NAME.match(name):
+            raise ValueError(f"Invalid setting name: {name!r}")
+    settings = dict(settings)
+    statements = [f"SET {name} = {value}" for name, value in settings.items()]
+
+    def on_connect(dbapi_connection, connection_record) -> None:
+        _execute_on(dbapi_connection, statements)
+        connection_record.info[_CONNECT] = settings
+
+    event.listen(getattr(engine, "sync_engine", engine), "connect", on_connect)
+
+
+def tracked(session: Session | Connection) -> dict | None:
+    """Return the settings cache of the connection of `session`, `None` if untracked."""
+    connection = session.connection() if isinstance(session, Session) else session
+    return _cache_of(getattr(connection, "info", None))
+
+
+async def atracked(session: AsyncSession | AsyncConnection) -> dict | None:
+    """Async version of `tracked`."""
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    if isinstance(session, AsyncSession):
+        connection = await session.connection()
+    else:
+        connection = session
+    return _cache_of(getattr(connection, "info", None))
+
+
+def _cache_of(info: Any) -> dict | None:
+    if isinstance(info, dict) and _COMMITTED in info:
+        return info
+    return None
+
+
+def cached(info: dict | None, name: str) -> str | None:
+    """Return the cached value of `name`, `None` if unknown."""
+    if info is None:
+        return None
+    pending = info[_PENDING]
+    return pending[name] if name in pending else info[_COMMITTED].get(name)
+
+
+def remember(info: dict | None, name: str, value: Any) -> None:
+    """Cache `value` for `name`, pending until the current transaction commits.
+
+    Nothing is cached for names set with `local=True` in the current
+    transaction, whose values are gone once it ends.
+    """
+    if info is not None and name not in info.get(_LOCAL, ()):
+        info[_PENDING][name] = str(value)
+
+
+def forget(info: dict | None, names: Iterable[str]) -> None:
+    """Drop the cached values of `names`."""
+    if info is None:
+        return
+    for name in names:
+        info[_PENDING].pop(name, None)
+        info[_COMMITTED].pop(name, None)
+
+
+def get_setting(session: Session | Connection, name: str) -> str:
+    """Return the current value of the setting `name`."""
+    info = tracked(session)
+    value = cached(info, name)
+    if value is None:
+        result = session.execute(text("SELECT current_setting(:name)"), {"name": name})
+        value = result.scalar_one()
+        remember(info, name, value)
+    return value
+
+
+async def aget_setting(session: AsyncSession | AsyncConnection, name: str) -> str:
+    """Async version of `get_setting`."""
+    info = await atracked(session)
+    value = cached(info, name)
+    if value is None:
+        result = await session.execute(
+            text("SELECT current_setting(:name)"), {"name": name}
+        )
+        value = result.scalar_one()
+        remember(info, name, value)
+    return value
+
+
+def set_setting(
+    session: Session | Connection, name: str, value: Any, *, local: bool = False
+) -> None:
+    """Set `name` to `value` with `set_config`, for the transaction only if `local`."""
+    info = tracked(session)
+    if not _changes(info, {name: value}, local):
+        return
+    session.execute(
+        text("SELECT set_config(:name, :value, :local)"),
+        {"name": name, "value": str(value), "local": local},
+    )
+    _remember_all(info, {name: value}, local)
+
+
+async def aset_setting(
+    session: AsyncSession | AsyncConnection,
+    name: str,
+    value: Any,
+    *,
+    local: bool = False,
+) -> None:
+    """Async version of `set_setting`."""
+    info = await atracked(session)
+    if not _changes(info, {name: value}, local):
+        return
+    await session.execute(
+        text("SELECT set_config(:name, :value, :local)"),
+        {"name": name, "value": str(value), "local": local},
+    )
+    _remember_all(info, {name: value}, local)
+
+
+def _changes(info: dict | None, settings: Mapping[str, Any], local: bool) -> dict:
+    # Transaction-local values are never cached, and hide the cached ones
+    if local:
+        forget(info, settings)
+        if info is not None:
+            info.setdefault(_LOCAL, set()).update(settings)
+        return dict(settings)
+    return {
+        name: value
+        for name, value in settings.items()
+        if cached(info, name) != str(value)
+    }
+
+
+def _remember_all(info: dict | None, settings: Mapping[str, Any], local: bool) -> None:
+    if not local:
+        for name, value in settings.items():
+            remember(info, name, value)
+
+
+def set_config_statement(
+    settings: Mapping[str, Any], *, local: bool = False
+) -> tuple[TextClause, dict[str, Any]]:
+    """Return one statement setting all `settings` with `set_config`, and its parameters."""
+    calls = []
+    params: dict[str, Any] = {"local": local}
+    for i, (name, value) in enumerate(settings.items()):
+        calls.append(f"set_config(:name_{i}, :value_{i}, :local)")
+        params[f"name_{i}"] = name
+        params[f"value_{i}"] = str(value)
+    return text(f"SELECT {', '.join(calls)}"), params
+
+
+def set_settings(
+    session: Session | Connection,
+    settings: Mapping[str, Any],
+    *,
+    local: bool = False,
+) -> None:
+    """Set all `settings` in a single round trip, for the transaction only if `local`."""
+    info = tracked(session)
+    settings = _changes(info, settings, local)
+    if settings:
+        session.execute(*set_config_statement(settings, local=local))
+        _remember_all(info, settings, local)
+
+
+async def aset_settings(
+    session: AsyncSession | AsyncConnection,
+    settings: Mapping[str, Any],
+    *,
+    local: bool = False,
+) -> None:
+    """Async version of `set_settings`."""
+    info = await atracked(session)
+    settings = _changes(info, settings, local)
+    if settings:
+        await session.execute(*set_config_statement(settings, local=local))
+        _remember_all(info, settings, local)
+
+
+class override_settings:
+    """Context manager setting `settings` on `session` and restoring them on exit.
+
+    Supports `with` on sessions and connections and `async with` on their
+    async counterparts. The previous values are read first and set back in a
+    single statement on exit. With `local=True`, the settings are instead set
+    for the current transaction in one statement and nothing is restored.
+    """
+
+    def __init__(
+        self,
+        session: Session | Connection | AsyncSession | AsyncConnection,
+        settings: Mapping[str, Any],
+        *,
+        local: bool = False,
+    ):
+        self.session = session
+        self.settings = dict(settings)
+        self.local = local
+        self._previous: dict[str, str] = {}
+
+    def __enter__(self) -> None:
+        if not self.local:
+            self._previous = {
+                name: get_setting(self.session, name) for name in self.settings
+            }
+        set_settings(self.session, self.settings, local=self.local)
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        previous, self._previous = self._previous, {}
+        # A database error aborts the transaction, whose rollback undoes the SET
+        if not isinstance(exc, DBAPIError):
+            set_settings(self.session, previous)
+
+    async def __aenter__(self) -> None:
+        if not self.local:
+            self._previous = {
+                name: await aget_setting(self.session, name) for name in self.settings
+            }
+        await aset_settings(self.session, self.settings, local=self.local)
+
+    async def __aexit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        previous, self._previous = self._previous, {}
+        if not isinstance(exc, DBAPIError):
+            await aset_settings(self.session, previous)
+
+
+def driver_connection(session: Session | Connection) -> Any:
+    """Return the DBAPI connection that `session` executes statements on."""
+    connection = session.connection() if isinstance(session, Session) else session
+    return connection.connection.driver_connection
+
+
+async def adriver_connection(session: AsyncSession | AsyncConnection) -> Any:
+    """Async version of `driver_connection`."""
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    if isinstance(session, AsyncSession):
+        connection = await session.connection()
+    else:
+        connection = session
+    return (await connection.get_raw_connection()).driver_connection
+
+
+class SearchHandle:
+    """Handle of a `search_timeout` block, used to cancel its running statement.
+
+    `cancel` may be called from any thread, e.g. a request handler whose client
+    went away, and `acancel` from any task. It sends a cancel request for the
+    statement currently running on the connection, which then raises
+    `SearchCancelledError`. Once the block has exited, `cancel` does nothing,
+    so it cannot hit later statements.
+
+    Cancelling requires a driver whose connections have a `cancel()` method,
+    i.e. psycopg (sync or async) or psycopg2. With asyncpg, cancel the task
+    running the statement instead; the timeout works with every driver.
+    """
+
+    def __init__(self, connection: Any):
+        self._connection = connection
+        self._lock = threading.Lock()
+        self._active = True
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        """Cancel the statement running inside the block, if any.
+
+        Raises
+        ------
+        NotImplementedError
+            If the driver connection cannot be cancelled (e.g. asyncpg).
+        """
+        if not callable(getattr(self._connection, "cancel", None)):
+            raise NotImplementedError(
+                f"{type(self._connection).__module__}.{type(self._connection).__name__} "
+                "connections cannot be cancelled; cancellation is supported with "
+                "psycopg and psycopg2"
+            )
+        with self._lock:
+            if not self._active:
+                return
+            self.cancelled = True
+            self._connection.cancel()
+
+    async def acancel(self) -> None:
+        """Cancel the statement running inside the block from an event loop.
+
+        The cancel request is sent from a worker thread, so that the loop is
+        not blocked while the driver connects to the server to deliver it.
+        """
+        await asyncio.to_thread(self.cancel)
+
+    def _close(self) -> None:
+        with self._lock:
+            self._active = False
+
+
+def _sqlstate(error: BaseException | None) -> str | None:
+    # psycopg exposes `sqlstate`, psycopg2 `pgcode`
+    return getattr(error, "sqlstate", None) or getattr(error, "pgcode", None)
+
+
+def _raise_cancelled(error: DBAPIError, handle: SearchHandle) -> None:
+    """Raise the molalchemy error for `error` if it reports a cancelled statement."""
+    if _sqlstate(error.orig) != _QUERY_CANCELED:
+        return
+    # Cancels through the handle are known; the error message cannot tell the
+    # rest apart, as it follows the server's lc_messages
+    if handle.cancelled:
+        raise SearchCancelledError("Search was cancelled") from error
+    raise SearchTimeoutError("Search exceeded statement_timeout") from error
+
+
+@contextmanager
+def search_timeout(
+    session: Session | Connection, seconds: float | None
+) -> Generator[SearchHandle, None, None]:
+    """Limit the run time of the statements executed in the block.
+
+    Sets `statement_timeout` for the current transaction, like
+    `SET LOCAL statement_timeout`, and restores the previous value on exit.
+    Statements cancelled through the yielded handle raise
+    `SearchCancelledError`; statements cancelled otherwise, by the timeout,
+    raise `SearchTimeoutError`. Both are raised from the driver error.
+
+    Parameters
+    ----------
+    session : sqlalchemy.orm.Session | sqlalchemy.Connection
+        Session or connection, inside the transaction to run the search in.
+    seconds : float | None
+        Maximum run time of each statement, rounded to milliseconds. `None`
+        leaves `statement_timeout` unchanged and only enables cancellation.
+
+    Yields
+    ------
+    SearchHandle
+        Handle whose `cancel()` cancels the running statement from another thread.
+
+    Notes
+    -----
+    A cancelled statement aborts the transaction, which must be rolled back.
+    The rollback also discards the transaction-local timeout.
+    """
+    _check_seconds(seconds)
+    previous = None
+    if seconds is not None:
+        previous = get_setting(session, "statement_timeout")
+        set_setting(session, "statement_timeout", _milliseconds(seconds), local=True)
+    handle = SearchHandle(driver_connection(session))
+    failed = False
+    try:
+        yield handle
+    except DBAPIError as exc:
+        failed = True
+        _raise_cancelled(exc, handle)
+        raise
+    finally:
+        handle._close()
+        # After a database error the transaction is aborted and must be rolled
+        # back, which discards the transaction-local timeout anyway
+        if previous is not None and not failed:
+            set_setting(session, "statement_timeout", previous, local=True)
+
+
+@asynccontextmanager
+async def asearch_timeout(
+    session: AsyncSession | AsyncConnection, seconds: float | None
+) -> AsyncGenerator[SearchHandle, None]:
+    """Async version of `search_timeout`.
+
+    Cancel the running statement from another task with `await handle.acancel()`,
+    which requires psycopg; see `SearchHandle`.
+    """
+    _check_seconds(seconds)
+    previous = None
+    if seconds is not None:
+        previous = await aget_setting(session, "statement_timeout")
+        await aset_setting(
+            session, "statement_timeout", _milliseconds(seconds), local=True
+        )
+    handle = SearchHandle(await adriver_connection(session))
+    failed = False
+    try:
+        yield handle
+    except DBAPIError as exc:
+        failed = True
+        _raise_cancelled(exc, handle)
+        raise
+    finally:
+        handle._close()
+        if previous is not None and not failed:
+            await aset_setting(session, "statement_timeout", previous, local=True)
+
+
+def _check_seconds(seconds: float | None) -> None:
+    if seconds is not None and seconds <= 0:
+        raise ValueError(f"seconds must be positive, got {seconds}")
+
+
+def _milliseconds(seconds: float) -> int:
+    return max(1, round(seconds * 1000))
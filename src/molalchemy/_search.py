@@ -0,0 +1,60 @@
+"""Shared helpers for search statements and streaming their results through server-side cursors."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from sqlalchemy import any_, bindparam, func
+from sqlalchemy.dialects.postgresql import ARRAY
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator, Sequence
+
+    from sqlalchemy import ColumnElement, Connection, Select
+    from sqlalchemy.orm import Session
+    from sqlalchemy.sql.selectable import TableValuedAlias
+    from sqlalchemy.types import TypeEngine
+
+
+def stream(
+    connection: Connection | Session, stmt: Select, fetch_size: int, scalars: bool
+) -> Iterator[Any]:
+    """Execute `stmt` on a server-side cursor and yield its rows or scalars.
+
+    Rows are fetched `fetch_size` at a time. The cursor is closed when the
+    generator is exhausted, closed or garbage collected, so consumers may stop
+    iterating early.
+    """
+    if fetch_size < 1:
+        raise ValueError(f"fetch_size must be positive, got {fetch_size}")
+    result = connection.execute(
+        stmt.execution_options(stream_results=True, yield_per=fetch_size)
+    )
+    try:
+        yield from (result.scalars() if scalars else result)
+    finally:
+        result.close()
+
+
+def unnest_queries(
+    values: Sequence[Any], element_type: TypeEngine, name: str
+) -> TableValuedAlias:
+    """Return `unnest(:name) WITH ORDINALITY AS anon(value, idx)` over one array parameter.
+
+    Sending a batch of queries as a single array keeps the SQL independent of
+    the batch size, so it is compiled and prepared once.
+    """
+    return (
+        func.unnest(
+            bindparam(name, list(values), type_=ARRAY(element_type), unique=True)
+        )
+        .table_valued("value", with_ordinality="idx")
+        .render_derived()
+    )
+
+
+def any_key(key_column: Any, keys: Iterable[Any]) -> ColumnElement[bool]:
+    """Return `key_column = ANY(:keys)`, binding `keys` as a single array parameter."""
+    return key_column == any_(
+        bindparam("keys", list(keys), type_=ARRAY(key_column.type), unique=True)
+    )
@@ -10,6 +10,7 @@ from loguru import logger
 from molalchemy.bingo.index import _BingoIndexBase
 from molalchemy.bingo.types import BingoBaseType
 from molalchemy.rdkit.index import RdkitIndex
+from molalchemy.rdkit.popcount import popcount_column
 from molalchemy.rdkit.types import RdkitBaseType
 
 _TYPE_TO_MODULE = {
@@ -36,6 +37,54 @@ def drop_rdkit_extension():
     op.execute("DROP EXTENSION IF EXISTS rdkit;")
 
 
+def add_popcount_column(
+    table_name: str,
+    fp_column: str,
+    column_name: str | None = None,
+    *,
+    index: bool = True,
+    schema: str | None = None,
+):
+    """Add a popcount column generated from a `bfp` column, and its btree index.
+
+    The column is a stored generated column, so PostgreSQL computes it for the
+    existing rows while adding it (rewriting the table) and keeps it in sync
+    afterwards. See `molalchemy.rdkit.popcount.popcount_column`.
+
+    Parameters
+    ----------
+    table_name : str
+        Name of the table.
+    fp_column : str
+        Name of the `bfp` column.
+    column_name : str, optional
+        Name of the popcount column, `<fp_column>_popcount` by default.
+    index : bool, default True
+        Whether to create the index, named `ix_<table_name>_<column_name>`.
+    schema : str, optional
+        Schema of the table.
+    """
+    column_name = column_name or f"{fp_column}_popcount"
+    op.add_column(
+        table_name, popcount_column(fp_column, column_name, index=False), schema=schema
+    )
+    if index:
+        op.create_index(
+            f"ix_{table_name}_{column_name}", table_name, [column_name], schema=schema
+        )
+
+
+def drop_popcount_column(
+    table_name: str,
+    fp_column: str,
+    column_name: str | None = None,
+    *,
+    schema: str | None = None,
+):
+    """Drop a popcount column added with `add_popcount_column`, with its index."""
+    op.drop_column(table_name, column_name or f"{fp_column}_popcount", schema=schema)
+
+
 def render_item(obj_type, obj, autogen_context):
     logger.debug(f"Rendering item: {obj_type}, {obj}")
     if obj_type == "type":
@@ -6,6 +6,15 @@ from .index import (
     BingoRxnIndex,
 )
 from .proxy import BingoMolProxy, BingoRxnProxy
+from .search import stream_search
+from .settings import (
+    BingoSettings,
+    asearch_timeout,
+    get_bingo_settings,
+    search_timeout,
+    set_bingo_settings,
+    track_settings,
+)
 from .types import BingoBinaryMol, BingoBinaryReaction, BingoMol, BingoReaction
 
 __all__ = [
@@ -21,4 +30,11 @@ __all__ = [
     "BingoRxnComparator",
     "BingoRxnIndex",
     "BingoRxnProxy",
+    "BingoSettings",
+    "asearch_timeout",
+    "get_bingo_settings",
+    "search_timeout",
+    "set_bingo_settings",
+    "stream_search",
+    "track_settings",
 ]
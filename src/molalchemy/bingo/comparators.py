@@ -1,9 +1,74 @@
 """Bingo SQLAlchemy comparators for chemical structure searching."""
 
-from sqlalchemy import ColumnElement, text
+from typing import Any, ClassVar
+
+from sqlalchemy import ColumnElement, bindparam
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql import ClauseElement
+from sqlalchemy.sql.visitors import InternalTraversal
 from sqlalchemy.types import UserDefinedType
 
 
+class _BingoQueryType(UserDefinedType):
+    """The composite search types of Bingo (`bingo.sub`, `bingo.sim`, ...)."""
+
+    cache_ok = True
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def get_col_spec(self, **kw: Any) -> str:
+        return f"bingo.{self.name}"
+
+
+class BingoQuery(ColumnElement):
+    """The right operand of a Bingo search operator, `(:field_1, ...)::bingo.<name>`.
+
+    Plain values are bound as unique parameters, so the SQL only depends on
+    `name` and the field names: statements differing in their queries share
+    SQLAlchemy's compiled statement cache and PostgreSQL prepared statements,
+    and several searches can be combined in one statement. SQL expressions
+    (e.g. columns) are embedded.
+
+    Parameters
+    ----------
+    name : str
+        The Bingo search type, e.g. `"sub"`, `"smarts"`, `"exact"`, `"sim"`,
+        `"rsub"`, `"rsmarts"` or `"rexact"`.
+    **fields : Any
+        The fields of the search type, in order.
+
+    Examples
+    --------
+    >>> mol_column.op("@")(BingoQuery("sub", query="c1ccccc1", parameters=""))
+    """
+
+    __visit_name__ = "bingo_query"
+    inherit_cache = True
+    _traverse_internals: ClassVar[list] = [
+        ("name", InternalTraversal.dp_string),
+        ("fields", InternalTraversal.dp_clauseelement_tuple),
+    ]
+
+    def __init__(self, name: str, **fields: Any):
+        self.name = name
+        self.fields = tuple(
+            value.__clause_element__()
+            if hasattr(value, "__clause_element__")
+            else value
+            if isinstance(value, ClauseElement)
+            else bindparam(field, value, unique=True)
+            for field, value in fields.items()
+        )
+        self.type = _BingoQueryType(name)
+
+
+@compiles(BingoQuery)
+def _compile_bingo_query(element: BingoQuery, compiler, **kw: Any) -> str:
+    fields = ", ".join(compiler.process(field, **kw) for field in element.fields)
+    return f"({fields})::bingo.{element.name}"
+
+
 class BingoMolComparator(UserDefinedType.Comparator):
     """
     Comparator class for molecular structure operations using Bingo database.
@@ -35,11 +100,7 @@ class BingoMolComparator(UserDefinedType.Comparator):
         --------
         >>> mol_column.has_substructure('c1ccccc1')  # benzene ring
         """
-        return self.expr.op("@")(
-            text("(:query, :params)\\:\\:bingo.sub").bindparams(
-                query=query, params=parameters
-            )
-        )
+        return self.expr.op("@")(BingoQuery("sub", query=query, parameters=parameters))
 
     def has_smarts(self, query: str, parameters: str = "") -> ColumnElement[bool]:
         """
@@ -62,9 +123,7 @@ class BingoMolComparator(UserDefinedType.Comparator):
         >>> mol_column.has_smarts('[#6]1:[#6]:[#6]:[#6]:[#6]:[#6]:1')  # aromatic ring
         """
         return self.expr.op("@")(
-            text("(:query, :params)\\:\\:bingo.smarts").bindparams(
-                query=query, params=parameters
-            )
+            BingoQuery("smarts", query=query, parameters=parameters)
         )
 
     def equals(self, query: str, parameters: str = "") -> ColumnElement[bool]:
@@ -88,9 +147,7 @@ class BingoMolComparator(UserDefinedType.Comparator):
         >>> mol_column.equals('CCO')  # ethanol exact match
         """
         return self.expr.op("@")(
-            text("(:query, :params)\\:\\:bingo.exact").bindparams(
-                query=query, params=parameters
-            )
+            BingoQuery("exact", query=query, parameters=parameters)
         )
 
 
@@ -125,11 +182,7 @@ class BingoRxnComparator(UserDefinedType.Comparator):
         --------
         >>> rxn_column.has_substructure('c1ccccc1>>c1ccc(O)cc1')  # phenol formation
         """
-        return self.expr.op("@")(
-            text("(:query, :params)\\:\\:bingo.rsub").bindparams(
-                query=query, params=parameters
-            )
-        )
+        return self.expr.op("@")(BingoQuery("rsub", query=query, parameters=parameters))
 
     def has_smarts(self, query: str, parameters: str = "") -> ColumnElement[bool]:
         """
@@ -152,9 +205,7 @@ class BingoRxnComparator(UserDefinedType.Comparator):
         >>> rxn_column.has_smarts('[C:1]>>[C:1][O]')  # C-O bond formation
         """
         return self.expr.op("@")(
-            text("(:query, :params)\\:\\:bingo.rsmarts").bindparams(
-                query=query, params=parameters
-            )
+            BingoQuery("rsmarts", query=query, parameters=parameters)
         )
 
     def equals(self, query: str, parameters: str = "") -> ColumnElement[bool]:
@@ -178,7 +229,5 @@ class BingoRxnComparator(UserDefinedType.Comparator):
         >>> rxn_column.has_equals('CCO>>CC=O')  # ethanol to acetaldehyde exact match
         """
         return self.expr.op("@")(
-            text("(:query, :params)\\:\\:bingo.rexact").bindparams(
-                query=query, params=parameters
-            )
+            BingoQuery("rexact", query=query, parameters=parameters)
         )
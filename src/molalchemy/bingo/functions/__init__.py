@@ -28,12 +28,14 @@ from .general import (
     getversion,
     getweight,
     gross,
+    has_reaction_substructure,
     has_substructure,
     importrdf,
     importsdf,
     importsmiles,
     inchi,
     inchikey,
+    matches_reaction_smarts,
     matches_smarts,
     matchexact,
     matchgross,
@@ -47,6 +49,7 @@ from .general import (
     molfile,
     precachedatabase,
     rcml,
+    reaction_equals,
     rfingerprint,
     rsmiles,
     rxnfile,
@@ -119,12 +122,14 @@ __all__ = [
     "getversion",
     "getweight",
     "gross",
+    "has_reaction_substructure",
     "has_substructure",
     "importrdf",
     "importsdf",
     "importsmiles",
     "inchi",
     "inchikey",
+    "matches_reaction_smarts",
     "matches_smarts",
     "matchexact",
     "matchgross",
@@ -138,6 +143,7 @@ __all__ = [
     "molfile",
     "precachedatabase",
     "rcml",
+    "reaction_equals",
     "rfingerprint",
     "rsmiles",
     "rxnfile",
@@ -5,10 +5,11 @@ This file defines public Bingo PostgreSQL function wrappers for use with SQLAlch
 from typing import Any, Literal
 
 from sqlalchemy import types as sqltypes
-from sqlalchemy.sql import text
 from sqlalchemy.sql.elements import BinaryExpression, ColumnElement
 from sqlalchemy.sql.functions import GenericFunction
 
+from molalchemy.bingo.comparators import BingoQuery
+
 from ._types import (
     AnyBingoBinaryMolLike,
     AnyBingoBinaryReactionLike,
@@ -46,7 +47,7 @@ def has_substructure(
         SQLAlchemy expression for substructure matching that can be used in WHERE clauses.
 
     """
-    return mol.op("@")(text(f"('{query}', '{parameters}')::bingo.sub"))
+    return mol.op("@")(BingoQuery("sub", query=query, parameters=parameters))
 
 
 def matches_smarts(
@@ -70,7 +71,7 @@ def matches_smarts(
         SQLAlchemy expression for SMARTS matching that can be used in WHERE clauses.
 
     """
-    return mol.op("@")(text(f"('{query}', '{parameters}')::bingo.smarts"))
+    return mol.op("@")(BingoQuery("smarts", query=query, parameters=parameters))
 
 
 def mol_equals(
@@ -95,7 +96,7 @@ def mol_equals(
         SQLAlchemy expression for exact matching that can be used in WHERE clauses.
 
     """
-    return mol.op("@")(text(f"('{query}', '{parameters}')::bingo.exact"))
+    return mol.op("@")(BingoQuery("exact", query=query, parameters=parameters))
 
 
 def similarity(
@@ -129,7 +130,81 @@ def similarity(
         SQLAlchemy expression for similarity matching that can be used in WHERE clauses.
 
     """
-    return mol.op("%")(text(f"('{query}', {bottom}, {top}, '{metric}')::bingo.sim"))
+    return mol.op("%")(
+        BingoQuery("sim", query=query, bottom=bottom, top=top, metric=metric)
+    )
+
+
+def has_reaction_substructure(
+    rxn: ColumnElement[AnyBingoReaction], query: TextLike, parameters: TextLike = ""
+):
+    """
+    Perform reaction substructure search on a reaction column.
+
+    Parameters
+    ----------
+    rxn : ColumnElement[AnyBingoReaction]
+        SQLAlchemy column containing reaction data (reaction SMILES, RXN, or binary).
+    query : TextLike
+        Query reaction as reaction SMILES or RXN string.
+    parameters : TextLike, optional
+        Search parameters for customizing the matching behavior (default is "").
+
+    Returns
+    -------
+    BinaryExpression
+        SQLAlchemy expression for reaction substructure matching that can be used in WHERE clauses.
+
+    """
+    return rxn.op("@")(BingoQuery("rsub", query=query, parameters=parameters))
+
+
+def matches_reaction_smarts(
+    rxn: ColumnElement[AnyBingoReaction], query: TextLike, parameters: TextLike = ""
+):
+    """
+    Perform reaction SMARTS pattern matching on a reaction column.
+
+    Parameters
+    ----------
+    rxn : ColumnElement[AnyBingoReaction]
+        SQLAlchemy column containing reaction data (reaction SMILES, RXN, or binary).
+    query : TextLike
+        Reaction SMARTS pattern string for matching.
+    parameters : TextLike, optional
+        Search parameters for customizing the matching behavior (default is "").
+
+    Returns
+    -------
+    BinaryExpression
+        SQLAlchemy expression for reaction SMARTS matching that can be used in WHERE clauses.
+
+    """
+    return rxn.op("@")(BingoQuery("rsmarts", query=query, parameters=parameters))
+
+
+def reaction_equals(
+    rxn: ColumnElement[AnyBingoReaction], query: TextLike, parameters: TextLike = ""
+):
+    """
+    Perform exact reaction matching on a reaction column.
+
+    Parameters
+    ----------
+    rxn : ColumnElement[AnyBingoReaction]
+        SQLAlchemy column containing reaction data (reaction SMILES, RXN, or binary).
+    query : TextLike
+        Query reaction as reaction SMILES or RXN string for exact matching.
+    parameters : TextLike, optional
+        Search parameters for customizing the matching behavior (default is "").
+
+    Returns
+    -------
+    BinaryExpression
+        SQLAlchemy expression for exact reaction matching that can be used in WHERE clauses.
+
+    """
+    return rxn.op("@")(BingoQuery("rexact", query=query, parameters=parameters))
 
 
 class aam(GenericFunction):
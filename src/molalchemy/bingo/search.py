@@ -0,0 +1,192 @@
+"""Streaming structure search and substructure screening over Bingo cartridge columns."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Literal
+
+from sqlalchemy import Text, select
+
+from molalchemy._search import any_key, stream, unnest_queries
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator, Sequence
+
+    from sqlalchemy import ColumnElement, Connection, Select
+    from sqlalchemy.orm import Session
+
+SearchType = Literal["substructure", "smarts", "exact"]
+ScreenType = Literal["substructure", "smarts"]
+
+
+def build_search(
+    column: Any,
+    query: str,
+    *,
+    search: SearchType = "substructure",
+    parameters: str = "",
+    extra_columns: Sequence[ColumnElement] = (),
+    limit: int | None = None,
+) -> Select:
+    """Build the SELECT statement run by `stream_search`.
+
+    See `stream_search` for the parameters.
+    """
+    if search == "substructure":
+        condition = column.has_substructure(query, parameters)
+    elif search == "smarts":
+        condition = column.has_smarts(query, parameters)
+    elif search == "exact":
+        condition = column.equals(query, parameters)
+    else:
+        raise ValueError(
+            f"Invalid search: {search!r}. Available options are 'substructure', 'smarts', 'exact'."
+        )
+    stmt = select(column, *extra_columns).where(condition)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+
+def stream_search(
+    connection: Connection | Session,
+    column: Any,
+    query: str,
+    *,
+    search: SearchType = "substructure",
+    parameters: str = "",
+    extra_columns: Sequence[ColumnElement] = (),
+    fetch_size: int = 1000,
+    limit: int | None = None,
+) -> Iterator[Any]:
+    """Search a Bingo molecule column and stream the hits from a server-side cursor.
+
+    The Bingo counterpart of `molalchemy.rdkit.search.stream_search`: hits are
+    fetched `fetch_size` at a time from a named server-side cursor, which is
+    closed when the generator is exhausted or closed.
+
+    Parameters
+    ----------
+    connection : sqlalchemy.Connection | sqlalchemy.orm.Session
+        Connection or session to run the query on.
+    column : sqlalchemy.Column | sqlalchemy.orm.InstrumentedAttribute
+        The `BingoMol` or `BingoBinaryMol` column to search.
+    query : str
+        The query structure as a SMILES, SMARTS or MOL string.
+    search : Literal["substructure", "smarts", "exact"], default "substructure"
+        The search to run, see `BingoMolComparator`.
+    parameters : str, optional
+        Bingo search parameters, by default "".
+    extra_columns : Sequence[ColumnElement], optional
+        Additional columns to select, e.g. the primary key.
+    fetch_size : int, default 1000
+        Number of rows fetched from the server per round trip.
+    limit : int, optional
+        Maximum number of hits.
+
+    Yields
+    ------
+    Any
+        The hit molecule, as returned by the column type, or a `Row` of the
+        molecule followed by `extra_columns` if any are given.
+
+    Examples
+    --------
+    >>> from molalchemy.bingo import stream_search
+    >>> with Session(engine) as session:
+    ...     for smiles in stream_search(session, Molecule.structure, "c1ccccc1"):
+    ...         ...
+    """
+    stmt = build_search(
+        column,
+        query,
+        search=search,
+        parameters=parameters,
+        extra_columns=extra_columns,
+        limit=limit,
+    )
+    return stream(connection, stmt, fetch_size, scalars=not extra_columns)
+
+
+def build_screen(
+    column: Any,
+    key_column: Any,
+    patterns: Sequence[str],
+    *,
+    search: ScreenType = "smarts",
+    parameters: str = "",
+    keys: Iterable[Any] | None = None,
+) -> Select:
+    """Build the SELECT statement run by `screen`.
+
+    See `screen` for the parameters.
+    """
+    if not patterns:
+        raise ValueError("No patterns given")
+    patterns_table = unnest_queries(patterns, Text(), "patterns")
+    if search == "smarts":
+        condition = column.has_smarts(patterns_table.c.value, parameters)
+    elif search == "substructure":
+        condition = column.has_substructure(patterns_table.c.value, parameters)
+    else:
+        raise ValueError(
+            f"Invalid search: {search!r}. Available options are 'substructure', 'smarts'."
+        )
+    stmt = (
+        select((patterns_table.c.idx - 1).label("query_idx"), key_column)
+        .select_from(patterns_table)
+        .where(condition)
+    )
+    if keys is not None:
+        stmt = stmt.where(any_key(key_column, keys))
+    return stmt.order_by(patterns_table.c.idx, key_column)
+
+
+def screen(
+    connection: Connection | Session,
+    column: Any,
+    key_column: Any,
+    patterns: Sequence[str],
+    *,
+    search: ScreenType = "smarts",
+    parameters: str = "",
+    keys: Iterable[Any] | None = None,
+    fetch_size: int = 10_000,
+) -> Iterator[Any]:
+    """Match many substructure patterns against a table in one statement.
+
+    The Bingo counterpart of `molalchemy.rdkit.search.screen`: the patterns
+    are sent as a single array parameter, unnested and joined to the table of
+    `column` with the Bingo `@` operator. The result is the sparse hit matrix
+    as `(query_idx, <key>)` pairs.
+
+    Parameters
+    ----------
+    connection : sqlalchemy.Connection | sqlalchemy.orm.Session
+        Connection or session to run the query on.
+    column : sqlalchemy.Column | sqlalchemy.orm.InstrumentedAttribute
+        The `BingoMol` or `BingoBinaryMol` column to screen.
+    key_column : sqlalchemy.Column | sqlalchemy.orm.InstrumentedAttribute
+        Column identifying the rows, usually the primary key.
+    patterns : Sequence[str]
+        The query patterns, e.g. structural alerts.
+    search : Literal["substructure", "smarts"], default "smarts"
+        Whether the patterns are SMARTS (`bingo.smarts`) or query molecules
+        (`bingo.sub`).
+    parameters : str, optional
+        Bingo search parameters applied to every pattern, by default "".
+    keys : Iterable, optional
+        Restrict the screen to the rows with these keys. Bound as a single
+        array parameter.
+    fetch_size : int, default 10000
+        Number of rows fetched from the server per round trip.
+
+    Yields
+    ------
+    sqlalchemy.Row
+        `(query_idx, <key>)` pairs, where `query_idx` is the position of the
+        pattern in `patterns`, ordered by pattern and key.
+    """
+    stmt = build_screen(
+        column, key_column, patterns, search=search, parameters=parameters, keys=keys
+    )
+    return stream(connection, stmt, fetch_size, scalars=False)
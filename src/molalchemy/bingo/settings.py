@@ -0,0 +1,310 @@
+"""Bingo PostgreSQL configuration and search timeout helpers.
+
+Bingo keeps its configuration in the `bingo.bingo_config` table, read with
+`bingo.getConfigInt` and written with `bingo.setConfigInt`. Unlike RDKit's
+GUC variables, changes are therefore transactional and database-wide: they
+are visible to other sessions once committed. `BingoSettings.override` sets
+and restores values inside the current transaction, so other sessions never
+see them, but the configuration rows stay locked until the transaction ends.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, fields
+from typing import TYPE_CHECKING, Any
+
+from sqlalchemy import event, text
+from sqlalchemy.exc import DBAPIError
+
+from molalchemy._guc import SearchHandle as SearchHandle
+from molalchemy._guc import asearch_timeout as asearch_timeout
+from molalchemy._guc import search_timeout as search_timeout
+from molalchemy._guc import track_settings as track_settings
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+    from sqlalchemy import Connection, Engine, TextClause
+    from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+    from sqlalchemy.orm import Session
+
+# Configuration keys that differ from the field names
+_KEYS = {
+    "fp_ord_size": "FP_ORD_SIZE",
+    "fp_any_size": "FP_ANY_SIZE",
+    "fp_tau_size": "FP_TAU_SIZE",
+    "fp_sim_size": "FP_SIM_SIZE",
+    "sub_screening_max_bits": "SUB_SCREENING_MAX_BITS",
+    "sim_screening_pass_mark": "SIM_SCREENING_PASS_MARK",
+}
+# Settings that may be zero or negative (-1 uses all cores)
+_SIGNED = frozenset({"nthreads"})
+# Boolean settings, stored as 0/1
+_FLAGS = frozenset(
+    {
+        "treat_x_as_pseudoatom",
+        "ignore_closing_bond_direction_mismatch",
+        "ignore_stereocenter_errors",
+        "ignore_cistrans_errors",
+        "ignore_bad_valence",
+        "stereochemistry_bidirectional_mode",
+        "stereochemistry_detect_haworth_projection",
+        "allow_non_unique_dearomatization",
+        "zero_unknown_aromatic_hydrogens",
+        "reject_invalid_structures",
+    }
+)
+
+
+@dataclass(frozen=True, kw_only=True)
+class BingoSettings:
+    """Bingo cartridge configuration (`bingo.bingo_config` entries).
+
+    Settings left as `None` keep the database's value.
+
+    Parameters
+    ----------
+    timeout : int, optional
+        Time limit of a single structure operation, in milliseconds.
+    nthreads : int, optional
+        Number of threads used for index builds, -1 for all cores.
+    fp_ord_size, fp_any_size, fp_tau_size, fp_sim_size : int, optional
+        Sizes of the ordinary, "any"-bond, tautomer and similarity parts of the
+        fingerprints stored in the index, in 64-bit words. Take effect when an
+        index is built.
+    sub_screening_max_bits : int, optional
+        Maximum number of query fingerprint bits used for substructure screening.
+    sim_screening_pass_mark : int, optional
+        Number of candidates after which similarity screening stops refining.
+    treat_x_as_pseudoatom, ignore_closing_bond_direction_mismatch, ignore_stereocenter_errors, ignore_cistrans_errors, ignore_bad_valence : bool, optional
+        Leniency of the structure loader.
+    stereochemistry_bidirectional_mode, stereochemistry_detect_haworth_projection : bool, optional
+        Stereochemistry perception options.
+    allow_non_unique_dearomatization, zero_unknown_aromatic_hydrogens : bool, optional
+        Aromaticity options.
+    reject_invalid_structures : bool, optional
+        Whether invalid structures are rejected instead of skipped when indexing.
+
+    Examples
+    --------
+    >>> settings = get_bingo_settings(session, "timeout", "sub_screening_max_bits")
+    >>> with BingoSettings(timeout=5000).override(session):
+    ...     session.execute(select(Molecule.id).where(Molecule.structure.has_substructure(q)))
+    """
+
+    timeout: int | None = None
+    nthreads: int | None = None
+    fp_ord_size: int | None = None
+    fp_any_size: int | None = None
+    fp_tau_size: int | None = None
+    fp_sim_size: int | None = None
+    sub_screening_max_bits: int | None = None
+    sim_screening_pass_mark: int | None = None
+    treat_x_as_pseudoatom: bool | None = None
+    ignore_closing_bond_direction_mismatch: bool | None = None
+    ignore_stereocenter_errors: bool | None = None
+    ignore_cistrans_errors: bool | None = None
+    ignore_bad_valence: bool | None = None
+    stereochemistry_bidirectional_mode: bool | None = None
+    stereochemistry_detect_haworth_projection: bool | None = None
+    allow_non_unique_dearomatization: bool | None = None
+    zero_unknown_aromatic_hydrogens: bool | None = None
+    reject_invalid_structures: bool | None = None
+
+    def __post_init__(self) -> None:
+        for field in fields(self):
+            value = getattr(self, field.name)
+            if value is None:
+                continue
+            expected = bool if field.name in _FLAGS else int
+            if not isinstance(value, expected) or (
+                expected is int and isinstance(value, bool)
+            ):
+                raise TypeError(
+                    f"{field.name} must be {'a bool' if expected is bool else 'an int'}, "
+                    f"got {type(value).__name__}"
+                )
+            if expected is int and field.name not in _SIGNED and value < 1:
+                raise ValueError(f"{field.name} must be positive, got {value}")
+
+    def config(self) -> dict[str, int]:
+        """Return the configured settings as `bingo_config` keys and integer values."""
+        return {
+            _KEYS.get(field.name, field.name): int(value)
+            for field in fields(self)
+            if (value := getattr(self, field.name)) is not None
+        }
+
+    def apply(self, engine: Engine | AsyncEngine) -> None:
+        """Make sure the database has these settings whenever `engine` connects.
+
+        Each new physical connection reads the settings, writes them if any
+        differs and commits. Since Bingo's configuration is database-wide, the
+        values become the defaults of every session; engines with different
+        settings must not share a database.
+        """
+        config = self.config()
+        if not config:
+            return
+        # Keys come from the field names and values are ints, so both can be inlined
+        read = "SELECT {}".format(
+            ", ".join(f"bingo.getConfigInt('{key}')" for key in config)
+        )
+        write = "SELECT {}".format(
+            ", ".join(
+                f"bingo.setConfigInt('{key}', {value})" for key, value in config.items()
+            )
+        )
+        expected = tuple(config.values())
+
+        def on_connect(dbapi_connection, connection_record) -> None:
+            cursor = dbapi_connection.cursor()
+            try:
+                cursor.execute(read)
+                if tuple(cursor.fetchone()) != expected:
+                    cursor.execute(write)
+            finally:
+                cursor.close()
+            dbapi_connection.commit()
+
+        event.listen(getattr(engine, "sync_engine", engine), "connect", on_connect)
+
+    def override(
+        self, session: Session | Connection | AsyncSession | AsyncConnection
+    ) -> _Override:
+        """Return a context manager setting these settings for a block.
+
+        The previous values are read first and written back on exit, inside
+        the current transaction. After a database error nothing is written
+        back: rolling back the aborted transaction undoes the change. Use
+        `with` on synchronous and `async with` on asynchronous sessions and
+        connections.
+        """
+        return _Override(session, self.config())
+
+
+_FIELDS = {
+    field.name: _KEYS.get(field.name, field.name) for field in fields(BingoSettings)
+}
+
+
+def _resolve(names: tuple[str, ...]) -> dict[str, str]:
+    if not names:
+        return dict(_FIELDS)
+    unknown = [name for name in names if name not in _FIELDS]
+    if unknown:
+        raise ValueError(
+            f"Unknown Bingo settings: {', '.join(map(repr, unknown))}. "
+            f"Available options are {', '.join(map(repr, _FIELDS))}."
+        )
+    return {name: _FIELDS[name] for name in names}
+
+
+def _get_statement(keys: Mapping[str, str]) -> tuple[TextClause, dict[str, str]]:
+    columns = ", ".join(f"bingo.getConfigInt(:key_{i})" for i in range(len(keys)))
+    return text(f"SELECT {columns}"), {
+        f"key_{i}": key for i, key in enumerate(keys.values())
+    }
+
+
+def _set_statement(config: Mapping[str, int]) -> tuple[TextClause, dict[str, Any]]:
+    calls = []
+    params: dict[str, Any] = {}
+    for i, (key, value) in enumerate(config.items()):
+        calls.append(f"bingo.setConfigInt(:key_{i}, :value_{i})")
+        params[f"key_{i}"] = key
+        params[f"value_{i}"] = value
+    return text(f"SELECT {', '.join(calls)}"), params
+
+
+def _to_settings(names: Mapping[str, str], row: Any) -> BingoSettings:
+    values = {}
+    for name, value in zip(names, row, strict=True):
+        if value is not None:
+            values[name] = bool(value) if name in _FLAGS else int(value)
+    return BingoSettings(**values)
+
+
+def get_bingo_settings(session: Session | Connection, *names: str) -> BingoSettings:
+    """Read Bingo settings in a single query.
+
+    Parameters
+    ----------
+    session : sqlalchemy.orm.Session | sqlalchemy.Connection
+        Session or connection.
+    *names : str
+        `BingoSettings` fields to read. Defaults to all of them.
+
+    Returns
+    -------
+    BingoSettings
+        The values, `None` for settings the database does not know.
+    """
+    keys = _resolve(names)
+    row = session.execute(*_get_statement(keys)).one()
+    return _to_settings(keys, row)
+
+
+def set_bingo_settings(session: Session | Connection, settings: BingoSettings) -> None:
+    """Write the settings of `settings` that are not `None` in a single statement.
+
+    The change is part of the current transaction and database-wide once committed.
+    """
+    config = settings.config()
+    if config:
+        session.execute(*_set_statement(config))
+
+
+async def aget_bingo_settings(
+    session: AsyncSession | AsyncConnection, *names: str
+) -> BingoSettings:
+    """Async version of `get_bingo_settings`."""
+    keys = _resolve(names)
+    row = (await session.execute(*_get_statement(keys))).one()
+    return _to_settings(keys, row)
+
+
+async def aset_bingo_settings(
+    session: AsyncSession | AsyncConnection, settings: BingoSettings
+) -> None:
+    """Async version of `set_bingo_settings`."""
+    config = settings.config()
+    if config:
+        await session.execute(*_set_statement(config))
+
+
+class _Override:
+    def __init__(self, session: Any, config: dict[str, int]):
+        self.session = session
+        self.config = config
+        self._previous: dict[str, int] = {}
+
+    def _remember(self, row: Any) -> None:
+        self._previous = {
+            key: value
+            for key, value in zip(self.config, row, strict=True)
+            if value is not None
+        }
+
+    def __enter__(self) -> None:
+        if self.config:
+            keys = dict(zip(self.config, self.config, strict=True))
+            self._remember(self.session.execute(*_get_statement(keys)).one())
+            self.session.execute(*_set_statement(self.config))
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        previous, self._previous = self._previous, {}
+        if previous and not isinstance(exc, DBAPIError):
+            self.session.execute(*_set_statement(previous))
+
+    async def __aenter__(self) -> None:
+        if self.config:
+            keys = dict(zip(self.config, self.config, strict=True))
+            result = await self.session.execute(*_get_statement(keys))
+            self._remember(result.one())
+            await self.session.execute(*_set_statement(self.config))
+
+    async def __aexit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        previous, self._previous = self._previous, {}
+        if previous and not isinstance(exc, DBAPIError):
+            await self.session.execute(*_set_statement(previous))
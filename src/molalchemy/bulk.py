@@ -0,0 +1,275 @@
+"""Bulk loading of RDKit columns through binary `COPY`.
+
+`bulk_load` streams rows into a temporary staging table with psycopg's
+`COPY ... FROM STDIN (FORMAT BINARY)` and converts the staged pickles into
+`mol`, `bfp` and `reaction` values with one set-based `INSERT ... SELECT` per
+batch. Molecules and reactions are validated on the client by the bind
+processors of `RdkitMol` and `RdkitReaction`, so invalid rows can be reported
+(or skipped) before anything is sent to the database.
+"""
+
+from __future__ import annotations
+
+import uuid
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Literal, NamedTuple
+
+import psycopg
+from loguru import logger
+from sqlalchemy import (
+    Column,
+    LargeBinary,
+    MetaData,
+    Table,
+    Text,
+    cast,
+    func,
+    insert,
+    select,
+    text,
+)
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from molalchemy.exceptions import InvalidMoleculeError, InvalidReactionError
+from molalchemy.rdkit.types import (
+    RdkitBaseType,
+    RdkitBitFingerprint,
+    RdkitMol,
+    RdkitReaction,
+)
+from molalchemy.types import CString
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Mapping, Sequence
+
+    from sqlalchemy import Connection
+    from sqlalchemy.sql.elements import ColumnElement
+
+__all__ = ["BulkLoadResult", "FailedRow", "bulk_load"]
+
+OnError = Literal["raise", "skip"]
+_CONVERSION_ERRORS = (InvalidMoleculeError, InvalidReactionError, TypeError, ValueError)
+
+
+class FailedRow(NamedTuple):
+    """A row rejected by client-side validation."""
+
+    index: int
+    row: Mapping[str, Any]
+    error: str
+
+
+class BulkLoadResult(NamedTuple):
+    """Outcome of a `bulk_load` call."""
+
+    inserted: int
+    failed: list[FailedRow]
+
+
+class _StagedColumn(NamedTuple):
+    column: Column
+    stage_type: Any
+    convert: Callable[[Any], Any] | None
+    expression: Callable[[ColumnElement], ColumnElement]
+
+
+def _stage_column(column: Column) -> _StagedColumn:
+    """Return how `column` is staged, converted on the client and selected."""
+    type_ = column.type
+    dialect = postgresql.psycopg.dialect()
+    if isinstance(type_, RdkitMol):
+        stage_type = LargeBinary() if type_.validate == "client" else Text()
+        return _StagedColumn(
+            column, stage_type, type_.bind_processor(dialect), type_.bind_expression
+        )
+    if isinstance(type_, RdkitReaction):
+        if type_.validate == "client":
+            # reaction_from_smarts() takes a cstring, which text does not cast to implicitly
+            def expression(col):
+                return func.reaction_from_smarts(cast(col, CString))
+        else:
+            expression = type_.bind_expression
+        return _StagedColumn(column, Text(), type_.bind_processor(dialect), expression)
+    if isinstance(type_, RdkitBitFingerprint):
+        return _StagedColumn(
+            column, LargeBinary(), type_.bind_processor(dialect), type_.bind_expression
+        )
+    if isinstance(type_, RdkitBaseType):
+        raise ValueError(
+            f"Column {column.key!r} of type {type_!r} is not supported by bulk_load"
+        )
+    return _StagedColumn(column, type_, None, lambda col: col)
+
+
+def _resolve_table(target: Any) -> Table:
+    if isinstance(target, Table):
+        return target
+    return sa_inspect(target).local_table
+
+
+def _convert_rows(
+    rows: Sequence[Mapping[str, Any]],
+    staged: Sequence[_StagedColumn],
+    start: int,
+    on_error: OnError,
+    failed: list[FailedRow],
+) -> list[tuple[Any, ...]]:
+    converted = []
+    for offset, row in enumerate(rows):
+        values = []
+        try:
+            for stage in staged:
+                value = row.get(stage.column.key)
+                if stage.convert is not None and value is not None:
+                    value = stage.convert(value)
+                values.append(value)
+        except _CONVERSION_ERRORS as exc:
+            if on_error == "raise":
+                raise type(exc)(f"Row {start + offset}: {exc}") from exc
+            failed.append(FailedRow(start + offset, row, str(exc)))
+            continue
+        converted.append(tuple(values))
+    return converted
+
+
+def _copy_rows(cursor, copy_sql: str, oids: list[int], rows) -> None:
+    with cursor.copy(copy_sql) as copy:
+        copy.set_types(oids)
+        for row in rows:
+            copy.write_row(row)
+
+
+def bulk_load(
+    connection: Connection | Session,
+    target: Any,
+    rows: Iterable[Mapping[str, Any]],
+    *,
+    batch_size: int = 10_000,
+    on_error: OnError = "raise",
+) -> BulkLoadResult:
+    """Insert `rows` into `target` with binary `COPY` and a set-based `INSERT ... SELECT`.
+
+    Rows are consumed lazily, `batch_size` at a time, so memory use is bounded by
+    one batch regardless of the size of `rows`; psycopg applies back-pressure
+    while the batch is streamed to the server. Each batch is validated and
+    converted on the client, copied into a temporary staging table and inserted
+    into `target`, all inside the current transaction.
+
+    Parameters
+    ----------
+    connection : sqlalchemy.Connection | sqlalchemy.orm.Session
+        Connection (or session) using the psycopg 3 driver, in a transaction.
+    target : type | sqlalchemy.Table
+        Mapped class or table to insert into.
+    rows : Iterable[Mapping[str, Any]]
+        Rows keyed by column key. The columns loaded are the keys of the first
+        row; keys missing from later rows are loaded as NULL.
+    batch_size : int, default 10000
+        Number of rows copied and inserted per batch.
+    on_error : Literal["raise", "skip"], default "raise"
+        What to do with rows failing client-side validation: raise with the row
+        index in the message, or skip them and report them in the result.
+
+    Returns
+    -------
+    BulkLoadResult
+        The number of inserted rows and the rows that were skipped.
+
+    Raises
+    ------
+    InvalidMoleculeError, InvalidReactionError
+        If a row fails validation and `on_error="raise"`.
+    ValueError
+        If a column type cannot be bulk loaded (`sfp`, `qmol`, `xqmol`).
+    TypeError
+        If the connection does not use the psycopg 3 driver.
+
+    Notes
+    -----
+    RDKit columns are staged as `bytea` (pickles for `RdkitMol`, binary text
+    for `RdkitBitFingerprint`) or
+    `text` (reactions and molecules with `validate="server"`/`"none"`), and
+    converted with `mol_from_pkl`, `bfp_from_binary_text` and the reaction
+    parsers. Values of other columns are adapted by psycopg directly, without
+    their SQLAlchemy bind processors. Rows failing server-side conversion make
+    the batch's `INSERT ... SELECT` raise.
+
+    Examples
+    --------
+    >>> from molalchemy.bulk import bulk_load
+    >>> with engine.begin() as conn:
+    ...     result = bulk_load(conn, Molecule, rows, on_error="skip")
+    >>> result.inserted, [failed.index for failed in result.failed]
+    (99998, [17, 4711])
+    """
+    if batch_size < 1:
+        raise ValueError(f"batch_size must be positive, got {batch_size}")
+    if on_error not in ("raise", "skip"):
+        raise ValueError(
+            f"Invalid on_error: {on_error!r}. Available options are 'raise', 'skip'."
+        )
+    rows = iter(rows)
+    first_batch = list(islice(rows, batch_size))
+    failed: list[FailedRow] = []
+    if not first_batch:
+        return BulkLoadResult(0, failed)
+
+    conn = connection.connection() if isinstance(connection, Session) else connection
+    driver_connection = conn.connection.driver_connection
+    if not isinstance(driver_connection, psycopg.Connection):
+        raise TypeError("bulk_load requires the psycopg 3 driver")
+    table = _resolve_table(target)
+    staged = [
+        _stage_column(column)
+        for column in table.columns
+        if column.key in first_batch[0]
+    ]
+    stage = Table(
+        f"_molalchemy_stage_{uuid.uuid4().hex[:12]}",
+        MetaData(),
+        *(Column(s.column.name, s.stage_type) for s in staged),
+        prefixes=["TEMPORARY"],
+        postgresql_on_commit="DROP",
+    )
+    stage.create(conn)
+    insert_stmt = insert(table).from_select(
+        [s.column for s in staged],
+        select(*(s.expression(stage.c[s.column.name]) for s in staged)),
+    )
+    preparer = conn.dialect.identifier_preparer
+    quoted = preparer.format_table(stage)
+    copy_sql = "COPY {} ({}) FROM STDIN (FORMAT BINARY)".format(
+        quoted, ", ".join(preparer.quote(s.column.name) for s in staged)
+    )
+    oids = [
+        row[0]
+        for row in conn.execute(
+            text(
+                "SELECT atttypid FROM pg_attribute WHERE attrelid = CAST(:name AS regclass) "
+                "AND attnum > 0 AND NOT attisdropped ORDER BY attnum"
+            ),
+            {"name": quoted},
+        )
+    ]
+
+    inserted = 0
+    start = 0
+    batch = first_batch
+    while batch:
+        converted = _convert_rows(batch, staged, start, on_error, failed)
+        if converted:
+            with driver_connection.cursor() as cursor:
+                _copy_rows(cursor, copy_sql, oids, converted)
+            conn.execute(insert_stmt)
+            conn.execute(text(f"TRUNCATE {quoted}"))
+            inserted += len(converted)
+        logger.debug(
+            f"bulk_load: {inserted} rows inserted into {table.name}, {len(failed)} failed"
+        )
+        start += len(batch)
+        batch = list(islice(rows, batch_size))
+    # On errors the staging table goes away with the rolled back transaction
+    conn.execute(text(f"DROP TABLE {quoted}"))
+    return BulkLoadResult(inserted, failed)
@@ -1,9 +1,12 @@
 """Custom exceptions for molalchemy."""
 
 __all__ = [
+    "InvalidCursorError",
     "InvalidMoleculeError",
     "InvalidReactionError",
     "MolAlchemyError",
+    "SearchCancelledError",
+    "SearchTimeoutError",
 ]
 
 
@@ -17,3 +20,15 @@ class InvalidMoleculeError(MolAlchemyError, ValueError):
 
 class InvalidReactionError(MolAlchemyError, ValueError):
     """Raised when an invalid reaction representation is encountered."""
+
+
+class InvalidCursorError(MolAlchemyError, ValueError):
+    """Raised when a pagination cursor is malformed or does not match the query."""
+
+
+class SearchCancelledError(MolAlchemyError):
+    """Raised when the server cancels a search statement."""
+
+
+class SearchTimeoutError(SearchCancelledError, TimeoutError):
+    """Raised when a search statement exceeds its `statement_timeout`."""
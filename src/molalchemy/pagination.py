@@ -0,0 +1,259 @@
+"""Keyset pagination for substructure and similarity searches.
+
+Paging with `OFFSET` makes the database rerun the search and discard every hit
+before the page, so deep pages cost as much as fetching everything up to them.
+Keyset pagination instead continues after the last row of the previous page:
+
+- substructure (and other unordered) searches are ordered by the primary key
+  and continue with `pk > :last_pk`, which the primary key index answers;
+- similarity searches are ordered by `(score DESC, pk)` and continue with
+  `score <= :last_score AND (score < :last_score OR pk > :last_pk)`.
+
+The position is handed to clients as an opaque, URL-safe cursor token, so a
+web UI only passes the token of the previous page back. Keys may be JSON values
+or `uuid.UUID`, `decimal.Decimal`, `datetime.datetime` and `datetime.date`
+instances, which are tagged with their type and decoded back to it.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import datetime
+import decimal
+import json
+import uuid
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from sqlalchemy import ColumnElement, and_, or_
+
+from molalchemy.exceptions import InvalidCursorError
+
+if TYPE_CHECKING:
+    from sqlalchemy import Connection, Row, Select
+    from sqlalchemy.orm import Session
+
+__all__ = ["Page", "decode_cursor", "encode_cursor", "fetch_page", "paginate"]
+
+_CURSOR_VERSION = 1
+# Tags of key types JSON cannot represent; datetime precedes its base class date
+_TAGGED_TYPES: dict[str, tuple[type, Any, Any]] = {
+    "uuid": (uuid.UUID, str, uuid.UUID),
+    "decimal": (decimal.Decimal, str, decimal.Decimal),
+    "datetime": (
+        datetime.datetime,
+        datetime.datetime.isoformat,
+        datetime.datetime.fromisoformat,
+    ),
+    "date": (datetime.date, datetime.date.isoformat, datetime.date.fromisoformat),
+}
+
+
+class Page(NamedTuple):
+    """A page of search results and the cursor of the next page, `None` on the last page."""
+
+    rows: list[Row[Any]]
+    next_cursor: str | None
+
+
+def encode_cursor(key: Any, score: float | None = None) -> str:
+    """Encode the position after a row with primary key `key` (and `score`) as a cursor token.
+
+    `key` may be a JSON value, or a `uuid.UUID`, `decimal.Decimal`,
+    `datetime.datetime` or `datetime.date`.
+
+    Raises
+    ------
+    TypeError
+        If `key` or `score` is of another type.
+    """
+    position: dict[str, Any] = {"v": _CURSOR_VERSION, "k": key}
+    if score is not None:
+        position["s"] = score
+    data = json.dumps(position, separators=(",", ":"), default=_tag).encode()
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(token: str, *, scored: bool = False) -> tuple[Any, float | None]:
+    """Decode a cursor token created by `encode_cursor` into `(key, score)`.
+
+    Parameters
+    ----------
+    token : str
+        The cursor token.
+    scored : bool, default False
+        Whether the cursor must carry a score, i.e. belongs to a similarity search.
+
+    Raises
+    ------
+    InvalidCursorError
+        If the token is malformed or was created for the other kind of search.
+    """
+    try:
+        data = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        position = json.loads(data, object_hook=_untag)
+    except (
+        binascii.Error,
+        decimal.InvalidOperation,
+        UnicodeDecodeError,
+        TypeError,
+        ValueError,
+    ) as exc:
+        raise InvalidCursorError(f"Malformed cursor: {token!r}") from exc
+    if (
+        not isinstance(position, dict)
+        or position.get("v") != _CURSOR_VERSION
+        or "k" not in position
+    ):
+        raise InvalidCursorError(f"Malformed cursor: {token!r}")
+    if scored != ("s" in position):
+        kind = "similarity" if "s" in position else "substructure"
+        raise InvalidCursorError(f"Cursor {token!r} belongs to a {kind} search")
+    return position["k"], position.get("s")
+
+
+def paginate(
+    stmt: Select,
+    key: Any,
+    *,
+    score: ColumnElement[float] | None = None,
+    cursor: str | None = None,
+    page_size: int = 50,
+) -> Select:
+    """Order `stmt` for keyset pagination and restrict it to the page after `cursor`.
+
+    Parameters
+    ----------
+    stmt : sqlalchemy.Select
+        The search statement, e.g. filtered with `has_substructure` or a
+        similarity threshold. It must not be ordered or limited already.
+    key : sqlalchemy.Column | sqlalchemy.orm.InstrumentedAttribute
+        A unique, non-null column, usually the primary key.
+    score : ColumnElement[float], optional
+        The similarity score, e.g. `rdkit_func.tanimoto_sml(Molecule.fp, query)`.
+        Results are ordered by descending score, then by `key`. Rows must not
+        have a NULL score.
+    cursor : str, optional
+        The `next_cursor` of the previous page. Omit for the first page.
+    page_size : int, default 50
+        Number of rows per page.
+
+    Returns
+    -------
+    sqlalchemy.Select
+        The statement for the page, limited to `page_size + 1` rows so that
+        `fetch_page` can tell whether another page follows. `key` and `score`
+        are added to the selected columns unless they are selected already.
+
+    Raises
+    ------
+    InvalidCursorError
+        If `cursor` is malformed or was created for the other kind of search.
+    """
+    if page_size < 1:
+        raise ValueError(f"page_size must be positive, got {page_size}")
+    key = _expression(key)
+    stmt = _select_if_missing(stmt, key)
+    if score is None:
+        stmt = stmt.order_by(key)
+    else:
+        score = _expression(score)
+        stmt = _select_if_missing(stmt, score).order_by(score.desc(), key)
+    if cursor is not None:
+        last_key, last_score = decode_cursor(cursor, scored=score is not None)
+        if score is None:
+            stmt = stmt.where(key > last_key)
+        else:
+            stmt = stmt.where(
+                score <= last_score,
+                or_(score < last_score, and_(score == last_score, key > last_key)),
+            )
+    return stmt.limit(page_size + 1)
+
+
+def fetch_page(
+    connection: Connection | Session,
+    stmt: Select,
+    key: Any,
+    *,
+    score: ColumnElement[float] | None = None,
+    cursor: str | None = None,
+    page_size: int = 50,
+) -> Page:
+    """Execute the page of `stmt` after `cursor` and return it with the cursor of the next page.
+
+    Takes the same arguments as `paginate`.
+
+    Raises
+    ------
+    InvalidCursorError
+        If `cursor` is malformed or was created for the other kind of search.
+    TypeError
+        If the key of the last row cannot be encoded in a cursor, see
+        `encode_cursor`.
+
+    Examples
+    --------
+    >>> from molalchemy.pagination import fetch_page
+    >>> from molalchemy.rdkit import Query
+    >>> stmt = select(Molecule.id, Molecule.name).where(
+    ...     Molecule.structure.has_substructure(Query.from_smarts("c1ccccc1"))
+    ... )
+    >>> page = fetch_page(session, stmt, Molecule.id, page_size=20)
+    >>> page = fetch_page(session, stmt, Molecule.id, cursor=page.next_cursor)
+
+    Similarity search, ordered by descending similarity (an explicit threshold
+    requires a popcount column, see `molalchemy.rdkit.popcount`):
+
+    >>> score = rdkit_func.tanimoto_sml(Molecule.fp, query_fp).label("similarity")
+    >>> stmt = select(Molecule.id, score).where(Molecule.fp.tanimoto(query_fp, 0.6))
+    >>> page = fetch_page(session, stmt, Molecule.id, score=score)
+    """
+    key = _expression(key)
+    if score is not None:
+        score = _expression(score)
+    page_stmt = paginate(stmt, key, score=score, cursor=cursor, page_size=page_size)
+    rows = list(connection.execute(page_stmt))
+    if len(rows) <= page_size:
+        return Page(rows, None)
+    rows = rows[:page_size]
+    last = rows[-1]._mapping
+    next_cursor = encode_cursor(
+        last[key], None if score is None else float(last[score])
+    )
+    return Page(rows, next_cursor)
+
+
+def _tag(value: Any) -> dict[str, str]:
+    for tag, (type_, encode, _) in _TAGGED_TYPES.items():
+        if isinstance(value, type_):
+            return {"$" + tag: encode(value)}
+    raise TypeError(
+        f"Cannot encode a cursor key of type {type(value).__name__}; use a JSON "
+        f"value or one of {', '.join(t[0].__name__ for t in _TAGGED_TYPES.values())}"
+    )
+
+
+def _untag(obj: dict[str, Any]) -> Any:
+    if len(obj) == 1:
+        ((name, value),) = obj.items()
+        if name.startswith("$") and name[1:] in _TAGGED_TYPES:
+            if not isinstance(value, str):
+                raise ValueError(f"Invalid {name} value: {value!r}")
+            return _TAGGED_TYPES[name[1:]][2](value)
+    return obj
+
+
+def _expression(value: Any) -> ColumnElement:
+    clause_element = getattr(value, "__clause_element__", None)
+    return value if clause_element is None else clause_element()
+
+
+def _select_if_missing(stmt: Select, expression: ColumnElement) -> Select:
+    # Compare against the selected expressions rather than the selected columns,
+    # whose values are not in the rows of ORM entities
+    for description in stmt.column_descriptions:
+        selected = _expression(description["expr"])
+        if isinstance(selected, ColumnElement) and selected.compare(expression):
+            return stmt
+    return stmt.add_columns(expression)
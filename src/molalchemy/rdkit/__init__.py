@@ -1,11 +1,22 @@
 from .comparators import RdkitFPComparator, RdkitMolComparator
 from .index import RdkitIndex
+from .lazy import LazyMol
+from .query import Query
+from .search import stream_search
 from .settings import (
+    RdkitSettings,
+    aget_dice_threshold,
+    aget_tanimoto_threshold,
+    asearch_timeout,
+    aset_dice_threshold,
+    aset_tanimoto_threshold,
     get_dice_threshold,
     get_tanimoto_threshold,
+    search_timeout,
     set_dice_threshold,
     set_tanimoto_threshold,
     similarity_threshold,
+    track_settings,
 )
 from .types import (
     RdkitBitFingerprint,
@@ -17,6 +28,8 @@ from .types import (
 )
 
 __all__ = [
+    "LazyMol",
+    "Query",
     "RdkitBitFingerprint",
     "RdkitFPComparator",
     "RdkitIndex",
@@ -24,11 +37,20 @@ __all__ = [
     "RdkitMolComparator",
     "RdkitQMol",
     "RdkitReaction",
+    "RdkitSettings",
     "RdkitSparseFingerprint",
     "RdkitXQMol",
+    "aget_dice_threshold",
+    "aget_tanimoto_threshold",
+    "asearch_timeout",
+    "aset_dice_threshold",
+    "aset_tanimoto_threshold",
     "get_dice_threshold",
     "get_tanimoto_threshold",
+    "search_timeout",
     "set_dice_threshold",
     "set_tanimoto_threshold",
     "similarity_threshold",
+    "stream_search",
+    "track_settings",
 ]
@@ -6,7 +6,11 @@ from sqlalchemy.types import UserDefinedType
 
 class RdkitMolComparator(UserDefinedType.Comparator):
     def has_substructure(self, query: str) -> ColumnElement[bool]:
-        """Check if this molecule contains `query` as a substructure (@>)."""
+        """Check if this molecule contains `query` as a substructure (@>).
+
+        `query` may be a SMILES string, a SQL expression or a precompiled
+        `molalchemy.rdkit.Query`.
+        """
         return self.expr.op("@>")(query)
 
     def is_substructure_of(self, query: str) -> ColumnElement[bool]:
@@ -27,18 +31,40 @@ class RdkitFPComparator(UserDefinedType.Comparator):
         else:  # dice
             return self.expr.op("<#>")(query)
 
-    def tanimoto(self, query_fp: ColumnElement) -> ColumnElement[bool]:
+    def tanimoto(
+        self, query_fp: ColumnElement, threshold: float | None = None
+    ) -> ColumnElement[bool]:
         """Tanimoto similarity threshold operator (%).
 
         Returns whether or not the Tanimoto similarity between two fingerprints
         (either two sfp or two bfp values) exceeds rdkit.tanimoto_threshold.
+
+        With `threshold`, compares `tanimoto_sml` against it instead, together
+        with the popcount range predicate. This requires a popcount column for
+        this column (see `molalchemy.rdkit.popcount`) and raises `ValueError`
+        otherwise.
         """
+        if threshold is not None:
+            from molalchemy.rdkit.popcount import similarity_filter
+
+            return similarity_filter(self.expr, query_fp, threshold, "tanimoto")
         return self.expr.op("%")(query_fp)
 
-    def dice(self, query_fp: ColumnElement) -> ColumnElement[bool]:
+    def dice(
+        self, query_fp: ColumnElement, threshold: float | None = None
+    ) -> ColumnElement[bool]:
         """Dice similarity threshold operator (#).
 
         Returns whether or not the Dice similarity between two fingerprints
         (either two sfp or two bfp values) exceeds rdkit.dice_threshold.
+
+        With `threshold`, compares `dice_sml` against it instead, together with
+        the popcount range predicate. This requires a popcount column for this
+        column (see `molalchemy.rdkit.popcount`) and raises `ValueError`
+        otherwise.
         """
+        if threshold is not None:
+            from molalchemy.rdkit.popcount import similarity_filter
+
+            return similarity_filter(self.expr, query_fp, threshold, "dice")
         return self.expr.op("#")(query_fp)
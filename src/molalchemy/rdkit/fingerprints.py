@@ -0,0 +1,505 @@
+"""Helpers for RDKit bit fingerprints.
+
+Besides batch conversion of fingerprint result sets, this module lets a `bfp`
+column be declared as derived from an `RdkitMol` column, so its value is computed
+on the client (optionally in a process pool) instead of by the cartridge
+functions at insert time.
+"""
+
+from __future__ import annotations
+
+import functools
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import TYPE_CHECKING, Any, Literal, NamedTuple
+
+import numpy as np
+from rdkit import Chem, DataStructs
+from rdkit.Chem import MACCSkeys, rdFingerprintGenerator
+from sqlalchemy import event
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql.dml import Insert, Update
+
+from molalchemy.exceptions import InvalidMoleculeError
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Mapping, Sequence
+
+    from sqlalchemy import Connection, Engine, Result, Table
+
+FingerprintKind = Literal[
+    "morgan", "featmorgan", "rdkit", "maccs", "atompair", "torsion"
+]
+
+#: Fingerprint sizes used by the cartridge functions, i.e. the defaults of the
+#: `rdkit.*_fp_size` settings.
+CARTRIDGE_FP_SIZES: dict[str, int] = {
+    "morgan": 512,
+    "featmorgan": 512,
+    "rdkit": 1024,
+    "maccs": 167,
+    "atompair": 2048,
+    "torsion": 1024,
+}
+
+_INFO_KEY = "molalchemy_derived_fingerprint"
+
+
+def fingerprints_to_array(
+    values: Iterable[bytes | memoryview] | Result[Any],
+) -> np.ndarray:
+    """Assemble packed fingerprints into one contiguous `(n_rows, n_bytes)` array.
+
+    The raw bytes of each fingerprint are appended to a single buffer, so no
+    per-row `ExplicitBitVect` or array objects are created.
+
+    Parameters
+    ----------
+    values : Iterable[bytes] | sqlalchemy.Result
+        Packed fingerprints, e.g. the values of an
+        `RdkitBitFingerprint(return_type="bytes")` column. A `Result` is read
+        through `Result.scalars()`, so only its first column is used.
+
+    Returns
+    -------
+    numpy.ndarray
+        A `uint8` array with one row per fingerprint; use
+        `numpy.unpackbits(array, axis=1, bitorder="little")` for one column per bit.
+
+    Raises
+    ------
+    ValueError
+        If a value is NULL or the fingerprints do not all have the same length.
+
+    Examples
+    --------
+    >>> result = session.execute(select(Molecule.fp).execution_options(yield_per=10_000))
+    >>> fingerprints_to_array(result).shape
+    (250000, 128)
+    """
+    if hasattr(values, "scalars"):
+        values = values.scalars()
+    buffer = bytearray()
+    n_bytes = None
+    n_rows = 0
+    for value in values:
+        if value is None:
+            raise ValueError(f"Fingerprint at row {n_rows} is NULL")
+        if n_bytes is None:
+            n_bytes = len(value)
+        elif len(value) != n_bytes:
+            raise ValueError(
+                f"Fingerprint at row {n_rows} has {len(value)} bytes, expected {n_bytes}"
+            )
+        buffer += value
+        n_rows += 1
+    return np.frombuffer(buffer, dtype=np.uint8).reshape(n_rows, n_bytes or 0)
+
+
+@functools.cache
+def _generator(kind: str, radius: int, nbits: int):
+    if kind == "morgan":
+        return rdFingerprintGenerator.GetMorganGenerator(radius=radius, fpSize=nbits)
+    if kind == "featmorgan":
+        return rdFingerprintGenerator.GetMorganGenerator(
+            radius=radius,
+            fpSize=nbits,
+            atomInvariantsGenerator=rdFingerprintGenerator.GetMorganFeatureAtomInvGen(),
+        )
+    if kind == "rdkit":
+        return rdFingerprintGenerator.GetRDKitFPGenerator(
+            minPath=1, maxPath=6, fpSize=nbits, numBitsPerFeature=2
+        )
+    if kind == "atompair":
+        return rdFingerprintGenerator.GetAtomPairGenerator(fpSize=nbits)
+    # torsion
+    return rdFingerprintGenerator.GetTopologicalTorsionGenerator(fpSize=nbits)
+
+
+class FingerprintSpec(NamedTuple):
+    """A fingerprint derived from an `RdkitMol` column.
+
+    Use `derived_fingerprint` to declare one on a column.
+    """
+
+    source: str
+    kind: FingerprintKind = "morgan"
+    radius: int = 2
+    nbits: int | None = None
+
+    @property
+    def size(self) -> int:
+        """The number of bits, defaulting to the cartridge setting's default."""
+        return self.nbits or CARTRIDGE_FP_SIZES[self.kind]
+
+    def compute(self, mol: Chem.Mol) -> bytes:
+        """Compute the fingerprint of `mol` as packed bits (`bfp` binary text)."""
+        if self.kind == "maccs":
+            fp = MACCSkeys.GenMACCSKeys(mol)
+        else:
+            fp = _generator(self.kind, self.radius, self.size).GetFingerprint(mol)
+        return DataStructs.BitVectToBinaryText(fp)
+
+
+def derived_fingerprint(
+    source: str,
+    kind: FingerprintKind = "morgan",
+    *,
+    radius: int = 2,
+    nbits: int | None = None,
+) -> dict[str, FingerprintSpec]:
+    """Declare a fingerprint column as computed on the client from `source`.
+
+    The returned dictionary is meant to be passed as the `info` of an
+    `RdkitBitFingerprint` column. `FingerprintComputer` then fills the column
+    from the molecule in `source` when rows are inserted or the molecule changes.
+
+    The fingerprints are bit-identical to the cartridge functions below, called
+    on the same molecule with the same RDKit version as the client:
+
+    ========== ===================== ====================================
+    kind       cartridge function    parameters
+    ========== ===================== ====================================
+    morgan     `morganbv_fp`         `radius`, `rdkit.morgan_fp_size`
+    featmorgan `featmorganbv_fp`     `radius`, `rdkit.featmorgan_fp_size`
+    rdkit      `rdkit_fp`            paths 1-6, 2 bits per path
+    maccs      `maccs_fp`            167 keys
+    atompair   `atompairbv_fp`       `rdkit.hashed_atompair_fp_size`
+    torsion    `torsionbv_fp`        `rdkit.hashed_torsion_fp_size`
+    ========== ===================== ====================================
+
+    Parameters
+    ----------
+    source : str
+        Key of the `RdkitMol` column the fingerprint is computed from.
+    kind : Literal["morgan", "featmorgan", "rdkit", "maccs", "atompair", "torsion"], default "morgan"
+        The fingerprint to compute.
+    radius : int, default 2
+        Radius of Morgan fingerprints.
+    nbits : int, optional
+        Fingerprint size. Defaults to the default of the matching cartridge
+        setting (see `CARTRIDGE_FP_SIZES`); set it to match the server if the
+        setting was changed there.
+
+    Returns
+    -------
+    dict
+        Column info declaring the derived fingerprint.
+
+    Examples
+    --------
+    >>> class Molecule(Base):
+    ...     __tablename__ = "molecules"
+    ...     id: Mapped[int] = mapped_column(primary_key=True)
+    ...     mol: Mapped[str] = mapped_column(RdkitMol())
+    ...     fp: Mapped[bytes] = mapped_column(
+    ...         RdkitBitFingerprint(),
+    ...         info=derived_fingerprint("mol", "morgan", radius=2, nbits=2048),
+    ...     )
+    """
+    if kind not in CARTRIDGE_FP_SIZES:
+        raise ValueError(
+            f"Invalid fingerprint kind: {kind!r}. Available options are "
+            "'morgan', 'featmorgan', 'rdkit', 'maccs', 'atompair', 'torsion'."
+        )
+    if kind == "maccs" and nbits not in (None, 167):
+        raise ValueError(f"MACCS fingerprints have 167 bits, got nbits={nbits}")
+    return {_INFO_KEY: FingerprintSpec(source, kind, radius, nbits)}
+
+
+def derived_fingerprints(table: Table) -> dict[str, FingerprintSpec]:
+    """Return the derived fingerprint columns of `table`, keyed by column key."""
+    return {
+        column.key: column.info[_INFO_KEY]
+        for column in table.columns
+        if _INFO_KEY in column.info
+    }
+
+
+def _to_mol(value: Any) -> Chem.Mol | None:
+    if isinstance(value, Chem.Mol):
+        return value
+    if isinstance(value, str):
+        return Chem.MolFromSmiles(value)
+    if isinstance(value, bytes | memoryview):
+        return Chem.Mol(bytes(value))
+    if hasattr(value, "mol"):  # LazyMol
+        return value.mol
+    raise InvalidMoleculeError(
+        f"Cannot compute a fingerprint from a value of type {type(value).__name__}"
+    )
+
+
+def _fingerprint_chunk(
+    values: list[Any], specs: tuple[FingerprintSpec, ...]
+) -> tuple[list[tuple[bytes | None, ...]], int | None]:
+    """Fingerprint a chunk of molecules, returning the results and the first failing index."""
+    results = []
+    for i, value in enumerate(values):
+        if value is None:
+            results.append((None,) * len(specs))
+            continue
+        mol = _to_mol(value)
+        if mol is None:
+            return results, i
+        results.append(tuple(spec.compute(mol) for spec in specs))
+    return results, None
+
+
+def compute_fingerprints(
+    values: Sequence[Any],
+    specs: Sequence[FingerprintSpec],
+    *,
+    executor: Executor | None = None,
+    chunksize: int = 1000,
+) -> list[tuple[bytes | None, ...]]:
+    """Compute fingerprints of molecules, preserving input order.
+
+    Parameters
+    ----------
+    values : Sequence[Any]
+        Molecules as SMILES strings, `Chem.Mol` objects or pickles. `None`
+        values give `None` fingerprints.
+    specs : Sequence[FingerprintSpec]
+        Fingerprints to compute for each molecule.
+    executor : concurrent.futures.Executor, optional
+        Executor used to process chunks. If not given, chunks are processed
+        serially in the calling thread.
+    chunksize : int, default 1000
+        Number of molecules sent to a worker at once.
+
+    Returns
+    -------
+    list[tuple[bytes | None, ...]]
+        For each molecule, the packed fingerprints in the order of `specs`.
+
+    Raises
+    ------
+    InvalidMoleculeError
+        If a SMILES string cannot be parsed. The message contains the row index.
+    """
+    if chunksize < 1:
+        raise ValueError(f"chunksize must be positive, got {chunksize}")
+    chunks = [
+        list(values[start : start + chunksize])
+        for start in range(0, len(values), chunksize)
+    ]
+    worker = functools.partial(_fingerprint_chunk, specs=tuple(specs))
+    results = executor.map(worker, chunks) if executor else map(worker, chunks)
+
+    fingerprints: list[tuple[bytes | None, ...]] = []
+    for chunk_no, (chunk_fps, failed) in enumerate(results):
+        if failed is not None:
+            row = chunk_no * chunksize + failed
+            raise InvalidMoleculeError(
+                f"Invalid SMILES string at row {row}: {values[row]!r}"
+            )
+        fingerprints.extend(chunk_fps)
+    return fingerprints
+
+
+class FingerprintComputer:
+    """Fill derived fingerprint columns on the client before rows are written.
+
+    Attached to a `Session`, `sessionmaker` or the `Session` class, it computes
+    the derived fingerprints (see `derived_fingerprint`) of new objects and of
+    objects whose molecule changed during flush. Attached to an `Engine` or
+    `Connection`, it fills derived fingerprint columns that are missing from the
+    parameters of INSERT and UPDATE statements. Batches of at least
+    `min_batch_size` molecules are computed in a process pool, smaller ones in
+    the calling thread.
+
+    Parameters
+    ----------
+    max_workers : int, optional
+        Number of worker processes. Defaults to the number of CPUs.
+    chunksize : int, default 1000
+        Number of molecules sent to a worker at once.
+    min_batch_size : int, default 1000
+        Minimum number of molecules for a batch to be computed in parallel.
+    executor : concurrent.futures.Executor, optional
+        Executor to use instead of an internally managed `ProcessPoolExecutor`.
+        An executor passed here is not shut down by `close()`.
+
+    Examples
+    --------
+    >>> from molalchemy.rdkit.fingerprints import FingerprintComputer
+    >>> with FingerprintComputer(max_workers=8) as computer:
+    ...     computer.attach(Session)
+    ...     with Session(engine) as session:
+    ...         session.add_all(Molecule(mol=smiles) for smiles in smiles_list)
+    ...         session.commit()
+    """
+
+    def __init__(
+        self,
+        max_workers: int | None = None,
+        *,
+        chunksize: int = 1000,
+        min_batch_size: int = 1000,
+        executor: Executor | None = None,
+    ):
+        self.max_workers = max_workers
+        self.chunksize = chunksize
+        self.min_batch_size = min_batch_size
+        self._executor = executor
+        self._owns_executor = executor is None
+
+    def __repr__(self):
+        return (
+            f"FingerprintComputer(max_workers={self.max_workers!r}, "
+            f"chunksize={self.chunksize!r}, min_batch_size={self.min_batch_size!r})"
+        )
+
+    def __enter__(self) -> FingerprintComputer:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    @property
+    def executor(self) -> Executor:
+        """The executor used for large batches, created on first use."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def attach(
+        self, target: Session | sessionmaker | type[Session] | Engine | Connection
+    ) -> None:
+        """Start filling derived fingerprints of objects or statements handled by `target`."""
+        if _is_session_target(target):
+            event.listen(target, "before_flush", self._before_flush)
+        else:
+            event.listen(target, "before_execute", self._before_execute, retval=True)
+
+    def detach(
+        self, target: Session | sessionmaker | type[Session] | Engine | Connection
+    ) -> None:
+        """Stop filling derived fingerprints for `target`."""
+        if _is_session_target(target):
+            event.remove(target, "before_flush", self._before_flush)
+        else:
+            event.remove(target, "before_execute", self._before_execute)
+
+    def close(self) -> None:
+        """Shut down the internally managed process pool, if any."""
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def compute(
+        self, values: Sequence[Any], specs: Sequence[FingerprintSpec]
+    ) -> list[tuple[bytes | None, ...]]:
+        """Compute fingerprints with `compute_fingerprints`, in parallel for large batches."""
+        executor = self.executor if len(values) >= self.min_batch_size else None
+        return compute_fingerprints(
+            values, specs, executor=executor, chunksize=self.chunksize
+        )
+
+    def process_rows(
+        self, table: Table, rows: Sequence[Mapping[str, Any]]
+    ) -> list[dict[str, Any]]:
+        """Return copies of `rows` with missing derived fingerprints filled in.
+
+        Parameters
+        ----------
+        table : sqlalchemy.Table
+            Table the rows are written to.
+        rows : Sequence[Mapping[str, Any]]
+            Parameter sets keyed by column key.
+
+        Returns
+        -------
+        list[dict[str, Any]]
+            New parameter sets. Fingerprints already present are kept.
+        """
+        new_rows = [dict(row) for row in rows]
+        if not new_rows:
+            return new_rows
+        for source, keys_specs in _group_by_source(derived_fingerprints(table)).items():
+            # Rows of a batch need not share keys; each one is filled by what it lacks
+            groups: dict[tuple[str, ...], list[dict[str, Any]]] = {}
+            for row in new_rows:
+                if source not in row:
+                    continue
+                keys = tuple(key for key, _ in keys_specs if key not in row)
+                if keys:
+                    groups.setdefault(keys, []).append(row)
+            for keys, group in groups.items():
+                specs = [spec for key, spec in keys_specs if key in keys]
+                fingerprints = self.compute([row[source] for row in group], specs)
+                for row, row_fps in zip(group, fingerprints):
+                    row.update(zip(keys, row_fps))
+        return new_rows
+
+    def process_objects(self, objects: Iterable[Any]) -> None:
+        """Fill the derived fingerprints of new or modified mapped objects in place."""
+        pending: dict[
+            tuple[Any, str, tuple[str, ...]],
+            tuple[list[str], list[FingerprintSpec], list[Any]],
+        ] = {}
+        for obj in objects:
+            state = sa_inspect(obj)
+            table = state.mapper.local_table
+            for source, keys_specs in _group_by_source(
+                derived_fingerprints(table)
+            ).items():
+                if source not in state.attrs:
+                    continue
+                if state.persistent:
+                    if not state.attrs[source].history.has_changes():
+                        continue
+                    keys_specs = list(keys_specs)
+                else:
+                    # Fingerprints given explicitly for new objects are kept
+                    keys_specs = [
+                        (key, spec)
+                        for key, spec in keys_specs
+                        if getattr(obj, key, None) is None
+                    ]
+                    if not keys_specs:
+                        continue
+                keys = [key for key, _ in keys_specs]
+                specs = [spec for _, spec in keys_specs]
+                entry = pending.setdefault(
+                    (table, source, tuple(keys)), (keys, specs, [])
+                )
+                entry[2].append(obj)
+        for (_, source, _), (keys, specs, objs) in pending.items():
+            fingerprints = self.compute([getattr(obj, source) for obj in objs], specs)
+            for obj, row_fps in zip(objs, fingerprints):
+                for key, fp in zip(keys, row_fps):
+                    setattr(obj, key, fp)
+
+    def _before_flush(self, session, flush_context, instances):
+        del flush_context, instances
+        self.process_objects([*session.new, *session.dirty])
+
+    def _before_execute(
+        self, conn, clauseelement, multiparams, params, execution_options
+    ):
+        del conn, execution_options
+        if isinstance(clauseelement, Insert | Update) and derived_fingerprints(
+            clauseelement.table
+        ):
+            if multiparams:
+                multiparams = self.process_rows(clauseelement.table, multiparams)
+            elif params:
+                params = self.process_rows(clauseelement.table, [params])[0]
+        return clauseelement, multiparams, params
+
+
+def _is_session_target(target: Any) -> bool:
+    return isinstance(target, Session | sessionmaker) or (
+        isinstance(target, type) and issubclass(target, Session)
+    )
+
+
+def _group_by_source(
+    specs: Mapping[str, FingerprintSpec],
+) -> dict[str, list[tuple[str, FingerprintSpec]]]:
+    grouped: dict[str, list[tuple[str, FingerprintSpec]]] = {}
+    for key, spec in specs.items():
+        grouped.setdefault(spec.source, []).append((key, spec))
+    return grouped
@@ -0,0 +1,670 @@
+"""In-process similarity index over a `bfp` fingerprint column.
+
+`FingerprintIndex` loads fingerprints and their primary keys into contiguous
+NumPy arrays and answers top-k Tanimoto/Dice queries without a database round
+trip. Fingerprints are stored sorted by popcount, so that a query only scores
+the popcount buckets whose Swamidass–Baldi bound can still beat the current
+k-th best hit.
+
+An index can be saved to a snapshot file and opened with `numpy.memmap`, so
+that worker processes start without querying the database and share the
+fingerprint pages through the OS page cache.
+
+Snapshot format (version 1), all integers little-endian:
+
+- a 64-byte header: magic `b"MAFPSNAP"`, format version (`uint16`), reserved
+  (`uint16`), fingerprint size in bytes (`uint32`), number of rows
+  (`uint64`), sequence number (`uint32`, 0 for the base file), snapshot id
+  (16 bytes) and the NumPy dtype string of the keys (8 bytes, NUL padded);
+- the keys, the popcounts (`int32`) and the fingerprints padded to 64-bit
+  words (`uint64`, one row per key), each section starting at a multiple of
+  64 bytes and all sorted by popcount.
+
+Append files `<path>.1`, `<path>.2`, ... written by
+`FingerprintIndex.save_increment` share the snapshot id of the base file and
+are opened as additional segments.
+"""
+
+from __future__ import annotations
+
+import os
+import struct
+import uuid
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Literal, NamedTuple
+
+import numpy as np
+from sqlalchemy import select, type_coerce
+
+from molalchemy.rdkit.types import RdkitBitFingerprint, _bfp_to_binary_text
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from rdkit import DataStructs
+    from sqlalchemy import ColumnElement, Connection
+    from sqlalchemy.orm import Session
+
+Metric = Literal["tanimoto", "dice"]
+
+SNAPSHOT_VERSION = 1
+_SNAPSHOT_MAGIC = b"MAFPSNAP"
+_HEADER = struct.Struct("<8sHHIQI16s8s")
+_ALIGNMENT = 64
+
+
+class SearchHits(NamedTuple):
+    """Hits of a `FingerprintIndex.search`, ordered by decreasing similarity."""
+
+    keys: np.ndarray
+    scores: np.ndarray
+
+
+if hasattr(np, "bitwise_count"):
+
+    def _popcount(words: np.ndarray) -> np.ndarray:
+        return np.bitwise_count(words).sum(axis=1, dtype=np.int32)
+
+else:  # numpy < 2.0
+    _BYTE_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.int32)
+
+    def _popcount(words: np.ndarray) -> np.ndarray:
+        bytes_ = words.view(np.uint8).reshape(len(words), -1)
+        return _BYTE_POPCOUNT[bytes_].sum(axis=1, dtype=np.int32)
+
+
+def _to_words(fingerprints: np.ndarray) -> np.ndarray:
+    """Pad packed fingerprints to whole 64-bit words and view them as `uint64`."""
+    n_rows, n_bytes = fingerprints.shape
+    n_words = -(-n_bytes // 8)
+    padded = np.zeros((n_rows, n_words * 8), dtype=np.uint8)
+    padded[:, :n_bytes] = fingerprints
+    return padded.view(np.uint64)
+
+
+def _similarity(metric: Metric, common: np.ndarray, a: int, b: int) -> np.ndarray:
+    if metric == "tanimoto":
+        return common / (a + b - common)
+    return 2 * common / (a + b)
+
+
+def _bounds(metric: Metric, a: int, b: np.ndarray) -> np.ndarray:
+    """Swamidass–Baldi upper bounds of the similarity to fingerprints with popcount `b`."""
+    smaller = np.minimum(a, b)
+    if metric == "tanimoto":
+        return smaller / np.maximum(np.maximum(a, b), 1)
+    return 2 * smaller / np.maximum(a + b, 1)
+
+
+class _Segment:
+    """Fingerprints and keys sorted by popcount, with the start of each popcount bucket."""
+
+    __slots__ = ("keys", "popcounts", "starts", "words")
+
+    def __init__(
+        self,
+        keys: np.ndarray,
+        words: np.ndarray,
+        popcounts: np.ndarray,
+        *,
+        presorted: bool = False,
+    ):
+        if not presorted:
+            order = np.argsort(popcounts, kind="stable")
+            keys, words, popcounts = keys[order], words[order], popcounts[order]
+        self.keys = keys
+        self.words = np.ascontiguousarray(words)
+        self.popcounts = popcounts
+        n_bits = self.words.shape[1] * 64
+        self.starts = np.searchsorted(self.popcounts, np.arange(n_bits + 2))
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
+class FingerprintIndex:
+    """In-memory top-k similarity index over packed bit fingerprints.
+
+    The index consists of segments; each holds a `(n, n_words)` `uint64`
+    fingerprint matrix sorted by popcount, the popcounts and the keys.
+    Loading more rows (`add`, `refresh`) appends a segment, `compact` merges
+    them. `save` and `save_increment` write the index to a snapshot file,
+    `open_snapshot` maps it back into memory.
+
+    Parameters
+    ----------
+    n_bytes : int
+        Size of the packed fingerprints in bytes.
+
+    Examples
+    --------
+    >>> index = FingerprintIndex.from_table(session, Molecule.fp, Molecule.id)
+    >>> hits = index.search(query_fp, k=10)
+    >>> session.scalars(select(Molecule).where(Molecule.id.in_(hits.keys.tolist())))
+    >>> index.refresh(session)  # load rows inserted since
+
+    Share an index between worker processes:
+
+    >>> index.save("molecules.fps")  # in the loader process
+    >>> index.refresh(session)
+    >>> index.save_increment()  # writes molecules.fps.1
+    >>> index = FingerprintIndex.open_snapshot("molecules.fps")  # in each worker
+    """
+
+    def __init__(self, n_bytes: int):
+        if n_bytes < 1:
+            raise ValueError(f"n_bytes must be positive, got {n_bytes}")
+        self.n_bytes = n_bytes
+        self._segments: list[_Segment] = []
+        self._source: tuple[Any, Any, tuple[ColumnElement, ...]] | None = None
+        self._max_key: Any = None
+        # (path, snapshot id, next sequence number, number of segments saved)
+        self._snapshot: tuple[Path, bytes, int, int] | None = None
+
+    def __repr__(self):
+        return (
+            f"FingerprintIndex(n_bytes={self.n_bytes!r}) "
+            f"<{len(self)} fingerprints in {len(self._segments)} segments>"
+        )
+
+    def __len__(self) -> int:
+        return sum(len(segment) for segment in self._segments)
+
+    @property
+    def n_segments(self) -> int:
+        """The number of segments."""
+        return len(self._segments)
+
+    @classmethod
+    def from_arrays(
+        cls, keys: Sequence[Any], fingerprints: np.ndarray
+    ) -> FingerprintIndex:
+        """Build an index from keys and an `(n_rows, n_bytes)` `uint8` fingerprint matrix.
+
+        The matrix can be built with
+        `molalchemy.rdkit.fingerprints.fingerprints_to_array`.
+        """
+        fingerprints = np.asarray(fingerprints, dtype=np.uint8)
+        if fingerprints.ndim != 2:
+            raise ValueError(
+                f"fingerprints must be a 2-D array, got shape {fingerprints.shape}"
+            )
+        index = cls(fingerprints.shape[1])
+        index.add(keys, fingerprints)
+        return index
+
+    @classmethod
+    def from_table(
+        cls,
+        connection: Connection | Session,
+        fp_column: Any,
+        key_column: Any,
+        *,
+        where: Sequence[ColumnElement[bool]] = (),
+        fetch_size: int = 100_000,
+    ) -> FingerprintIndex:
+        """Load an index from a `bfp` column and its key column.
+
+        Parameters
+        ----------
+        connection : sqlalchemy.Connection | sqlalchemy.orm.Session
+            Connection or session to load from.
+        fp_column : sqlalchemy.Column | sqlalchemy.orm.InstrumentedAttribute
+            The `RdkitBitFingerprint` column. NULL fingerprints are skipped.
+        key_column : sqlalchemy.Column | sqlalchemy.orm.InstrumentedAttribute
+            Column identifying rows, usually the primary key. `refresh` loads
+            rows whose key is greater than the largest key loaded so far, so
+            it should increase monotonically (e.g. a serial or identity column).
+        where : Sequence[ColumnElement[bool]], optional
+            Additional filters on the rows to load.
+        fetch_size : int, default 100000
+            Number of rows fetched per round trip.
+
+        Returns
+        -------
+        FingerprintIndex
+            The loaded index.
+
+        Raises
+        ------
+        ValueError
+            If the column holds no fingerprints or they differ in size.
+        """
+        keys, fingerprints = _fetch(
+            connection, fp_column, key_column, where, fetch_size
+        )
+        if not len(keys):
+            raise ValueError("No fingerprints to index")
+        index = cls.from_arrays(keys, fingerprints)
+        index._source = (fp_column, key_column, tuple(where))
+        return index
+
+    def add(self, keys: Sequence[Any], fingerprints: np.ndarray) -> None:
+        """Append fingerprints and their keys as a new segment."""
+        keys = np.asarray(keys)
+        fingerprints = np.asarray(fingerprints, dtype=np.uint8)
+        if fingerprints.ndim != 2 or fingerprints.shape[1] != self.n_bytes:
+            raise ValueError(
+                f"fingerprints must have shape (n, {self.n_bytes}), got {fingerprints.shape}"
+            )
+        if len(keys) != len(fingerprints):
+            raise ValueError(
+                f"Got {len(keys)} keys for {len(fingerprints)} fingerprints"
+            )
+        if not len(keys):
+            return
+        words = _to_words(fingerprints)
+        self._segments.append(_Segment(keys, words, _popcount(words)))
+        largest = keys.max()
+        if isinstance(largest, np.generic):
+            largest = largest.item()
+        if self._max_key is None or largest > self._max_key:
+            self._max_key = largest
+
+    def refresh(
+        self, connection: Connection | Session, *, fetch_size: int = 100_000
+    ) -> int:
+        """Load rows added to the source table since the last load as a new segment.
+
+        Only rows with a key greater than the largest key loaded so far are
+        loaded; updated or deleted rows require rebuilding the index.
+
+        Returns
+        -------
+        int
+            The number of fingerprints loaded.
+        """
+        if self._source is None:
+            raise ValueError("refresh() requires an index created with from_table()")
+        fp_column, key_column, where = self._source
+        keys, fingerprints = _fetch(
+            connection,
+            fp_column,
+            key_column,
+            (*where, key_column > self._max_key),
+            fetch_size,
+        )
+        if len(keys):
+            self.add(keys, fingerprints)
+        return len(keys)
+
+    def compact(self) -> None:
+        """Merge all segments into one."""
+        if len(self._segments) < 2:
+            return
+        keys = np.concatenate([s.keys for s in self._segments])
+        words = np.concatenate([s.words for s in self._segments])
+        popcounts = np.concatenate([s.popcounts for s in self._segments])
+        self._segments = [_Segment(keys, words, popcounts)]
+        self._snapshot = None
+
+    def save(self, path: str | os.PathLike) -> Path:
+        """Write the index to a snapshot file.
+
+        All segments are merged into the snapshot. Append files of an earlier
+        snapshot at the same path are removed, and the file is written to a
+        temporary file first and then renamed, so readers never see a partial
+        snapshot.
+
+        Parameters
+        ----------
+        path : str | os.PathLike
+            Path of the snapshot file.
+
+        Returns
+        -------
+        pathlib.Path
+            The path written.
+
+        Raises
+        ------
+        ValueError
+            If the index is empty or its keys are not integers.
+        """
+        if not self._segments:
+            raise ValueError("Cannot save an empty index")
+        path = Path(path)
+        snapshot_id = uuid.uuid4().bytes
+        sequence = 1
+        while _increment_path(path, sequence).exists():
+            _increment_path(path, sequence).unlink()
+            sequence += 1
+        _write_segment(path, _merge(self._segments), self.n_bytes, 0, snapshot_id)
+        self._snapshot = (path, snapshot_id, 1, len(self._segments))
+        return path
+
+    def save_increment(self) -> Path | None:
+        """Write the segments added since the last save or open to an append file.
+
+        The append file is written next to the snapshot, as `<path>.1`,
+        `<path>.2`, ... in order.
+
+        Returns
+        -------
+        pathlib.Path | None
+            The path written, or None if no segment was added.
+
+        Raises
+        ------
+        ValueError
+            If the index was not saved or opened from a snapshot, or was
+            compacted since.
+        """
+        if self._snapshot is None:
+            raise ValueError(
+                "save_increment() requires an index saved with save() or opened "
+                "with open_snapshot(), and not compacted since"
+            )
+        path, snapshot_id, sequence, n_saved = self._snapshot
+        if n_saved == len(self._segments):
+            return None
+        file = _increment_path(path, sequence)
+        _write_segment(
+            file, _merge(self._segments[n_saved:]), self.n_bytes, sequence, snapshot_id
+        )
+        self._snapshot = (path, snapshot_id, sequence + 1, len(self._segments))
+        return file
+
+    @classmethod
+    def open_snapshot(
+        cls, path: str | os.PathLike, *, mmap: bool = True
+    ) -> FingerprintIndex:
+        """Open a snapshot written by `save`, including its append files.
+
+        Parameters
+        ----------
+        path : str | os.PathLike
+            Path of the snapshot file. Append files `<path>.1`, `<path>.2`,
+            ... are opened in order as further segments, up to the first
+            missing one.
+        mmap : bool, default True
+            Map the files read-only with `numpy.memmap` instead of reading
+            them into memory. Pages are read on first access and shared by all
+            processes mapping the same file.
+
+        Returns
+        -------
+        FingerprintIndex
+            The index. It cannot be refreshed from the database, but
+            fingerprints added to it can be written with `save_increment`.
+
+        Raises
+        ------
+        ValueError
+            If a file is not a snapshot, has an unsupported version, is
+            truncated or belongs to another snapshot.
+        """
+        path = Path(path)
+        header = _read_header(path)
+        if header.sequence != 0:
+            raise ValueError(f"{path} is an append file, not a snapshot")
+        index = cls(header.n_bytes)
+        index._segments.append(_open_segment(path, header, mmap))
+        sequence = 1
+        while True:
+            file = _increment_path(path, sequence)
+            if not file.exists():
+                break
+            increment = _read_header(file)
+            if (
+                increment.snapshot_id != header.snapshot_id
+                or increment.sequence != sequence
+                or increment.n_bytes != header.n_bytes
+            ):
+                raise ValueError(f"{file} is not append file {sequence} of {path}")
+            index._segments.append(_open_segment(file, increment, mmap))
+            sequence += 1
+        index._max_key = max(segment.keys.max().item() for segment in index._segments)
+        index._snapshot = (path, header.snapshot_id, sequence, len(index._segments))
+        return index
+
+    def search(
+        self,
+        query: bytes | DataStructs.ExplicitBitVect | np.ndarray,
+        k: int = 10,
+        *,
+        metric: Metric = "tanimoto",
+        threshold: float = 0.0,
+    ) -> SearchHits:
+        """Find the `k` fingerprints most similar to `query`.
+
+        Popcount buckets are visited in order of decreasing Swamidass–Baldi
+        bound, and the search stops as soon as the bound of the next bucket is
+        below `threshold` or the current k-th best similarity. Fingerprints
+        sharing no bits with the query are never returned.
+
+        Parameters
+        ----------
+        query : bytes | rdkit.DataStructs.ExplicitBitVect | numpy.ndarray
+            The query fingerprint, in any format accepted by `RdkitBitFingerprint`.
+        k : int, default 10
+            Maximum number of hits.
+        metric : Literal["tanimoto", "dice"], default "tanimoto"
+            The similarity metric.
+        threshold : float, default 0.0
+            Minimum similarity of hits.
+
+        Returns
+        -------
+        SearchHits
+            Keys and similarities of the hits, most similar first.
+        """
+        if metric not in ("tanimoto", "dice"):
+            raise ValueError(
+                f"Invalid metric: {metric!r}. Available options are 'tanimoto', 'dice'."
+            )
+        if k < 1:
+            raise ValueError(f"k must be positive, got {k}")
+        packed = np.frombuffer(_bfp_to_binary_text(query), dtype=np.uint8)
+        if len(packed) != self.n_bytes:
+            raise ValueError(
+                f"Query fingerprint has {len(packed)} bytes, expected {self.n_bytes}"
+            )
+        query_words = _to_words(packed[np.newaxis, :])
+        a = int(_popcount(query_words)[0])
+
+        hit_keys: list[np.ndarray] = []
+        hit_scores: list[np.ndarray] = []
+        n_hits = 0
+        cutoff = threshold
+        if a and self._segments:
+            popcounts = np.arange(self._segments[0].words.shape[1] * 64 + 1)
+            bounds = _bounds(metric, a, popcounts)
+            for b in np.argsort(-bounds, kind="stable"):
+                if bounds[b] < cutoff or bounds[b] == 0:
+                    break
+                for segment in self._segments:
+                    start, stop = segment.starts[b], segment.starts[b + 1]
+                    if start == stop:
+                        continue
+                    common = _popcount(segment.words[start:stop] & query_words)
+                    scores = _similarity(metric, common, a, int(b))
+                    selected = (scores >= cutoff) & (common > 0)
+                    if not selected.any():
+                        continue
+                    hit_keys.append(segment.keys[start:stop][selected])
+                    hit_scores.append(scores[selected])
+                    n_hits += int(selected.sum())
+                if n_hits >= k:
+                    keys, scores = _top_k(hit_keys, hit_scores, k)
+                    hit_keys, hit_scores, n_hits = [keys], [scores], len(keys)
+                    cutoff = max(cutoff, float(scores[-1]))
+        if not hit_keys:
+            return SearchHits(np.array([], dtype=self._key_dtype()), np.array([]))
+        return SearchHits(*_top_k(hit_keys, hit_scores, k))
+
+    def _key_dtype(self):
+        return self._segments[0].keys.dtype if self._segments else np.int64
+
+
+def _top_k(
+    keys: list[np.ndarray], scores: list[np.ndarray], k: int
+) -> tuple[np.ndarray, np.ndarray]:
+    all_keys = np.concatenate(keys)
+    all_scores = np.concatenate(scores)
+    if len(all_scores) > k:
+        top = np.argpartition(-all_scores, k - 1)[:k]
+        all_keys, all_scores = all_keys[top], all_scores[top]
+    order = np.argsort(-all_scores, kind="stable")
+    return all_keys[order], all_scores[order]
+
+
+def _merge(segments: Sequence[_Segment]) -> _Segment:
+    if len(segments) == 1:
+        return segments[0]
+    return _Segment(
+        np.concatenate([s.keys for s in segments]),
+        np.concatenate([s.words for s in segments]),
+        np.concatenate([s.popcounts for s in segments]),
+    )
+
+
+class _SnapshotHeader(NamedTuple):
+    version: int
+    n_bytes: int
+    n_rows: int
+    sequence: int
+    snapshot_id: bytes
+    key_dtype: np.dtype
+
+    def layout(self) -> tuple[int, int, int, int]:
+        """Offsets of the keys, popcounts and fingerprints, and the file size."""
+        n_words = -(-self.n_bytes // 8)
+        keys = _aligned(_HEADER.size)
+        popcounts = _aligned(keys + self.n_rows * self.key_dtype.itemsize)
+        words = _aligned(popcounts + self.n_rows * 4)
+        return keys, popcounts, words, words + self.n_rows * n_words * 8
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+def _increment_path(path: Path, sequence: int) -> Path:
+    return path.with_name(f"{path.name}.{sequence}")
+
+
+def _write_segment(
+    path: Path, segment: _Segment, n_bytes: int, sequence: int, snapshot_id: bytes
+) -> None:
+    key_dtype = segment.keys.dtype.newbyteorder("<")
+    if key_dtype.kind not in "iu":
+        raise ValueError(
+            f"Snapshots require integer keys, got keys of dtype {segment.keys.dtype}"
+        )
+    header = _SnapshotHeader(
+        SNAPSHOT_VERSION, n_bytes, len(segment), sequence, snapshot_id, key_dtype
+    )
+    sections = zip(
+        header.layout()[:3],
+        (
+            segment.keys.astype(key_dtype, copy=False),
+            segment.popcounts.astype("<i4", copy=False),
+            segment.words.astype("<u8", copy=False),
+        ),
+    )
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex[:12]}.tmp")
+    try:
+        with tmp.open("wb") as f:
+            f.write(
+                _HEADER.pack(
+                    _SNAPSHOT_MAGIC,
+                    header.version,
+                    0,
+                    n_bytes,
+                    header.n_rows,
+                    sequence,
+                    snapshot_id,
+                    key_dtype.str.encode(),
+                )
+            )
+            for offset, array in sections:
+                f.write(bytes(offset - f.tell()))
+                array.tofile(f)
+        tmp.replace(path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def _read_header(path: Path) -> _SnapshotHeader:
+    with path.open("rb") as f:
+        data = f.read(_HEADER.size)
+    if len(data) < _HEADER.size or data[:8] != _SNAPSHOT_MAGIC:
+        raise ValueError(f"{path} is not a fingerprint snapshot")
+    _, version, _, n_bytes, n_rows, sequence, snapshot_id, key_dtype = _HEADER.unpack(
+        data
+    )
+    if version > SNAPSHOT_VERSION:
+        raise ValueError(
+            f"{path} has snapshot version {version}, the newest supported version "
+            f"is {SNAPSHOT_VERSION}"
+        )
+    header = _SnapshotHeader(
+        version,
+        n_bytes,
+        n_rows,
+        sequence,
+        snapshot_id,
+        np.dtype(key_dtype.rstrip(b"\x00").decode()),
+    )
+    size = header.layout()[3]
+    if path.stat().st_size < size:
+        raise ValueError(
+            f"{path} is truncated: expected {size} bytes, got {path.stat().st_size}"
+        )
+    return header
+
+
+def _open_segment(path: Path, header: _SnapshotHeader, mmap: bool) -> _Segment:
+    keys_offset, popcounts_offset, words_offset, _ = header.layout()
+    n_rows, n_words = header.n_rows, -(-header.n_bytes // 8)
+
+    def section(dtype, offset, shape):
+        if mmap:
+            return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape)
+        count = int(np.prod(shape))
+        return np.fromfile(path, dtype=dtype, count=count, offset=offset).reshape(shape)
+
+    return _Segment(
+        section(header.key_dtype, keys_offset, (n_rows,)),
+        section("<u8", words_offset, (n_rows, n_words)),
+        section("<i4", popcounts_offset, (n_rows,)),
+        presorted=True,
+    )
+
+
+def _fetch(
+    connection: Connection | Session,
+    fp_column: Any,
+    key_column: Any,
+    where: Sequence[ColumnElement[bool]],
+    fetch_size: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Fetch keys and packed fingerprints, returning a key array and a `uint8` matrix."""
+    stmt = (
+        select(key_column, type_coerce(fp_column, RdkitBitFingerprint()))
+        .where(fp_column.is_not(None), *where)
+        .execution_options(stream_results=True, yield_per=fetch_size)
+    )
+    keys: list[Any] = []
+    buffer = bytearray()
+    n_bytes = None
+    result = connection.execute(stmt)
+    try:
+        for partition in result.partitions():
+            for key, fp in partition:
+                if n_bytes is None:
+                    n_bytes = len(fp)
+                elif len(fp) != n_bytes:
+                    raise ValueError(
+                        f"Fingerprint of key {key!r} has {len(fp)} bytes, expected {n_bytes}"
+                    )
+                keys.append(key)
+                buffer += fp
+    finally:
+        result.close()
+    fingerprints = np.frombuffer(buffer, dtype=np.uint8).reshape(
+        len(keys), n_bytes or 0
+    )
+    return np.asarray(keys), fingerprints
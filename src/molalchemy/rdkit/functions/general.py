@@ -45,8 +45,9 @@ def mol_has_substructure(
     ----------
     mol_column : ColumnElement[molalchemy.rdkit.types.RdkitMol]
         The database column containing the molecular structure to search.
-    query : str
-        The query substructure as a string (SMILES, or SMARTS)
+    query : str | molalchemy.rdkit.Query
+        The query substructure as a string (SMILES, or SMARTS), or a query
+        precompiled on the client with `Query.from_smarts`/`Query.from_smiles`.
 
     Returns
     -------
@@ -60,6 +61,9 @@ def mol_has_substructure(
     >>> query = select(Molecule).where(has_substructure(Molecule.structure, "C=O"))
     >>> # Search for molecules containing a aromatic carbon as SMARTS
     >>> query = select(Molecule).where(has_substructure(Molecule.structure, cast("[cH]", RdkitQMol)))
+    >>> # The same SMARTS, parsed once on the client and bound as a pickle
+    >>> from molalchemy.rdkit import Query
+    >>> query = select(Molecule).where(has_substructure(Molecule.structure, Query.from_smarts("[cH]")))
     """
     return mol_column.op("@>")(query)
 
@@ -0,0 +1,97 @@
+"""Lazily unpickled RDKit molecules returned by `RdkitMol(return_type="lazy_mol")`."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from rdkit import Chem
+
+_SEPARATOR = b"\x00"
+
+
+class LazyMol:
+    """Proxy for an `rdkit.Chem.Mol` that defers unpickling until first use.
+
+    The proxy holds the pickled molecule (and optionally its SMILES) fetched from
+    the database. The `Chem.Mol` is built on first attribute access and cached,
+    so rows that are never inspected cost no unpickling.
+
+    Parameters
+    ----------
+    pickle : bytes
+        The pickled molecule, as returned by `mol_send`.
+    smiles : str, optional
+        The SMILES of the molecule, if already known.
+
+    Notes
+    -----
+    Attribute access is delegated to the underlying molecule, so
+    `lazy.GetNumAtoms()` works directly. RDKit functions that require a real
+    `Chem.Mol` argument must be given `lazy.mol`.
+
+    Examples
+    --------
+    >>> mol = session.scalars(select(Molecule.structure)).first()
+    >>> mol.smiles  # no unpickling
+    'CCO'
+    >>> mol.GetNumAtoms()  # builds and caches the Chem.Mol
+    3
+    >>> Chem.Descriptors.MolWt(mol.mol)
+    46.069
+    """
+
+    __slots__ = ("_mol", "_pickle", "_smiles")
+
+    def __init__(self, pickle: bytes, smiles: str | None = None):
+        self._pickle = pickle
+        self._smiles = smiles
+        self._mol: Chem.Mol | None = None
+
+    @classmethod
+    def from_payload(cls, payload: bytes) -> LazyMol:
+        """Create a proxy from a `pickle + b"\\x00" + smiles` database payload."""
+        pickle, _, smiles = payload.rpartition(_SEPARATOR)
+        return cls(pickle, smiles.decode())
+
+    @property
+    def pickle(self) -> bytes:
+        """The pickled molecule."""
+        return self._pickle
+
+    @property
+    def smiles(self) -> str:
+        """The SMILES of the molecule, computed from the molecule only if not known."""
+        if self._smiles is None:
+            self._smiles = Chem.MolToSmiles(self.mol)
+        return self._smiles
+
+    @property
+    def mol(self) -> Chem.Mol:
+        """The unpickled `Chem.Mol`, built on first access."""
+        if self._mol is None:
+            self._mol = Chem.Mol(self._pickle)
+        return self._mol
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the `Chem.Mol` has been built."""
+        return self._mol is not None
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.mol, name)
+
+    def __reduce__(self):
+        return (type(self), (self._pickle, self._smiles))
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, LazyMol):
+            return self._pickle == other._pickle
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self._pickle)
+
+    def __repr__(self):
+        return f"LazyMol({self._smiles!r})" if self._smiles is not None else "LazyMol()"
@@ -0,0 +1,238 @@
+"""Process-pool parallel bind processing for bulk `RdkitMol` inserts.
+
+`RdkitMol.bind_processor` parses and pickles every SMILES string serially in the
+calling thread. For executemany-style batches (e.g. ``session.execute(insert(...), rows)``)
+this module can fan the parsing out to a process pool before SQLAlchemy applies the
+bind processors; the pickled molecules are then passed through unchanged.
+"""
+
+from __future__ import annotations
+
+import functools
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import TYPE_CHECKING, Any
+
+from rdkit import Chem
+from sqlalchemy import event
+from sqlalchemy.sql.dml import Insert, Update
+
+from molalchemy.exceptions import InvalidMoleculeError
+from molalchemy.rdkit.types import RdkitMol, _to_binary
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping, Sequence
+
+    from sqlalchemy import Connection, Engine, Table
+
+
+def _pickle_chunk(
+    smiles: list[str], pickle_props: int | None
+) -> tuple[list[bytes], int | None]:
+    """Pickle a chunk of SMILES, returning the pickles and the first failing index."""
+    pickles = []
+    for i, value in enumerate(smiles):
+        mol = Chem.MolFromSmiles(value)
+        if mol is None:
+            return pickles, i
+        pickles.append(_to_binary(mol, pickle_props))
+    return pickles, None
+
+
+def _pickle_all(
+    smiles: Sequence[str],
+    executor: Executor | None,
+    chunksize: int,
+    pickle_props: int | None = None,
+) -> tuple[list[bytes], int | None]:
+    if chunksize < 1:
+        raise ValueError(f"chunksize must be positive, got {chunksize}")
+    chunks = [
+        list(smiles[start : start + chunksize])
+        for start in range(0, len(smiles), chunksize)
+    ]
+    worker = functools.partial(_pickle_chunk, pickle_props=pickle_props)
+    results = executor.map(worker, chunks) if executor else map(worker, chunks)
+
+    pickles: list[bytes] = []
+    for chunk_no, (chunk_pickles, failed) in enumerate(results):
+        if failed is not None:
+            return pickles, chunk_no * chunksize + failed
+        pickles.extend(chunk_pickles)
+    return pickles, None
+
+
+def pickle_smiles(
+    smiles: Sequence[str],
+    *,
+    executor: Executor | None = None,
+    chunksize: int = 1000,
+    pickle_props: int | None = None,
+) -> list[bytes]:
+    """Parse and pickle SMILES strings, preserving input order.
+
+    Parameters
+    ----------
+    smiles : Sequence[str]
+        SMILES strings to convert.
+    executor : concurrent.futures.Executor, optional
+        Executor used to process chunks. If not given, chunks are processed
+        serially in the calling thread.
+    chunksize : int, default 1000
+        Number of SMILES sent to a worker at once.
+    pickle_props : int, optional
+        Property flags passed to `Chem.Mol.ToBinary`, see `RdkitMol`.
+
+    Returns
+    -------
+    list[bytes]
+        Pickled molecules, in the same order as `smiles`.
+
+    Raises
+    ------
+    InvalidMoleculeError
+        If a SMILES string cannot be parsed. The message contains the row index.
+    """
+    pickles, failed = _pickle_all(smiles, executor, chunksize, pickle_props)
+    if failed is not None:
+        raise InvalidMoleculeError(
+            f"Invalid SMILES string at row {failed}: {smiles[failed]!r}"
+        )
+    return pickles
+
+
+class ParallelBinder:
+    """Pickle `RdkitMol` values of executemany batches in a process pool.
+
+    Once attached to an `Engine` or `Connection`, every INSERT or UPDATE executed
+    with at least `min_batch_size` parameter sets has the SMILES strings of its
+    `RdkitMol` columns converted to pickles in parallel. Smaller statements, and
+    columns that do not validate on the client (`validate="server"` or `"none"`),
+    are left to the regular bind processor.
+
+    Parameters
+    ----------
+    max_workers : int, optional
+        Number of worker processes. Defaults to the number of CPUs.
+    chunksize : int, default 1000
+        Number of SMILES sent to a worker at once.
+    min_batch_size : int, default 1000
+        Minimum number of rows for a batch to be processed in parallel.
+    executor : concurrent.futures.Executor, optional
+        Executor to use instead of an internally managed `ProcessPoolExecutor`.
+        An executor passed here is not shut down by `close()`.
+
+    Examples
+    --------
+    >>> from molalchemy.rdkit.parallel import ParallelBinder
+    >>> with ParallelBinder(max_workers=8) as binder:
+    ...     binder.attach(engine)
+    ...     with Session(engine) as session:
+    ...         session.execute(insert(Molecule), rows)
+    ...         session.commit()
+    """
+
+    def __init__(
+        self,
+        max_workers: int | None = None,
+        *,
+        chunksize: int = 1000,
+        min_batch_size: int = 1000,
+        executor: Executor | None = None,
+    ):
+        self.max_workers = max_workers
+        self.chunksize = chunksize
+        self.min_batch_size = min_batch_size
+        self._executor = executor
+        self._owns_executor = executor is None
+
+    def __repr__(self):
+        return (
+            f"ParallelBinder(max_workers={self.max_workers!r}, "
+            f"chunksize={self.chunksize!r}, min_batch_size={self.min_batch_size!r})"
+        )
+
+    def __enter__(self) -> ParallelBinder:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    @property
+    def executor(self) -> Executor:
+        """The executor used for pickling, created on first use."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def attach(self, target: Engine | Connection) -> None:
+        """Start processing executemany batches executed on `target`."""
+        event.listen(target, "before_execute", self._before_execute, retval=True)
+
+    def detach(self, target: Engine | Connection) -> None:
+        """Stop processing batches executed on `target`."""
+        event.remove(target, "before_execute", self._before_execute)
+
+    def close(self) -> None:
+        """Shut down the internally managed process pool, if any."""
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def process_rows(
+        self, table: Table, rows: Sequence[Mapping[str, Any]]
+    ) -> list[dict[str, Any]]:
+        """Return copies of `rows` with SMILES in `RdkitMol` columns pickled.
+
+        Parameters
+        ----------
+        table : sqlalchemy.Table
+            Table the rows are written to.
+        rows : Sequence[Mapping[str, Any]]
+            Parameter sets keyed by column key.
+
+        Returns
+        -------
+        list[dict[str, Any]]
+            New parameter sets; values other than SMILES strings are unchanged.
+        """
+        new_rows = [dict(row) for row in rows]
+        if not new_rows:
+            return new_rows
+        for column in table.columns:
+            if (
+                not isinstance(column.type, RdkitMol)
+                or column.type.validate != "client"
+            ):
+                continue
+            # Rows of a batch need not share keys; each one is checked
+            positions = [
+                i
+                for i, row in enumerate(new_rows)
+                if isinstance(row.get(column.key), str)
+            ]
+            if not positions:
+                continue
+            pickles, failed = _pickle_all(
+                [new_rows[i][column.key] for i in positions],
+                self.executor,
+                self.chunksize,
+                column.type.pickle_props,
+            )
+            if failed is not None:
+                row = positions[failed]
+                raise InvalidMoleculeError(
+                    f"Invalid SMILES string at row {row}: {new_rows[row][column.key]!r}"
+                )
+            for i, pickle in zip(positions, pickles):
+                new_rows[i][column.key] = pickle
+        return new_rows
+
+    def _before_execute(
+        self, conn, clauseelement, multiparams, params, execution_options
+    ):
+        del conn, execution_options
+        if len(multiparams) >= self.min_batch_size and isinstance(
+            clauseelement, Insert | Update
+        ):
+            multiparams = self.process_rows(clauseelement.table, multiparams)
+        return clauseelement, multiparams, params
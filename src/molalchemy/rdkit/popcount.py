@@ -0,0 +1,224 @@
+"""Popcount columns for pruning similarity searches over `bfp` columns.
+
+The Tanimoto (or Dice) similarity of two fingerprints with `a` and `b` bits set
+is at most `min(a, b) / max(a, b)` (or `2 * min(a, b) / (a + b)`), the
+Swamidass–Baldi bound. A search for fingerprints at least `threshold` similar
+to a query can therefore be restricted to a popcount range, which a btree index
+on a popcount column answers before any fingerprint is compared.
+
+A popcount column is a stored generated column,
+`bit_count(bfp_to_binary_text(fp))`, so PostgreSQL keeps it in sync with the
+fingerprint. `bit_count(bytea)` requires PostgreSQL 14 or later.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import TYPE_CHECKING, Any, Literal
+
+from sqlalchemy import Column, Computed, Integer, and_, cast, func, literal
+from sqlalchemy.sql import ClauseElement
+
+from molalchemy.rdkit.types import _bfp_to_binary_text
+
+if TYPE_CHECKING:
+    from sqlalchemy import ColumnElement
+
+Metric = Literal["tanimoto", "dice"]
+
+_INFO_KEY = "molalchemy_popcount_of"
+# Widens the bounds so that rounding never excludes a fingerprint at the threshold
+_EPSILON = 1e-9
+
+
+def popcount_expression(fp: Any) -> ColumnElement[int]:
+    """Return the SQL expression counting the bits set in the `bfp` expression `fp`."""
+    from molalchemy.rdkit import functions as rdkit_func
+
+    return func.bit_count(rdkit_func.bfp_to_binary_text(fp), type_=Integer)
+
+
+def popcount_column(
+    source: str, name: str | None = None, *, index: bool = True
+) -> Column:
+    """Create a popcount column generated from the `bfp` column `source`.
+
+    Parameters
+    ----------
+    source : str
+        Name of the `RdkitBitFingerprint` column.
+    name : str, optional
+        Name of the column. May be omitted in declarative mappings.
+    index : bool, default True
+        Whether to create a btree index on the column.
+
+    Returns
+    -------
+    sqlalchemy.Column
+        An `Integer` column computed as `bit_count(bfp_to_binary_text(source))`
+        and stored. Similarity filters on `source` find it through its `info`.
+
+    Examples
+    --------
+    >>> class Molecule(Base):
+    ...     __tablename__ = "molecules"
+    ...     id: Mapped[int] = mapped_column(primary_key=True)
+    ...     fp: Mapped[bytes] = mapped_column(RdkitBitFingerprint())
+    ...     fp_popcount: Mapped[int] = popcount_column("fp")
+    >>> select(Molecule.id).where(Molecule.fp.tanimoto(query_fp, threshold=0.7))
+    """
+    args: list[Any] = [] if name is None else [name]
+    return Column(
+        *args,
+        Integer,
+        Computed(f"bit_count(bfp_to_binary_text({source}))", persisted=True),
+        index=index,
+        info={_INFO_KEY: source},
+    )
+
+
+def find_popcount_column(fp_column: Any) -> Column | None:
+    """Return the popcount column generated from `fp_column`, if its table has one."""
+    fp_column = getattr(fp_column, "expression", fp_column)
+    table = getattr(fp_column, "table", None)
+    if table is None or not hasattr(table, "columns"):
+        return None
+    for column in table.columns:
+        if column.info.get(_INFO_KEY) == fp_column.name:
+            return column
+    return None
+
+
+def popcount_bounds(
+    popcount: int, threshold: float, metric: Metric = "tanimoto"
+) -> tuple[int, int]:
+    """Return the popcount range of fingerprints that can be `threshold` similar.
+
+    Parameters
+    ----------
+    popcount : int
+        Number of bits set in the query fingerprint.
+    threshold : float
+        Minimum similarity, greater than 0.
+    metric : Literal["tanimoto", "dice"], default "tanimoto"
+        The similarity metric.
+
+    Returns
+    -------
+    tuple[int, int]
+        The smallest and largest popcount, inclusive.
+    """
+    lower, upper = _bound_factors(threshold, metric)
+    return (
+        math.ceil(lower * popcount - _EPSILON),
+        math.floor(upper * popcount + _EPSILON),
+    )
+
+
+def popcount_range(
+    fp_column: Any,
+    query: Any,
+    threshold: float,
+    metric: Metric = "tanimoto",
+    *,
+    popcount: Any = None,
+) -> ColumnElement[bool]:
+    """Restrict `fp_column` to the fingerprints that can be `threshold` similar to `query`.
+
+    Parameters
+    ----------
+    fp_column : sqlalchemy.Column | sqlalchemy.orm.InstrumentedAttribute
+        The `RdkitBitFingerprint` column.
+    query : Any
+        The query fingerprint, as a value accepted by `RdkitBitFingerprint` or
+        a SQL expression.
+    threshold : float
+        Minimum similarity, greater than 0.
+    metric : Literal["tanimoto", "dice"], default "tanimoto"
+        The similarity metric.
+    popcount : sqlalchemy.Column, optional
+        The popcount column. Defaults to the column created with
+        `popcount_column` for `fp_column`.
+
+    Returns
+    -------
+    ColumnElement[bool]
+        A `BETWEEN` predicate on the popcount column. Bounds of a query value
+        are computed on the client; bounds of a SQL expression on the server.
+
+    Raises
+    ------
+    ValueError
+        If the threshold is invalid or there is no popcount column.
+    """
+    if popcount is None:
+        popcount = find_popcount_column(fp_column)
+        if popcount is None:
+            raise ValueError(
+                f"No popcount column found for {fp_column}; add one with popcount_column()"
+            )
+    if _is_sql(query):
+        query_popcount = popcount_expression(query)
+        lower, upper = _bound_factors(threshold, metric)
+        # ceil/floor return float8; integer bounds keep the popcount index usable
+        return popcount.between(
+            cast(func.ceil(lower * query_popcount - _EPSILON), Integer),
+            cast(func.floor(upper * query_popcount + _EPSILON), Integer),
+        )
+    bits = int.from_bytes(_bfp_to_binary_text(query), "little").bit_count()
+    return popcount.between(*popcount_bounds(bits, threshold, metric))
+
+
+def similarity_filter(
+    fp_column: Any, query: Any, threshold: float, metric: Metric = "tanimoto"
+) -> ColumnElement[bool]:
+    """Filter `fp_column` to fingerprints at least `threshold` similar to `query`.
+
+    Unlike the `%` and `#` operators, which compare against the
+    `rdkit.tanimoto_threshold`/`rdkit.dice_threshold` settings, the threshold
+    is part of the statement. The similarity function cannot use the GiST
+    index of `fp_column`, so the popcount range predicate is added for the
+    btree index of its popcount column to prune the candidates instead.
+
+    This is what `RdkitFPComparator.tanimoto` and `.dice` return when given a
+    `threshold`.
+
+    Raises
+    ------
+    ValueError
+        If the threshold is invalid or there is no popcount column. Without
+        one, use the `%`/`#` operators within
+        `molalchemy.rdkit.settings.similarity_threshold(..., local=True)`,
+        which keeps the GiST index usable.
+    """
+    from molalchemy.rdkit import functions as rdkit_func
+
+    if find_popcount_column(fp_column) is None:
+        raise ValueError(
+            f"No popcount column found for {fp_column}, so an explicit threshold "
+            "cannot use an index; add one with popcount_column(), or use the "
+            "operator without threshold within similarity_threshold(..., local=True)"
+        )
+    sml = rdkit_func.tanimoto_sml if metric == "tanimoto" else rdkit_func.dice_sml
+    if _is_sql(query):
+        query_fp = query
+    else:
+        query_fp = literal(query, fp_column.type)
+    condition = sml(fp_column, query_fp) >= threshold
+    return and_(popcount_range(fp_column, query, threshold, metric), condition)
+
+
+def _is_sql(value: Any) -> bool:
+    return isinstance(value, ClauseElement) or hasattr(value, "__clause_element__")
+
+
+def _bound_factors(threshold: float, metric: Metric) -> tuple[float, float]:
+    if not 0 < threshold <= 1:
+        raise ValueError(f"threshold must be in (0, 1], got {threshold}")
+    if metric == "tanimoto":
+        return threshold, 1 / threshold
+    if metric == "dice":
+        return threshold / (2 - threshold), (2 - threshold) / threshold
+    raise ValueError(
+        f"Invalid metric: {metric!r}. Available options are 'tanimoto', 'dice'."
+    )
@@ -0,0 +1,158 @@
+"""Precompiled query molecules for repeated substructure searches.
+
+A `Query` parses a SMARTS or SMILES pattern once on the client, so invalid
+patterns fail before any statement is executed, and binds the pickled query
+molecule through `mol_from_pkl`. Query features (atom lists, recursive SMARTS,
+bond queries) survive the pickle, so the server never re-parses the pattern.
+
+Parsed queries are kept in a process-wide LRU cache keyed by pattern, so a hot
+query costs one dictionary lookup per statement.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Literal
+
+from rdkit import Chem
+from sqlalchemy import LargeBinary, bindparam
+
+from molalchemy.cache import CacheInfo, LRUCache
+from molalchemy.exceptions import InvalidMoleculeError
+
+if TYPE_CHECKING:
+    from sqlalchemy import ColumnElement
+
+__all__ = [
+    "Query",
+    "clear_query_cache",
+    "query_cache_info",
+    "set_query_cache_size",
+]
+
+QueryKind = Literal["smarts", "smiles", "mol"]
+
+_DEFAULT_CACHE_SIZE = 1024
+_cache: LRUCache[tuple[str, str], Query] = LRUCache(_DEFAULT_CACHE_SIZE)
+
+
+class Query:
+    """A query molecule parsed and pickled on the client.
+
+    Create instances with `Query.from_smarts`, `Query.from_smiles` or
+    `Query.from_mol`. A `Query` can be passed wherever a SQL expression is
+    accepted, e.g. to `RdkitMolComparator.has_substructure`, `.is_substructure_of`,
+    `.equals` or `mol_has_substructure`, and renders as
+    `mol_from_pkl(:param)`.
+
+    Attributes
+    ----------
+    text : str | None
+        The pattern the query was parsed from, `None` for `Query.from_mol`.
+    kind : Literal["smarts", "smiles", "mol"]
+        How the query was created.
+    pickle : bytes
+        The pickled query molecule.
+
+    Examples
+    --------
+    >>> from molalchemy.rdkit import Query
+    >>> carbonyl = Query.from_smarts("[CX3]=[OX1]")
+    >>> select(Molecule.id).where(Molecule.structure.has_substructure(carbonyl))
+    """
+
+    __slots__ = ("kind", "pickle", "text")
+
+    def __init__(self, pickle: bytes, kind: QueryKind = "mol", text: str | None = None):
+        self.pickle = bytes(pickle)
+        self.kind = kind
+        self.text = text
+
+    @classmethod
+    def from_smarts(cls, smarts: str) -> Query:
+        """Parse `smarts` into a query, reusing a cached one if available.
+
+        Raises
+        ------
+        InvalidMoleculeError
+            If RDKit cannot parse `smarts`.
+        """
+        return _cached("smarts", smarts)
+
+    @classmethod
+    def from_smiles(cls, smiles: str) -> Query:
+        """Parse `smiles` into a query, reusing a cached one if available.
+
+        Raises
+        ------
+        InvalidMoleculeError
+            If RDKit cannot parse `smiles`.
+        """
+        return _cached("smiles", smiles)
+
+    @classmethod
+    def from_mol(cls, mol: Chem.Mol) -> Query:
+        """Create a query from an RDKit molecule, e.g. one built with `Chem.MolFromMolBlock`.
+
+        Queries created from molecules are not cached.
+        """
+        if not isinstance(mol, Chem.Mol):
+            raise InvalidMoleculeError(f"Expected an RDKit Mol object, got {mol!r}")
+        return cls(mol.ToBinary(), "mol")
+
+    @property
+    def mol(self) -> Chem.Mol:
+        """The query molecule, unpickled."""
+        return Chem.Mol(self.pickle)
+
+    def __clause_element__(self) -> ColumnElement:
+        from molalchemy.rdkit import functions as rdkit_func
+
+        return rdkit_func.mol_from_pkl(
+            bindparam(None, self.pickle, LargeBinary(), unique=True)
+        )
+
+    def __repr__(self):
+        if self.text is None:
+            return f"Query.from_mol(<{len(self.pickle)} bytes>)"
+        return f"Query.from_{self.kind}({self.text!r})"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Query):
+            return NotImplemented
+        return self.pickle == other.pickle
+
+    def __hash__(self) -> int:
+        return hash(self.pickle)
+
+
+def _cached(kind: Literal["smarts", "smiles"], text: str) -> Query:
+    if not isinstance(text, str):
+        raise InvalidMoleculeError(
+            f"{kind.upper()} pattern must be a string, got {text!r}"
+        )
+    key = (kind, text)
+    query = _cache.get(key)
+    if query is not None:
+        return query
+    mol = Chem.MolFromSmarts(text) if kind == "smarts" else Chem.MolFromSmiles(text)
+    if mol is None:
+        raise InvalidMoleculeError(f"Invalid {kind.upper()} string: {text!r}")
+    query = Query(mol.ToBinary(), kind, text)
+    _cache.put(key, query)
+    return query
+
+
+def query_cache_info() -> CacheInfo:
+    """Return the statistics of the process-wide query cache."""
+    return _cache.info()
+
+
+def clear_query_cache() -> None:
+    """Remove all queries from the process-wide query cache."""
+    _cache.clear()
+
+
+def set_query_cache_size(maxsize: int) -> None:
+    """Replace the process-wide query cache with an empty one holding `maxsize` queries."""
+    global _cache
+    _cache = LRUCache(maxsize)
@@ -0,0 +1,182 @@
+"""Thread-pool decoding of molecule and reaction result sets.
+
+The result processors of `RdkitMol(return_type="mol")` and
+`RdkitReaction(return_type="mol")` unpickle every value serially while
+SQLAlchemy iterates the rows. For large result sets, select the pickles instead
+(`return_type="bytes"`) and decode them with `decode_partitions`,
+which unpickles each fetched partition in a thread pool while the next
+partition is being fetched.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Literal
+
+from rdkit import Chem
+from rdkit.Chem import rdChemReactions
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator, Mapping, Sequence
+
+    from sqlalchemy import Result
+
+Decoder = Literal["mol", "reaction"]
+
+
+def decode_mol(value: bytes | memoryview | None) -> Chem.Mol | None:
+    """Unpickle a `mol_send` value into an `rdkit.Chem.Mol`."""
+    if value is None:
+        return None
+    return Chem.Mol(bytes(value))
+
+
+def decode_reaction(
+    value: bytes | memoryview | None,
+) -> rdChemReactions.ChemicalReaction | None:
+    """Unpickle a `reaction_send` value into a `ChemicalReaction`."""
+    if value is None:
+        return None
+    return rdChemReactions.ChemicalReaction(bytes(value))
+
+
+_DECODERS: dict[str, Callable[[Any], Any]] = {
+    "mol": decode_mol,
+    "reaction": decode_reaction,
+}
+
+
+def _resolve_decoders(
+    keys: Sequence[str], columns: Mapping[str | int, Decoder | Callable[[Any], Any]]
+) -> list[tuple[int, Callable[[Any], Any]]]:
+    resolved = []
+    for column, decoder in columns.items():
+        index = column if isinstance(column, int) else list(keys).index(column)
+        if isinstance(decoder, str):
+            try:
+                decoder = _DECODERS[decoder]
+            except KeyError:
+                raise ValueError(
+                    f"Invalid decoder: {decoder!r}. Available options are 'mol', 'reaction'."
+                ) from None
+        resolved.append((index, decoder))
+    return resolved
+
+
+def _decode_rows(
+    rows: Sequence[Sequence[Any]], decoders: list[tuple[int, Callable[[Any], Any]]]
+) -> list[tuple[Any, ...]]:
+    decoded = []
+    for row in rows:
+        values = list(row)
+        for index, decoder in decoders:
+            values[index] = decoder(values[index])
+        decoded.append(tuple(values))
+    return decoded
+
+
+def decode_partitions(
+    result: Result[Any],
+    columns: Mapping[str | int, Decoder | Callable[[Any], Any]],
+    *,
+    size: int | None = None,
+    executor: Executor | None = None,
+    max_workers: int | None = None,
+    chunksize: int = 256,
+    prefetch: int = 1,
+) -> Iterator[list[tuple[Any, ...]]]:
+    """Decode pickled columns of `result` partition by partition in a thread pool.
+
+    Each partition fetched with `result.partitions(size)` is split into chunks
+    that are decoded concurrently. Up to `prefetch` further partitions are
+    fetched while earlier ones are still being decoded, and partitions are
+    yielded in fetch order.
+
+    Parameters
+    ----------
+    result : sqlalchemy.Result
+        Result selecting the pickles, e.g. a column typed
+        `RdkitMol(return_type="bytes")`. Use `execution_options(yield_per=...)`
+        or `stream_results=True` to avoid buffering the whole result set.
+    columns : Mapping[str | int, Literal["mol", "reaction"] | Callable]
+        Columns to decode, by name or position, with the decoder to apply:
+        `"mol"` (`decode_mol`), `"reaction"` (`decode_reaction`) or a callable
+        taking the raw value. Other columns are passed through unchanged.
+    size : int, optional
+        Partition size passed to `result.partitions()`. Defaults to the
+        `yield_per` size of the result, if any.
+    executor : concurrent.futures.Executor, optional
+        Executor used for decoding. An executor passed here is not shut down.
+    max_workers : int, optional
+        Number of threads of the internally created `ThreadPoolExecutor`.
+    chunksize : int, default 256
+        Number of rows decoded per task.
+    prefetch : int, default 1
+        Number of partitions fetched ahead of the one being yielded.
+
+    Yields
+    ------
+    list[tuple]
+        The rows of a partition, with the selected columns decoded.
+
+    Notes
+    -----
+    Threads only decode in parallel to the extent that the RDKit build releases
+    the GIL while unpickling; decoding always overlaps with fetching, which
+    releases the GIL while waiting on the database.
+
+    Examples
+    --------
+    >>> stmt = select(Molecule.id, Molecule.structure).execution_options(
+    ...     yield_per=10_000
+    ... )
+    >>> result = session.execute(stmt)
+    >>> for rows in decode_partitions(result, {"structure": "mol"}, max_workers=16):
+    ...     for mol_id, mol in rows:
+    ...         ...
+    """
+    if chunksize < 1:
+        raise ValueError(f"chunksize must be positive, got {chunksize}")
+    if prefetch < 0:
+        raise ValueError(f"prefetch must not be negative, got {prefetch}")
+    decoders = _resolve_decoders(list(result.keys()), columns)
+    owns_executor = executor is None
+    if executor is None:
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def submit(partition):
+        return [
+            executor.submit(
+                _decode_rows, partition[start : start + chunksize], decoders
+            )
+            for start in range(0, len(partition), chunksize)
+        ]
+
+    pending: deque = deque()
+    try:
+        for partition in result.partitions(size):
+            pending.append(submit(partition))
+            if len(pending) > prefetch:
+                yield [row for future in pending.popleft() for row in future.result()]
+        while pending:
+            yield [row for future in pending.popleft() for row in future.result()]
+    finally:
+        for futures in pending:
+            for future in futures:
+                future.cancel()
+        if owns_executor:
+            executor.shutdown(wait=False)
+
+
+def decode_rows(
+    result: Result[Any],
+    columns: Mapping[str | int, Decoder | Callable[[Any], Any]],
+    **kwargs: Any,
+) -> Iterator[tuple[Any, ...]]:
+    """Iterate the rows of `result` decoded with `decode_partitions`.
+
+    Takes the same arguments as `decode_partitions`.
+    """
+    for partition in decode_partitions(result, columns, **kwargs):
+        yield from partition
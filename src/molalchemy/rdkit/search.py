@@ -0,0 +1,391 @@
+"""Streaming structure search, batched similarity search and substructure screening over RDKit cartridge columns."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Literal
+
+from rdkit import Chem
+from sqlalchemy import LargeBinary, Text, cast, select, true, type_coerce
+
+from molalchemy._search import any_key, stream, unnest_queries
+from molalchemy.exceptions import InvalidMoleculeError
+from molalchemy.rdkit.fingerprints import _INFO_KEY, FingerprintSpec, _to_mol
+from molalchemy.rdkit.types import RdkitBitFingerprint, RdkitMol
+from molalchemy.types import CString
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator, Sequence
+
+    from sqlalchemy import ColumnElement, Connection, Select
+    from sqlalchemy.orm import Session
+
+SearchType = Literal["substructure", "superstructure", "exact"]
+Metric = Literal["tanimoto", "dice"]
+PatternType = Literal["smarts", "smiles"]
+
+
+def build_search(
+    column: Any,
+    query: str | Chem.Mol,
+    *,
+    search: SearchType = "substructure",
+    return_type: Literal["mol", "smiles", "bytes", "lazy_mol"] = "mol",
+    extra_columns: Sequence[ColumnElement] = (),
+    limit: int | None = None,
+) -> Select:
+    """Build the SELECT statement run by `stream_search`.
+
+    See `stream_search` for the parameters.
+    """
+    if search == "substructure":
+        condition = column.has_substructure(query)
+    elif search == "superstructure":
+        condition = column.is_substructure_of(query)
+    elif search == "exact":
+        condition = column.equals(query)
+    else:
+        raise ValueError(
+            f"Invalid search: {search!r}. Available options are 'substructure', 'superstructure', 'exact'."
+        )
+    mol = type_coerce(column, RdkitMol(return_type=return_type)).label(column.key)
+    stmt = select(mol, *extra_columns).where(condition)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+
+def stream_search(
+    connection: Connection | Session,
+    column: Any,
+    query: str | Chem.Mol,
+    *,
+    search: SearchType = "substructure",
+    return_type: Literal["mol", "smiles", "bytes", "lazy_mol"] = "mol",
+    extra_columns: Sequence[ColumnElement] = (),
+    fetch_size: int = 1000,
+    limit: int | None = None,
+) -> Iterator[Any]:
+    """Search an `RdkitMol` column and stream the hits from a server-side cursor.
+
+    The query runs on a named server-side cursor and hits are fetched
+    `fetch_size` at a time, so client memory stays flat regardless of the
+    number of hits. The cursor is closed when the generator is exhausted or
+    closed; breaking out of a loop over it and dropping it is enough.
+
+    Parameters
+    ----------
+    connection : sqlalchemy.Connection | sqlalchemy.orm.Session
+        Connection or session to run the query on. Server-side cursors need a
+        transaction, which SQLAlchemy begins automatically.
+    column : sqlalchemy.Column | sqlalchemy.orm.InstrumentedAttribute
+        The `RdkitMol` column to search.
+    query : str | rdkit.Chem.Mol
+        The query molecule, as SMILES or `Chem.Mol`.
+    search : Literal["substructure", "superstructure", "exact"], default "substructure"
+        The search to run:
+        - `"substructure"`: Molecules containing `query` (`@>`)
+        - `"superstructure"`: Molecules contained in `query` (`<@`)
+        - `"exact"`: Molecules equal to `query` (`@=`)
+    return_type : Literal["mol", "smiles", "bytes", "lazy_mol"], default "mol"
+        How hits are decoded, see `RdkitMol`.
+    extra_columns : Sequence[ColumnElement], optional
+        Additional columns to select, e.g. the primary key.
+    fetch_size : int, default 1000
+        Number of rows fetched from the server per round trip.
+    limit : int, optional
+        Maximum number of hits.
+
+    Yields
+    ------
+    Any
+        The decoded molecule of each hit, or a `Row` of the molecule followed by
+        `extra_columns` if any are given.
+
+    Examples
+    --------
+    >>> from molalchemy.rdkit import stream_search
+    >>> with Session(engine) as session:
+    ...     for mol in stream_search(session, Molecule.mol, "c1ccccc1"):
+    ...         if mol.GetNumAtoms() > 50:
+    ...             break
+    """
+    stmt = build_search(
+        column,
+        query,
+        search=search,
+        return_type=return_type,
+        extra_columns=extra_columns,
+        limit=limit,
+    )
+    return stream(connection, stmt, fetch_size, scalars=not extra_columns)
+
+
+def _knn_queries(
+    fp_column: Any,
+    queries: Sequence[Any],
+    fingerprint: Callable[[ColumnElement], ColumnElement] | FingerprintSpec | None,
+) -> tuple[list[bytes], Callable[[ColumnElement], ColumnElement]]:
+    """Return the bound query values and the expression turning one into a fingerprint."""
+    is_mol = [isinstance(query, str | Chem.Mol) for query in queries]
+    if not any(is_mol):
+        fp_type = RdkitBitFingerprint()
+        return [fp_type.bind_processor(None)(query) for query in queries], (
+            fp_type.bind_expression
+        )
+    if not all(is_mol):
+        raise TypeError("queries must be all molecules or all fingerprints")
+    if fingerprint is None:
+        fingerprint = fp_column.info.get(_INFO_KEY)
+        if fingerprint is None:
+            raise ValueError(
+                "Molecule queries require `fingerprint`, or a fingerprint column "
+                "declared with derived_fingerprint()"
+            )
+    if isinstance(fingerprint, FingerprintSpec):
+        values = []
+        for query in queries:
+            mol = _to_mol(query)
+            if mol is None:
+                raise InvalidMoleculeError(f"Invalid SMILES string: {query!r}")
+            values.append(fingerprint.compute(mol))
+        return values, RdkitBitFingerprint().bind_expression
+    mol_type = RdkitMol()
+    values = [mol_type.bind_processor(None)(query) for query in queries]
+    return values, lambda value: fingerprint(mol_type.bind_expression(value))
+
+
+def build_knn_search(
+    fp_column: Any,
+    key_column: Any,
+    queries: Sequence[Any],
+    *,
+    k: int = 10,
+    metric: Metric = "tanimoto",
+    fingerprint: Callable[[ColumnElement], ColumnElement]
+    | FingerprintSpec
+    | None = None,
+) -> Select:
+    """Build the SELECT statement run by `knn_search`.
+
+    See `knn_search` for the parameters.
+    """
+    from molalchemy.rdkit import functions as rdkit_func
+
+    if metric not in ("tanimoto", "dice"):
+        raise ValueError(
+            f"Invalid metric: {metric!r}. Available options are 'tanimoto', 'dice'."
+        )
+    if k < 1:
+        raise ValueError(f"k must be positive, got {k}")
+    if not queries:
+        raise ValueError("No queries given")
+    values, to_fingerprint = _knn_queries(fp_column, queries, fingerprint)
+    unnested = unnest_queries(values, LargeBinary(), "knn_queries")
+    # Fingerprint each query once, not once per scanned row
+    query_table = select(
+        unnested.c.idx, to_fingerprint(unnested.c.value).label("fp")
+    ).subquery("queries")
+    similarity = (
+        rdkit_func.tanimoto_sml if metric == "tanimoto" else rdkit_func.dice_sml
+    )(fp_column, query_table.c.fp)
+    hits = (
+        select(key_column.label(key_column.key), similarity.label("similarity"))
+        .where(fp_column.is_not(None))
+        .order_by(fp_column.nearest_neighbors(query_table.c.fp, type=metric))
+        .limit(k)
+        .lateral("hits")
+    )
+    return (
+        select(
+            (query_table.c.idx - 1).label("query_idx"),
+            hits.c[key_column.key],
+            hits.c.similarity,
+        )
+        .select_from(query_table)
+        .join(hits, true())
+        .order_by(query_table.c.idx, hits.c.similarity.desc())
+    )
+
+
+def knn_search(
+    connection: Connection | Session,
+    fp_column: Any,
+    key_column: Any,
+    queries: Sequence[Any],
+    *,
+    k: int = 10,
+    metric: Metric = "tanimoto",
+    fingerprint: Callable[[ColumnElement], ColumnElement]
+    | FingerprintSpec
+    | None = None,
+    fetch_size: int = 1000,
+) -> Iterator[Any]:
+    """Find the `k` nearest neighbours of each of `queries` in one statement.
+
+    The queries are sent as a single array parameter and unnested into a
+    relation, which is joined `LATERAL` to a KNN subquery ordered by the
+    `<%>` (Tanimoto) or `<#>` (Dice) distance operator with `LIMIT k`. With a
+    GiST index on `fp_column`, each subquery is an index-ordered scan, and the
+    whole batch costs one round trip. The similarity thresholds
+    (`rdkit.tanimoto_threshold`, `rdkit.dice_threshold`) are not used.
+
+    Parameters
+    ----------
+    connection : sqlalchemy.Connection | sqlalchemy.orm.Session
+        Connection or session to run the query on.
+    fp_column : sqlalchemy.Column | sqlalchemy.orm.InstrumentedAttribute
+        The `RdkitBitFingerprint` column to search.
+    key_column : sqlalchemy.Column | sqlalchemy.orm.InstrumentedAttribute
+        Column identifying the hits, usually the primary key.
+    queries : Sequence
+        Query fingerprints (`bytes`, `rdkit.DataStructs.ExplicitBitVect` or
+        NumPy arrays, see `RdkitBitFingerprint`) or query molecules (SMILES or
+        `rdkit.Chem.Mol`).
+    k : int, default 10
+        Number of neighbours per query.
+    metric : Literal["tanimoto", "dice"], default "tanimoto"
+        The similarity metric.
+    fingerprint : Callable | FingerprintSpec, optional
+        How molecule queries are turned into fingerprints: a cartridge function
+        applied on the server, e.g. `rdkit_func.morganbv_fp`, or a
+        `FingerprintSpec` computed on the client. Defaults to the spec of a
+        column declared with `derived_fingerprint`. Ignored for fingerprint
+        queries.
+    fetch_size : int, default 1000
+        Number of rows fetched from the server per round trip.
+
+    Yields
+    ------
+    sqlalchemy.Row
+        `(query_idx, <key>, similarity)` rows, where `query_idx` is the
+        position of the query in `queries`, ordered by query and decreasing
+        similarity. Queries without neighbours yield no rows.
+
+    Raises
+    ------
+    ValueError
+        If the arguments are invalid, or molecule queries are given without a
+        way to fingerprint them.
+    InvalidMoleculeError
+        If a query molecule cannot be parsed.
+
+    Examples
+    --------
+    >>> from molalchemy.rdkit.search import knn_search
+    >>> for query_idx, mol_id, similarity in knn_search(
+    ...     session, Molecule.fp, Molecule.id, smiles, k=5,
+    ...     fingerprint=rdkit_func.morganbv_fp,
+    ... ):
+    ...     ...
+    """
+    stmt = build_knn_search(
+        fp_column, key_column, queries, k=k, metric=metric, fingerprint=fingerprint
+    )
+    return stream(connection, stmt, fetch_size, scalars=False)
+
+
+def build_screen(
+    column: Any,
+    key_column: Any,
+    patterns: Sequence[str],
+    *,
+    pattern_type: PatternType = "smarts",
+    keys: Iterable[Any] | None = None,
+) -> Select:
+    """Build the SELECT statement run by `screen`.
+
+    See `screen` for the parameters.
+    """
+    from molalchemy.rdkit import functions as rdkit_func
+
+    if pattern_type == "smarts":
+        parse, to_qmol = Chem.MolFromSmarts, rdkit_func.qmol_from_smarts
+    elif pattern_type == "smiles":
+        parse, to_qmol = Chem.MolFromSmiles, rdkit_func.qmol_from_smiles
+    else:
+        raise ValueError(
+            f"Invalid pattern_type: {pattern_type!r}. Available options are 'smarts', 'smiles'."
+        )
+    if not patterns:
+        raise ValueError("No patterns given")
+    for index, pattern in enumerate(patterns):
+        if parse(pattern) is None:
+            raise InvalidMoleculeError(
+                f"Pattern {index}: invalid {pattern_type} {pattern!r}"
+            )
+    unnested = unnest_queries(patterns, Text(), "patterns")
+    # Parse each pattern once, not once per row
+    pattern_table = select(
+        unnested.c.idx, to_qmol(cast(unnested.c.value, CString)).label("qmol")
+    ).subquery("patterns")
+    stmt = (
+        select((pattern_table.c.idx - 1).label("query_idx"), key_column)
+        .select_from(pattern_table)
+        .where(column.has_substructure(pattern_table.c.qmol))
+    )
+    if keys is not None:
+        stmt = stmt.where(any_key(key_column, keys))
+    return stmt.order_by(pattern_table.c.idx, key_column)
+
+
+def screen(
+    connection: Connection | Session,
+    column: Any,
+    key_column: Any,
+    patterns: Sequence[str],
+    *,
+    pattern_type: PatternType = "smarts",
+    keys: Iterable[Any] | None = None,
+    fetch_size: int = 10_000,
+) -> Iterator[Any]:
+    """Match many substructure patterns against a table in one statement.
+
+    The patterns are sent as a single array parameter, unnested and parsed
+    into `qmol` values once each, and joined to the table of `column` with the
+    `@>` operator. With a GiST index on `column`, each pattern is an index
+    scan. The result is the sparse hit matrix as `(query_idx, <key>)` pairs.
+
+    Parameters
+    ----------
+    connection : sqlalchemy.Connection | sqlalchemy.orm.Session
+        Connection or session to run the query on.
+    column : sqlalchemy.Column | sqlalchemy.orm.InstrumentedAttribute
+        The `RdkitMol` column to screen, of a table or any other selectable.
+    key_column : sqlalchemy.Column | sqlalchemy.orm.InstrumentedAttribute
+        Column identifying the rows, usually the primary key.
+    patterns : Sequence[str]
+        The query patterns, e.g. structural alerts.
+    pattern_type : Literal["smarts", "smiles"], default "smarts"
+        How the patterns are parsed (`qmol_from_smarts` or `qmol_from_smiles`).
+    keys : Iterable, optional
+        Restrict the screen to the rows with these keys, e.g. a newly loaded
+        batch. Bound as a single array parameter.
+    fetch_size : int, default 10000
+        Number of rows fetched from the server per round trip.
+
+    Yields
+    ------
+    sqlalchemy.Row
+        `(query_idx, <key>)` pairs, where `query_idx` is the position of the
+        pattern in `patterns`, ordered by pattern and key.
+
+    Raises
+    ------
+    InvalidMoleculeError
+        If a pattern cannot be parsed by RDKit on the client.
+    ValueError
+        If no patterns or an invalid `pattern_type` are given.
+
+    Examples
+    --------
+    >>> from molalchemy.rdkit.search import screen
+    >>> hits = defaultdict(list)
+    >>> for alert_idx, mol_id in screen(
+    ...     session, Molecule.mol, Molecule.id, alerts, keys=new_ids
+    ... ):
+    ...     hits[mol_id].append(alert_idx)
+    """
+    stmt = build_screen(
+        column, key_column, patterns, pattern_type=pattern_type, keys=keys
+    )
+    return stream(connection, stmt, fetch_size, scalars=False)
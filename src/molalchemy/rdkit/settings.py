@@ -1,15 +1,30 @@
-"""RDKit PostgreSQL GUC settings helpers for similarity search thresholds."""
+"""RDKit PostgreSQL GUC settings helpers for similarity search thresholds, cartridge configuration and search timeouts."""
 
 from __future__ import annotations
 
-from contextlib import contextmanager
+from dataclasses import dataclass, fields
 from typing import TYPE_CHECKING
 
 from sqlalchemy import text
 
-if TYPE_CHECKING:
-    from collections.abc import Generator
+from molalchemy._guc import SearchHandle as SearchHandle
+from molalchemy._guc import (
+    apply_on_connect,
+    aset_settings,
+    atracked,
+    cached,
+    override_settings,
+    remember,
+    set_settings,
+    tracked,
+)
+from molalchemy._guc import asearch_timeout as asearch_timeout
+from molalchemy._guc import search_timeout as search_timeout
+from molalchemy._guc import track_settings as track_settings
 
+if TYPE_CHECKING:
+    from sqlalchemy import Connection, Engine
+    from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
     from sqlalchemy.orm import Session
 
 
@@ -20,63 +35,343 @@ def _validate_threshold(value: float) -> None:
         raise ValueError(f"threshold must be between 0.0 and 1.0, got {value}")
 
 
-def set_tanimoto_threshold(session: Session, threshold: float) -> None:
-    """Set the rdkit.tanimoto_threshold GUC variable."""
+def _set_threshold(session: Session, name: str, threshold: float) -> None:
     _validate_threshold(threshold)
-    session.execute(text(f"SET rdkit.tanimoto_threshold = {float(threshold)}"))
+    info = tracked(session)
+    value = float(threshold)
+    if cached(info, name) == str(value):
+        return
+    session.execute(text(f"SET {name} = {value}"))
+    remember(info, name, value)
 
 
-def set_dice_threshold(session: Session, threshold: float) -> None:
-    """Set the rdkit.dice_threshold GUC variable."""
+def _get_threshold(session: Session, name: str) -> float:
+    info = tracked(session)
+    value = cached(info, name)
+    if value is None:
+        value = session.execute(text(f"SHOW {name}")).scalar_one()
+        remember(info, name, value)
+    return float(value)
+
+
+async def _aset_threshold(
+    session: AsyncSession | AsyncConnection, name: str, threshold: float
+) -> None:
     _validate_threshold(threshold)
-    session.execute(text(f"SET rdkit.dice_threshold = {float(threshold)}"))
+    info = await atracked(session)
+    value = float(threshold)
+    if cached(info, name) == str(value):
+        return
+    await session.execute(text(f"SET {name} = {value}"))
+    remember(info, name, value)
+
+
+async def _aget_threshold(session: AsyncSession | AsyncConnection, name: str) -> float:
+    info = await atracked(session)
+    value = cached(info, name)
+    if value is None:
+        value = (await session.execute(text(f"SHOW {name}"))).scalar_one()
+        remember(info, name, value)
+    return float(value)
+
+
+def set_tanimoto_threshold(session: Session, threshold: float) -> None:
+    """Set the rdkit.tanimoto_threshold GUC variable.
+
+    On engines with `track_settings`, the `SET` is skipped if the connection
+    already has the value.
+    """
+    _set_threshold(session, "rdkit.tanimoto_threshold", threshold)
+
+
+def set_dice_threshold(session: Session, threshold: float) -> None:
+    """Set the rdkit.dice_threshold GUC variable.
+
+    On engines with `track_settings`, the `SET` is skipped if the connection
+    already has the value.
+    """
+    _set_threshold(session, "rdkit.dice_threshold", threshold)
 
 
 def get_tanimoto_threshold(session: Session) -> float:
-    """Get the current rdkit.tanimoto_threshold value."""
-    result = session.execute(text("SHOW rdkit.tanimoto_threshold"))
-    return float(result.scalar_one())
+    """Get the current rdkit.tanimoto_threshold value.
+
+    On engines with `track_settings`, a known value is returned from the cache.
+    """
+    return _get_threshold(session, "rdkit.tanimoto_threshold")
 
 
 def get_dice_threshold(session: Session) -> float:
-    """Get the current rdkit.dice_threshold value."""
-    result = session.execute(text("SHOW rdkit.dice_threshold"))
-    return float(result.scalar_one())
-
-
-@contextmanager
-def similarity_threshold(
-    session: Session,
-    *,
-    tanimoto: float | None = None,
-    dice: float | None = None,
-) -> Generator[None, None, None]:
+    """Get the current rdkit.dice_threshold value.
+
+    On engines with `track_settings`, a known value is returned from the cache.
+    """
+    return _get_threshold(session, "rdkit.dice_threshold")
+
+
+async def aset_tanimoto_threshold(
+    session: AsyncSession | AsyncConnection, threshold: float
+) -> None:
+    """Set the rdkit.tanimoto_threshold GUC variable on an async session or connection."""
+    await _aset_threshold(session, "rdkit.tanimoto_threshold", threshold)
+
+
+async def aset_dice_threshold(
+    session: AsyncSession | AsyncConnection, threshold: float
+) -> None:
+    """Set the rdkit.dice_threshold GUC variable on an async session or connection."""
+    await _aset_threshold(session, "rdkit.dice_threshold", threshold)
+
+
+async def aget_tanimoto_threshold(session: AsyncSession | AsyncConnection) -> float:
+    """Get the current rdkit.tanimoto_threshold value from an async session or connection."""
+    return await _aget_threshold(session, "rdkit.tanimoto_threshold")
+
+
+async def aget_dice_threshold(session: AsyncSession | AsyncConnection) -> float:
+    """Get the current rdkit.dice_threshold value from an async session or connection."""
+    return await _aget_threshold(session, "rdkit.dice_threshold")
+
+
+_SYNC_ACCESSORS = {
+    "tanimoto": (get_tanimoto_threshold, set_tanimoto_threshold),
+    "dice": (get_dice_threshold, set_dice_threshold),
+}
+_ASYNC_ACCESSORS = {
+    "tanimoto": (aget_tanimoto_threshold, aset_tanimoto_threshold),
+    "dice": (aget_dice_threshold, aset_dice_threshold),
+}
+
+
+class similarity_threshold:
     """Context manager to temporarily set similarity thresholds.
 
-    Restores original values on exit, even if an exception occurs.
+    Restores original values on exit, even if an exception occurs. Use
+    `with` on a `Session` or `Connection` and `async with` on an
+    `AsyncSession` or `AsyncConnection`.
+
+    With `local=True`, the thresholds are instead set for the current
+    transaction only (like `SET LOCAL`), with a single `set_config` statement
+    and no `SHOW` or restore round trips: PostgreSQL discards them when the
+    transaction ends. The settings then stay in effect after the block until
+    the transaction ends, and have no effect outside a transaction.
 
     Parameters
     ----------
-    session : Session
-        SQLAlchemy session.
+    session : Session | AsyncSession
+        SQLAlchemy session or connection, synchronous or asynchronous.
     tanimoto : float, optional
         Tanimoto threshold to set (0.0-1.0).
     dice : float, optional
         Dice threshold to set (0.0-1.0).
+    local : bool, default False
+        Set the thresholds for the current transaction in one round trip
+        instead of setting and restoring them for the session.
+
+    Examples
+    --------
+    >>> with similarity_threshold(session, tanimoto=0.8):
+    ...     session.execute(select(Molecule.id).where(Molecule.fp.tanimoto(query_fp)))
+    >>> async with similarity_threshold(async_session, tanimoto=0.8):
+    ...     await async_session.execute(
+    ...         select(Molecule.id).where(Molecule.fp.tanimoto(query_fp))
+    ...     )
+    >>> with session.begin(), similarity_threshold(session, tanimoto=0.8, local=True):
+    ...     session.execute(select(Molecule.id).where(Molecule.fp.tanimoto(query_fp)))
     """
-    old_tanimoto = None
-    old_dice = None
-
-    try:
-        if tanimoto is not None:
-            old_tanimoto = get_tanimoto_threshold(session)
-            set_tanimoto_threshold(session, tanimoto)
-        if dice is not None:
-            old_dice = get_dice_threshold(session)
-            set_dice_threshold(session, dice)
-        yield
-    finally:
-        if old_tanimoto is not None:
-            set_tanimoto_threshold(session, old_tanimoto)
-        if old_dice is not None:
-            set_dice_threshold(session, old_dice)
+
+    def __init__(
+        self,
+        session: Session | AsyncSession | AsyncConnection,
+        *,
+        tanimoto: float | None = None,
+        dice: float | None = None,
+        local: bool = False,
+    ):
+        self.session = session
+        self.local = local
+        self._values = {
+            name: value
+            for name, value in (("tanimoto", tanimoto), ("dice", dice))
+            if value is not None
+        }
+        self._previous: dict[str, float] = {}
+
+    def _local_settings(self) -> dict[str, float]:
+        for value in self._values.values():
+            _validate_threshold(value)
+        return {
+            f"rdkit.{name}_threshold": float(value)
+            for name, value in self._values.items()
+        }
+
+    def __enter__(self) -> None:
+        if self.local:
+            set_settings(self.session, self._local_settings(), local=True)
+            return
+        try:
+            for name, value in self._values.items():
+                get, set_ = _SYNC_ACCESSORS[name]
+                self._previous[name] = get(self.session)
+                set_(self.session, value)
+        except BaseException:
+            self._restore()
+            raise
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._restore()
+
+    async def __aenter__(self) -> None:
+        if self.local:
+            await aset_settings(self.session, self._local_settings(), local=True)
+            return
+        try:
+            for name, value in self._values.items():
+                get, set_ = _ASYNC_ACCESSORS[name]
+                self._previous[name] = await get(self.session)
+                await set_(self.session, value)
+        except BaseException:
+            await self._arestore()
+            raise
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self._arestore()
+
+    def _restore(self) -> None:
+        previous, self._previous = self._previous, {}
+        for name, value in previous.items():
+            _SYNC_ACCESSORS[name][1](self.session, value)
+
+    async def _arestore(self) -> None:
+        previous, self._previous = self._previous, {}
+        for name, value in previous.items():
+            await _ASYNC_ACCESSORS[name][1](self.session, value)
+
+
+_FLAGS = frozenset(
+    {"do_chiral_sss", "do_enhanced_stereo_sss", "ignore_reaction_agents"}
+)
+_THRESHOLDS = frozenset({"tanimoto_threshold", "dice_threshold"})
+
+
+@dataclass(frozen=True, kw_only=True)
+class RdkitSettings:
+    """RDKit cartridge configuration (`rdkit.*` GUC variables).
+
+    Settings left as `None` keep the server's value. Attach the configuration
+    to an engine with `apply`, which sets it once per new physical connection,
+    or pass `options()` to libpq; override it for a block with `override`.
+
+    Parameters
+    ----------
+    tanimoto_threshold, dice_threshold : float, optional
+        Thresholds of the `%` and `#` similarity operators (0.0-1.0).
+    do_chiral_sss : bool, optional
+        Whether substructure matches take stereochemistry into account.
+    do_enhanced_stereo_sss : bool, optional
+        Whether substructure matches take enhanced stereochemistry into account.
+    ss_fp_size : int, optional
+        Size of the substructure screening fingerprints used by the GiST index.
+    morgan_fp_size, featmorgan_fp_size, layered_fp_size, rdkit_fp_size : int, optional
+        Sizes of the fingerprints computed by the corresponding `*bv_fp`
+        functions.
+    torsion_fp_size, atompair_fp_size, avalon_fp_size : int, optional
+        Sizes of the torsion, atom pair and Avalon fingerprints.
+    hashed_torsion_fp_size, hashed_atompair_fp_size : int, optional
+        Sizes of the hashed torsion and atom pair bit vector fingerprints.
+    reaction_sss_fp_size, reaction_difference_fp_size : int, optional
+        Sizes of the reaction substructure and difference fingerprints.
+    ignore_reaction_agents : bool, optional
+        Whether reaction fingerprints and matches ignore agents.
+
+    Examples
+    --------
+    >>> settings = RdkitSettings(tanimoto_threshold=0.7, do_chiral_sss=True)
+    >>> settings.apply(engine)
+    >>> with RdkitSettings(do_chiral_sss=False).override(session):
+    ...     session.execute(select(Molecule.id).where(Molecule.structure.has_substructure(q)))
+    """
+
+    tanimoto_threshold: float | None = None
+    dice_threshold: float | None = None
+    do_chiral_sss: bool | None = None
+    do_enhanced_stereo_sss: bool | None = None
+    ss_fp_size: int | None = None
+    morgan_fp_size: int | None = None
+    featmorgan_fp_size: int | None = None
+    layered_fp_size: int | None = None
+    rdkit_fp_size: int | None = None
+    torsion_fp_size: int | None = None
+    atompair_fp_size: int | None = None
+    avalon_fp_size: int | None = None
+    hashed_torsion_fp_size: int | None = None
+    hashed_atompair_fp_size: int | None = None
+    reaction_sss_fp_size: int | None = None
+    reaction_difference_fp_size: int | None = None
+    ignore_reaction_agents: bool | None = None
+
+    def __post_init__(self) -> None:
+        for field in fields(self):
+            value = getattr(self, field.name)
+            if value is None:
+                continue
+            if field.name in _THRESHOLDS:
+                _validate_threshold(value)
+            elif field.name in _FLAGS:
+                if not isinstance(value, bool):
+                    raise TypeError(
+                        f"{field.name} must be a bool, got {type(value).__name__}"
+                    )
+            elif isinstance(value, bool) or not isinstance(value, int):
+                raise TypeError(
+                    f"{field.name} must be an int, got {type(value).__name__}"
+                )
+            elif value < 1:
+                raise ValueError(f"{field.name} must be positive, got {value}")
+
+    def gucs(self) -> dict[str, str]:
+        """Return the configured settings as GUC names and values."""
+        gucs = {}
+        for field in fields(self):
+            value = getattr(self, field.name)
+            if value is None:
+                continue
+            if isinstance(value, bool):
+                value = "on" if value else "off"
+            elif field.name in _THRESHOLDS:
+                value = float(value)
+            gucs[f"rdkit.{field.name}"] = str(value)
+        return gucs
+
+    def options(self) -> str:
+        """Return the settings as a libpq `options` string.
+
+        Pass it as `connect_args={"options": settings.options()}` to
+        `create_engine` to send the settings in the startup packet, without any
+        statement.
+        """
+        return " ".join(f"-c {name}={value}" for name, value in self.gucs().items())
+
+    def apply(self, engine: Engine | AsyncEngine) -> None:
+        """Set the settings on every new physical connection of `engine`.
+
+        The settings are sent once per connection from a `connect` event, so
+        they cost nothing per query. With `track_settings`, connections are
+        known to have these values, and `reset_on_checkin` restores them.
+        """
+        apply_on_connect(engine, self.gucs())
+
+    def override(
+        self,
+        session: Session | Connection | AsyncSession | AsyncConnection,
+        *,
+        local: bool = False,
+    ) -> override_settings:
+        """Return a context manager setting the settings on `session` for a block.
+
+        The previous values are restored on exit. With `local=True`, the
+        settings are set for the current transaction only, in a single
+        statement, and nothing is restored. Use `with` on synchronous and
+        `async with` on asynchronous sessions and connections.
+        """
+        return override_settings(session, self.gucs(), local=local)
@@ -7,13 +7,72 @@ chemical data stored in PostgreSQL using the RDKit cartridge.
 import functools
 from typing import Any, Literal
 
-from rdkit import Chem
+import numpy as np
+from rdkit import Chem, DataStructs
 from rdkit.Chem import AllChem, rdChemReactions
-from sqlalchemy import func
+from sqlalchemy import Text, cast, func, literal_column, type_coerce
 from sqlalchemy.types import UserDefinedType
 
+from molalchemy.cache import LRUCache
 from molalchemy.exceptions import InvalidMoleculeError, InvalidReactionError
 from molalchemy.rdkit.comparators import RdkitFPComparator, RdkitMolComparator
+from molalchemy.rdkit.lazy import LazyMol
+from molalchemy.types import CString
+
+ValidationMode = Literal["client", "server", "none"]
+_VALIDATION_MODES = ("client", "server", "none")
+
+
+_NO_CONFORMERS = getattr(Chem.PropertyPickleOptions, "NoConformers", None)
+
+
+def _to_binary(
+    mol: Chem.Mol, pickle_props: int | None = None, keep_conformers: bool = True
+) -> bytes:
+    """Pickle `mol` with the given property flags, optionally without conformers."""
+    if pickle_props is None and keep_conformers:
+        return mol.ToBinary()
+    flags = Chem.GetDefaultPickleProperties() if pickle_props is None else pickle_props
+    if not keep_conformers and mol.GetNumConformers():
+        if _NO_CONFORMERS is None:
+            mol = Chem.Mol(mol)
+            mol.RemoveAllConformers()
+        else:
+            flags |= int(_NO_CONFORMERS)
+    return mol.ToBinary(flags)
+
+
+def _bfp_to_binary_text(value: Any) -> bytes | None:
+    """Convert a bit fingerprint input value to packed bits."""
+    if value is None or isinstance(value, bytes):
+        return value
+    if isinstance(value, memoryview | bytearray):
+        return bytes(value)
+    if isinstance(value, DataStructs.ExplicitBitVect):
+        return DataStructs.BitVectToBinaryText(value)
+    if isinstance(value, np.ndarray):
+        if value.ndim != 1:
+            raise ValueError(
+                f"Fingerprint array must be one-dimensional, got shape {value.shape}"
+            )
+        if value.dtype == np.bool_:
+            return np.packbits(value, bitorder="little").tobytes()
+        if value.dtype == np.uint8:
+            return value.tobytes()
+        raise TypeError(
+            f"Fingerprint array must have dtype bool or uint8, got {value.dtype}"
+        )
+    raise TypeError(
+        "Fingerprint value must be bytes, an ExplicitBitVect or a numpy array, "
+        f"got {type(value).__name__}"
+    )
+
+
+def _check_validate(validate: str) -> None:
+    if validate not in _VALIDATION_MODES:
+        raise ValueError(
+            f"Invalid validate: {validate!r}. Available options are 'client', 'server', 'none'."
+        )
 
 
 class RdkitBaseType(UserDefinedType):
@@ -25,15 +84,46 @@ class RdkitMol(RdkitBaseType):
 
     This type maps to the PostgreSQL `mol` type provided by the RDKit cartridge.
     By default, SMILES strings are used as input, but `Chem.Mol` objects can also be used, all inputs are converted to binary format prior to sending to the database.
+    Values that are already `bytes` are treated as pickled molecules (e.g. produced by
+    `molalchemy.rdkit.parallel.pickle_smiles`) and are sent unchanged.
     It supports different return formats for flexibility in working with molecular data.
 
     Parameters
     ----------
-    return_type : Literal["smiles", "bytes", "mol"], default "smiles"
+    return_type : Literal["smiles", "bytes", "mol", "lazy_mol"], default "smiles"
         The format in which to return molecule data from the database:
         - `"smiles"`: Return as SMILES string
         - `"bytes"`: Return as raw bytes
         - `"mol"`: Return as `rdkit.Chem.Mol` object
+        - `"lazy_mol"`: Return as `molalchemy.rdkit.LazyMol`, which holds the pickle
+          and SMILES and only builds the `rdkit.Chem.Mol` on first use. The
+          database sends both the pickle and the SMILES for every row.
+    bind_cache_size : int, optional
+        If given, pickled molecules are cached in a size-bounded LRU cache keyed on
+        the input SMILES string, so repeated binds of the same SMILES skip RDKit.
+        Statistics are available through `bind_cache.info()`.
+    validate : Literal["client", "server", "none"], default "client"
+        Where input molecules are validated:
+        - `"client"`: Parse with RDKit and send a pickle (`mol_from_pkl`)
+        - `"server"`: Send the SMILES text unparsed and cast it to `mol` in the
+          database, which raises an error for invalid SMILES
+        - `"none"`: Send the SMILES text unparsed through `mol_from_smiles`, which
+          stores NULL for invalid SMILES
+        The `"server"` and `"none"` modes are meant for trusted, already validated
+        input and cost almost no client CPU per row.
+    pickle_props : int | rdkit.Chem.PropertyPickleOptions, optional
+        Property flags passed to `Chem.Mol.ToBinary` when pickling input molecules,
+        e.g. `Chem.PropertyPickleOptions.NoProps`. Defaults to the global
+        `Chem.GetDefaultPickleProperties()`. The cartridge discards properties, so
+        `NoProps` gives the smallest payloads.
+    keep_conformers : bool, default True
+        Whether conformers of input molecules are pickled. Set to `False` to avoid
+        shipping coordinates the cartridge does not use.
+
+    Attributes
+    ----------
+    bind_cache : molalchemy.cache.LRUCache | None
+        The SMILES-to-pickle cache, `None` unless `bind_cache_size` is set.
     """
 
     cache_ok = True
@@ -43,41 +133,110 @@ class RdkitMol(RdkitBaseType):
 
     comparator_factory = RdkitMolComparator
 
-    def __init__(self, return_type: Literal["smiles", "bytes", "mol"] = "smiles"):
+    def __init__(
+        self,
+        return_type: Literal["smiles", "bytes", "mol", "lazy_mol"] = "smiles",
+        bind_cache_size: int | None = None,
+        validate: ValidationMode = "client",
+        pickle_props: int | Chem.PropertyPickleOptions | None = None,
+        keep_conformers: bool = True,
+    ):
+        _check_validate(validate)
         super().__init__()
         self.return_type = return_type
+        self.bind_cache_size = bind_cache_size
+        self.validate = validate
+        self.pickle_props = None if pickle_props is None else int(pickle_props)
+        self.keep_conformers = keep_conformers
+        self.bind_cache: LRUCache[str, bytes] | None = (
+            LRUCache(bind_cache_size) if bind_cache_size else None
+        )
 
     def __repr__(self):
-        return f"RdkitMol(return_type={self.return_type!r})"
+        args = f"return_type={self.return_type!r}"
+        if self.bind_cache_size:
+            args += f", bind_cache_size={self.bind_cache_size!r}"
+        if self.validate != "client":
+            args += f", validate={self.validate!r}"
+        if self.pickle_props is not None:
+            args += f", pickle_props={self.pickle_props!r}"
+        if not self.keep_conformers:
+            args += ", keep_conformers=False"
+        return f"RdkitMol({args})"
 
     def column_expression(self, colexpr):
         from . import functions as rdkit_func
 
         if self.return_type in ("mol", "bytes"):
             return rdkit_func.mol_send(colexpr, type_=self)
+        if self.return_type == "lazy_mol":
+            # pickle || '\x00' || smiles, split again by LazyMol.from_payload
+            payload = (
+                rdkit_func.mol_send(colexpr)
+                .op("||")(literal_column("'\\x00'::bytea"))
+                .op("||")(
+                    func.convert_to(
+                        cast(rdkit_func.mol_to_smiles(colexpr), Text), "UTF8"
+                    )
+                )
+            )
+            return type_coerce(payload, self)
         else:  # smiles
             return colexpr
 
     def bind_processor(self, dialect):
         del dialect
+        if self.validate != "client":
+            return self._text_bind_processor()
+        cache = self.bind_cache
+        to_binary = functools.partial(
+            _to_binary,
+            pickle_props=self.pickle_props,
+            keep_conformers=self.keep_conformers,
+        )
 
         def process(value):
             if value is None:
                 return None
+            if isinstance(value, bytes | memoryview):
+                return bytes(value)
             if isinstance(value, str):
+                if cache is not None:
+                    pickle = cache.get(value)
+                    if pickle is not None:
+                        return pickle
                 mol = Chem.MolFromSmiles(value)
                 if mol is None:
                     raise InvalidMoleculeError(f"Invalid SMILES string: {value!r}")
-                value = mol
+                pickle = to_binary(mol)
+                if cache is not None:
+                    cache.put(value, pickle)
+                return pickle
             if not isinstance(value, Chem.Mol):
                 raise InvalidMoleculeError(
                     "Value must be a SMILES string or an RDKit Mol object"
                 )
-            return value.ToBinary()
+            return to_binary(value)
+
+        return process
+
+    def _text_bind_processor(self):
+        def process(value):
+            if value is None or isinstance(value, str):
+                return value
+            if isinstance(value, Chem.Mol):
+                return Chem.MolToSmiles(value)
+            raise InvalidMoleculeError(
+                f"Value must be a SMILES string or an RDKit Mol object when validate={self.validate!r}"
+            )
 
         return process
 
     def bind_expression(self, bindvalue):
+        if self.validate == "server":
+            return cast(bindvalue, self)
+        if self.validate == "none":
+            return func.mol_from_smiles(cast(bindvalue, CString))
         return func.mol_from_pkl(bindvalue)
 
     def result_processor(self, dialect, coltype):
@@ -93,6 +252,8 @@ class RdkitMol(RdkitBaseType):
                 # If we have a string (shouldn't happen with mol_send but just in case)
                 else:
                     return Chem.MolFromSmiles(str(value))
+            elif return_type == "lazy_mol":
+                return LazyMol.from_payload(bytes(value))
             elif return_type == "bytes":
                 return bytes(value) if isinstance(value, memoryview) else value
             else:  # smiles
@@ -106,18 +267,76 @@ class RdkitBitFingerprint(RdkitBaseType):
 
     This type maps to the PostgreSQL `bfp` type provided by the RDKit cartridge,
     which represents binary fingerprints as bit strings.
+    Fingerprints are exchanged with the database as packed bits in RDKit's binary
+    text format (`bfp_from_binary_text`/`bfp_to_binary_text`): bit `i` is bit
+    `i % 8` of byte `i // 8`.
+
+    Input values can be:
+    - `rdkit.DataStructs.ExplicitBitVect`
+    - `bytes`, the packed bits
+    - `numpy.ndarray` of `bool` (one element per bit) or `uint8` (packed bits, as
+      returned with `return_type="numpy"`)
+
+    Parameters
+    ----------
+    return_type : Literal["bytes", "bitvect", "numpy"], default "bytes"
+        The format in which to return fingerprints from the database:
+        - `"bytes"`: Return the packed bits as `bytes`
+        - `"bitvect"`: Return as `rdkit.DataStructs.ExplicitBitVect`
+        - `"numpy"`: Return the packed bits as a 1-D `uint8` `numpy.ndarray`;
+          use `numpy.unpackbits(fp, bitorder="little")` for one element per bit.
+          For whole result sets, `molalchemy.rdkit.fingerprints.fingerprints_to_array`
+          builds a single `(n_rows, n_bytes)` array instead.
+
+    Notes
+    -----
+    The number of bits of a fingerprint returned as `"bitvect"` is rounded up to a
+    multiple of 8.
     """
 
     impl = bytes
     cache_ok = True
     comparator_factory = RdkitFPComparator
 
+    def __init__(self, return_type: Literal["bytes", "bitvect", "numpy"] = "bytes"):
+        super().__init__()
+        self.return_type = return_type
+
     def __repr__(self):
+        if self.return_type != "bytes":
+            return f"RdkitBitFingerprint(return_type={self.return_type!r})"
         return "RdkitBitFingerprint()"
 
     def get_col_spec(self, **kwargs: Any) -> str:
         return "bfp"
 
+    def bind_processor(self, dialect):
+        del dialect
+        return _bfp_to_binary_text
+
+    def bind_expression(self, bindvalue):
+        return func.bfp_from_binary_text(bindvalue)
+
+    def column_expression(self, colexpr):
+        from . import functions as rdkit_func
+
+        return type_coerce(rdkit_func.bfp_to_binary_text(colexpr), self)
+
+    def result_processor(self, dialect, coltype):
+        del dialect, coltype
+
+        def process(value, return_type):
+            if value is None:
+                return None
+            if return_type == "bitvect":
+                return DataStructs.CreateFromBinaryText(bytes(value))
+            elif return_type == "numpy":
+                return np.frombuffer(bytes(value), dtype=np.uint8)
+            else:  # bytes
+                return bytes(value) if isinstance(value, memoryview) else value
+
+        return functools.partial(process, return_type=self.return_type)
+
 
 class RdkitSparseFingerprint(RdkitBaseType):
     """SQLAlchemy type for RDKit sparse fingerprint data stored in PostgreSQL.
@@ -150,6 +369,13 @@ class RdkitReaction(RdkitBaseType):
         - `"smiles"`: Return as reaction SMILES string
         - `"bytes"`: Return as raw bytes
         - `"mol"`: Return as `AllChem.ChemicalReaction` object
+    validate : Literal["client", "server", "none"], default "client"
+        Where input reactions are validated:
+        - `"client"`: Parse with RDKit before sending (`reaction_from_smarts`)
+        - `"server"`: Send the reaction SMILES unparsed and cast it to `reaction`
+          in the database, which raises an error for invalid input
+        - `"none"`: Send the reaction SMILES unparsed through
+          `reaction_from_smiles`, which stores NULL for invalid input
     """
 
     impl = bytes
@@ -160,22 +386,34 @@ class RdkitReaction(RdkitBaseType):
 
     comparator_factory = RdkitMolComparator
 
-    def __init__(self, return_type: Literal["smiles", "bytes", "mol"] = "smiles"):
+    def __init__(
+        self,
+        return_type: Literal["smiles", "bytes", "mol"] = "smiles",
+        validate: ValidationMode = "client",
+    ):
         """Initialize the RdkitReaction type.
 
         Parameters
         ----------
         return_type : Literal["smiles", "bytes", "mol"], default "smiles"
             The format in which to return reaction data from the database.
+        validate : Literal["client", "server", "none"], default "client"
+            Where input reactions are validated.
         """
+        _check_validate(validate)
         super().__init__()
         self.return_type = return_type
+        self.validate = validate
 
     def __repr__(self):
+        if self.validate != "client":
+            return f"RdkitReaction(return_type={self.return_type!r}, validate={self.validate!r})"
         return f"RdkitReaction(return_type={self.return_type!r})"
 
     def bind_processor(self, dialect):
         del dialect
+        if self.validate != "client":
+            return self._text_bind_processor()
 
         def process(value):
             if value is None:
@@ -198,7 +436,23 @@ class RdkitReaction(RdkitBaseType):
 
         return process
 
+    def _text_bind_processor(self):
+        def process(value):
+            if value is None or isinstance(value, str):
+                return value
+            if isinstance(value, rdChemReactions.ChemicalReaction):
+                return rdChemReactions.ReactionToSmiles(value)
+            raise InvalidReactionError(
+                f"Value must be a reaction SMILES string or a ChemicalReaction object when validate={self.validate!r}"
+            )
+
+        return process
+
     def bind_expression(self, bindvalue):
+        if self.validate == "server":
+            return cast(bindvalue, self)
+        if self.validate == "none":
+            return func.reaction_from_smiles(cast(bindvalue, CString))
         return func.reaction_from_smarts(bindvalue)
 
     def column_expression(self, colexpr):
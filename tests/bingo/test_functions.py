@@ -5,10 +5,17 @@ from sqlalchemy import (
     BinaryExpression,
     Column,
     Function,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    and_,
+    select,
 )
+from sqlalchemy.dialects import postgresql
 
 from molalchemy.bingo import functions as bingo_func
-from molalchemy.bingo.types import BingoMol
+from molalchemy.bingo.types import BingoMol, BingoReaction
 
 all_funcs = bingo_func.__all__
 
@@ -25,3 +32,80 @@ def test_any_function_returns_function_object(func):
         except AttributeError:
             result = func(*random_columns[: func.__code__.co_argcount])
             assert isinstance(result, BinaryExpression)
+
+
+class TestSearchFunctions:
+    """Test that the search functions bind their queries."""
+
+    def setup_method(self):
+        self.table = Table(
+            "compounds",
+            MetaData(),
+            Column("id", Integer, primary_key=True),
+            Column("structure", BingoMol()),
+            Column("reaction", BingoReaction()),
+            Column("query", String),
+        )
+
+    def compile(self, expr):
+        return expr.compile(dialect=postgresql.psycopg.dialect())
+
+    @pytest.mark.parametrize(
+        ("func", "column", "bingo_type"),
+        [
+            (bingo_func.has_substructure, "structure", "sub"),
+            (bingo_func.matches_smarts, "structure", "smarts"),
+            (bingo_func.mol_equals, "structure", "exact"),
+            (bingo_func.has_reaction_substructure, "reaction", "rsub"),
+            (bingo_func.matches_reaction_smarts, "reaction", "rsmarts"),
+            (bingo_func.reaction_equals, "reaction", "rexact"),
+        ],
+    )
+    def test_query_is_bound(self, func, column, bingo_type):
+        compiled = self.compile(func(self.table.c[column], "C'C", "TAU"))
+        assert str(compiled) == (
+            f"compounds.{column} @ (%(query_1)s::VARCHAR, "
+            f"%(parameters_1)s::VARCHAR)::bingo.{bingo_type}"
+        )
+        assert compiled.params == {"query_1": "C'C", "parameters_1": "TAU"}
+
+    def test_similarity_is_bound(self):
+        compiled = self.compile(
+            bingo_func.similarity(self.table.c.structure, "CCO", 0.7, 0.9, "Dice")
+        )
+        assert "::bingo.sim" in str(compiled)
+        assert compiled.params == {
+            "query_1": "CCO",
+            "bottom_1": 0.7,
+            "top_1": 0.9,
+            "metric_1": "Dice",
+        }
+
+    def test_distinct_queries_share_cache_key(self):
+        def stmt(query, threshold):
+            return select(self.table.c.id).where(
+                bingo_func.has_substructure(self.table.c.structure, query),
+                bingo_func.similarity(self.table.c.structure, query, threshold),
+            )
+
+        assert stmt("CCO", 0.5)._generate_cache_key() == stmt("c1ccccc1", 0.7)._generate_cache_key()
+        assert (
+            stmt("CCO", 0.5)._generate_cache_key()
+            != select(self.table.c.id)
+            .where(bingo_func.matches_smarts(self.table.c.structure, "CCO"))
+            ._generate_cache_key()
+        )
+
+    def test_multiple_searches_in_one_statement(self):
+        compiled = self.compile(
+            and_(
+                self.table.c.structure.has_substructure("CC"),
+                self.table.c.structure.has_substructure("CCO"),
+            )
+        )
+        assert compiled.params["query_1"] == "CC"
+        assert compiled.params["query_2"] == "CCO"
+
+    def test_column_query(self):
+        sql = str(self.compile(bingo_func.has_substructure(self.table.c.structure, self.table.c.query)))
+        assert sql == "compounds.structure @ (compounds.query, %(parameters_1)s::VARCHAR)::bingo.sub"
@@ -0,0 +1,104 @@
+"""Tests for streaming Bingo structure search."""
+
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import Column, Integer, MetaData, Table
+from sqlalchemy.dialects import postgresql
+
+from molalchemy.bingo.search import build_screen, build_search, screen, stream_search
+from molalchemy.bingo.types import BingoMol
+
+
+@pytest.fixture
+def molecules():
+    return Table(
+        "molecules",
+        MetaData(),
+        Column("id", Integer, primary_key=True),
+        Column("mol", BingoMol()),
+    )
+
+
+class TestBuildSearch:
+    @pytest.mark.parametrize(
+        ("search", "bingo_type"),
+        [("substructure", "bingo.sub"), ("smarts", "bingo.smarts"), ("exact", "bingo.exact")],
+    )
+    def test_search_types(self, molecules, search, bingo_type):
+        stmt = build_search(molecules.c.mol, "c1ccccc1", search=search)
+        compiled = str(stmt.compile(compile_kwargs={"literal_binds": True}))
+        assert bingo_type in compiled
+        assert "c1ccccc1" in compiled
+
+    def test_rejects_unknown_search(self, molecules):
+        with pytest.raises(ValueError, match="Invalid search"):
+            build_search(molecules.c.mol, "c1ccccc1", search="similarity")
+
+
+class TestStreamSearch:
+    def test_exported_from_package(self):
+        from molalchemy import bingo
+
+        assert bingo.stream_search is stream_search
+
+    def test_streams_rows_with_extra_columns(self, molecules):
+        connection = MagicMock()
+        result = MagicMock()
+        result.__iter__.return_value = iter([("CCO", 1)])
+        connection.execute.return_value = result
+
+        hits = list(
+            stream_search(
+                connection, molecules.c.mol, "CC", extra_columns=[molecules.c.id]
+            )
+        )
+
+        assert hits == [("CCO", 1)]
+        stmt = connection.execute.call_args.args[0]
+        assert stmt.get_execution_options()["stream_results"] is True
+        result.close.assert_called_once()
+
+
+class TestScreen:
+    @pytest.mark.parametrize(
+        ("search", "bingo_type"), [("smarts", "bingo.smarts"), ("substructure", "bingo.sub")]
+    )
+    def test_single_statement(self, molecules, search, bingo_type):
+        stmt = build_screen(
+            molecules.c.mol, molecules.c.id, ["[OH]", "c1ccccc1"], search=search, parameters="TAU"
+        )
+        compiled = stmt.compile(dialect=postgresql.psycopg.dialect())
+        sql = str(compiled)
+
+        assert sql.startswith("SELECT anon_1.idx - %(idx_1)s::INTEGER AS query_idx, molecules.id")
+        assert "unnest(%(patterns_1)s::TEXT[]) WITH ORDINALITY AS anon_1(value, idx), molecules" in sql
+        assert f"molecules.mol @ (anon_1.value, %(parameters_1)s::VARCHAR)::{bingo_type}" in sql
+        assert compiled.params["patterns_1"] == ["[OH]", "c1ccccc1"]
+        assert compiled.params["parameters_1"] == "TAU"
+
+    def test_candidate_keys(self, molecules):
+        stmt = build_screen(molecules.c.mol, molecules.c.id, ["[OH]"], keys=range(3))
+        compiled = stmt.compile(dialect=postgresql.psycopg.dialect())
+        assert "molecules.id = ANY (%(keys_1)s::INTEGER[])" in str(compiled)
+        assert compiled.params["keys_1"] == [0, 1, 2]
+
+    def test_rejects_invalid_arguments(self, molecules):
+        with pytest.raises(ValueError, match="No patterns"):
+            build_screen(molecules.c.mol, molecules.c.id, [])
+        with pytest.raises(ValueError, match="Invalid search"):
+            build_screen(molecules.c.mol, molecules.c.id, ["C"], search="exact")
+
+    def test_streams_pairs(self, molecules):
+        connection = MagicMock()
+        result = MagicMock()
+        result.__iter__.return_value = iter([(0, 1), (1, 1)])
+        connection.execute.return_value = result
+
+        assert list(screen(connection, molecules.c.mol, molecules.c.id, ["C", "O"])) == [
+            (0, 1),
+            (1, 1),
+        ]
+        stmt = connection.execute.call_args.args[0]
+        assert stmt.get_execution_options()["yield_per"] == 10_000
+        result.close.assert_called_once()
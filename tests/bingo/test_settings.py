@@ -0,0 +1,212 @@
+"""Tests for Bingo settings helpers."""
+
+import asyncio
+import typing
+from unittest.mock import AsyncMock, MagicMock, Mock, call
+
+import psycopg.errors
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+
+from molalchemy.bingo.settings import (
+    BingoSettings,
+    aget_bingo_settings,
+    get_bingo_settings,
+    search_timeout,
+    set_bingo_settings,
+)
+from molalchemy.exceptions import SearchTimeoutError
+
+
+class TestSearchTimeout:
+    def test_timeout_raises_typed_error(self):
+        session = Mock()
+        session.execute.return_value.scalar_one.return_value = "0"
+        error = OperationalError(
+            "SELECT 1",
+            {},
+            psycopg.errors.QueryCanceled(
+                "canceling statement due to statement timeout"
+            ),
+        )
+
+        with pytest.raises(SearchTimeoutError):
+            with search_timeout(session, 0.5):
+                raise error
+
+        assert session.execute.call_args[0][1]["value"] == "500"
+
+
+def config_session(*values):
+    """A mock session whose `getConfigInt` query returns `values`."""
+    session = Mock()
+    session.execute.return_value.one.return_value = values
+    return session
+
+
+class TestBingoSettings:
+    def test_config_uses_bingo_keys(self):
+        settings = BingoSettings(timeout=5000, fp_sim_size=8, ignore_bad_valence=True)
+
+        assert settings.config() == {
+            "timeout": 5000,
+            "FP_SIM_SIZE": 8,
+            "ignore_bad_valence": 1,
+        }
+
+    @pytest.mark.parametrize(
+        ("kwargs", "error"),
+        [
+            ({"timeout": 0}, ValueError),
+            ({"fp_ord_size": 1.5}, TypeError),
+            ({"timeout": True}, TypeError),
+            ({"treat_x_as_pseudoatom": 1}, TypeError),
+        ],
+    )
+    def test_validation(self, kwargs, error):
+        with pytest.raises(error):
+            BingoSettings(**kwargs)
+
+    def test_nthreads_may_be_negative(self):
+        assert BingoSettings(nthreads=-1).config() == {"nthreads": -1}
+
+    def test_get_reads_in_one_query(self):
+        session = config_session(60000, 0)
+
+        settings = get_bingo_settings(session, "timeout", "reject_invalid_structures")
+
+        assert settings == BingoSettings(timeout=60000, reject_invalid_structures=False)
+        statement, params = session.execute.call_args[0]
+        assert str(statement).count("bingo.getConfigInt") == 2
+        assert params == {"key_0": "timeout", "key_1": "reject_invalid_structures"}
+
+    def test_flags_round_trip_as_bool(self):
+        hints = typing.get_type_hints(BingoSettings)
+        flags = [name for name, hint in hints.items() if hint == bool | None]
+        assert len(flags) == 10
+        session = config_session(*[1] * len(flags))
+
+        settings = get_bingo_settings(session, *flags)
+
+        assert settings == BingoSettings(**dict.fromkeys(flags, True))
+        assert all(type(getattr(settings, name)) is bool for name in flags)
+        assert settings.config() == dict.fromkeys(flags, 1)
+
+    def test_get_unknown_setting(self):
+        with pytest.raises(ValueError, match="Unknown Bingo settings"):
+            get_bingo_settings(Mock(), "tanimoto_threshold")
+
+    def test_set_writes_in_one_statement(self):
+        session = Mock()
+
+        set_bingo_settings(
+            session, BingoSettings(timeout=100, sub_screening_max_bits=8)
+        )
+
+        statement, params = session.execute.call_args[0]
+        assert str(statement).count("bingo.setConfigInt") == 2
+        assert params == {
+            "key_0": "timeout",
+            "value_0": 100,
+            "key_1": "SUB_SCREENING_MAX_BITS",
+            "value_1": 8,
+        }
+
+    def test_set_nothing(self):
+        session = Mock()
+
+        set_bingo_settings(session, BingoSettings())
+
+        session.execute.assert_not_called()
+
+    def test_async_get(self):
+        session = AsyncMock()
+        session.execute.return_value = Mock()
+        session.execute.return_value.one.return_value = (30000,)
+
+        settings = asyncio.run(aget_bingo_settings(session, "timeout"))
+
+        assert settings.timeout == 30000
+
+
+class TestOverride:
+    def test_restores_previous_values(self):
+        session = config_session(60000)
+
+        with BingoSettings(timeout=5000).override(session):
+            assert session.execute.call_args[0][1] == {
+                "key_0": "timeout",
+                "value_0": 5000,
+            }
+
+        assert session.execute.call_count == 3
+        assert session.execute.call_args[0][1] == {"key_0": "timeout", "value_0": 60000}
+
+    def test_restores_after_python_error(self):
+        session = config_session(60000)
+
+        with pytest.raises(KeyError):
+            with BingoSettings(timeout=5000).override(session):
+                raise KeyError
+
+        assert session.execute.call_args[0][1]["value_0"] == 60000
+
+    def test_no_restore_after_database_error(self):
+        session = config_session(60000)
+
+        with pytest.raises(OperationalError):
+            with BingoSettings(timeout=5000).override(session):
+                raise OperationalError("SELECT 1", {}, Exception())
+
+        assert session.execute.call_count == 2
+
+    def test_async(self):
+        session = AsyncMock()
+        session.execute.return_value = Mock()
+        session.execute.return_value.one.return_value = (60000,)
+
+        async def run():
+            async with BingoSettings(timeout=5000).override(session):
+                pass
+
+        asyncio.run(run())
+
+        assert session.execute.await_count == 3
+
+
+class TestApply:
+    def listener(self, settings):
+        engine = create_engine("sqlite://")
+        settings.apply(engine)
+        return list(engine.pool.dispatch.connect)[-1]
+
+    def test_writes_differing_settings(self):
+        on_connect = self.listener(BingoSettings(timeout=5000, fp_sim_size=8))
+        dbapi_connection = MagicMock()
+        cursor = dbapi_connection.cursor.return_value
+        cursor.fetchone.return_value = (60000, 8)
+
+        on_connect(dbapi_connection, Mock())
+
+        assert cursor.execute.call_args_list == [
+            call(
+                "SELECT bingo.getConfigInt('timeout'), "
+                "bingo.getConfigInt('FP_SIM_SIZE')"
+            ),
+            call(
+                "SELECT bingo.setConfigInt('timeout', 5000), "
+                "bingo.setConfigInt('FP_SIM_SIZE', 8)"
+            ),
+        ]
+        dbapi_connection.commit.assert_called_once_with()
+
+    def test_skips_write_when_unchanged(self):
+        on_connect = self.listener(BingoSettings(timeout=5000))
+        dbapi_connection = MagicMock()
+        cursor = dbapi_connection.cursor.return_value
+        cursor.fetchone.return_value = (5000,)
+
+        on_connect(dbapi_connection, Mock())
+
+        cursor.execute.assert_called_once()
@@ -1,5 +1,6 @@
 """Tests for RDKit comparators."""
 
+import pytest
 from sqlalchemy import Column, ColumnElement, Integer, MetaData, String, Table
 from sqlalchemy.sql import select
 
@@ -172,6 +173,13 @@ class TestRdkitFPComparator:
         assert ":sparse_fp_" in tanimoto_compiled
         assert ":sparse_fp_" in dice_compiled
 
+    def test_explicit_threshold_without_popcount_column(self):
+        """Test that an explicit threshold is refused when no index could serve it."""
+        with pytest.raises(ValueError, match="No popcount column"):
+            self.fp_column.tanimoto(b"\x01", threshold=0.7)
+        with pytest.raises(ValueError, match="No popcount column"):
+            self.sparse_fp_column.dice(b"\x01", threshold=0.5)
+
 
 class TestComparatorReturnTypes:
     """Test that comparator methods return properly typed expressions."""
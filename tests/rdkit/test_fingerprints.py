@@ -0,0 +1,227 @@
+"""Tests for batch fingerprint helpers."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from rdkit import Chem, DataStructs
+from rdkit.Chem import AllChem, MACCSkeys, rdMolDescriptors
+from sqlalchemy import Column, Integer, MetaData, Table, event, insert
+from sqlalchemy.engine.result import IteratorResult, SimpleResultMetaData
+from sqlalchemy.orm import (
+    DeclarativeBase,
+    Mapped,
+    Session,
+    make_transient_to_detached,
+    mapped_column,
+)
+
+from molalchemy.exceptions import InvalidMoleculeError
+from molalchemy.rdkit.fingerprints import (
+    FingerprintComputer,
+    FingerprintSpec,
+    compute_fingerprints,
+    derived_fingerprint,
+    derived_fingerprints,
+    fingerprints_to_array,
+)
+from molalchemy.rdkit.types import RdkitBitFingerprint, RdkitMol
+
+
+class TestFingerprintsToArray:
+    def test_builds_contiguous_matrix(self):
+        values = [b"\x01\x00", memoryview(b"\xff\x80"), b"\x00\x01"]
+
+        array = fingerprints_to_array(values)
+
+        assert array.shape == (3, 2)
+        assert array.dtype == np.uint8
+        assert array.flags["C_CONTIGUOUS"]
+        assert array.tolist() == [[1, 0], [255, 128], [0, 1]]
+
+    def test_reads_result_scalars(self):
+        result = IteratorResult(
+            SimpleResultMetaData(["fp", "id"]), iter([(b"\x01", 1), (b"\x02", 2)])
+        )
+        assert fingerprints_to_array(result).tolist() == [[1], [2]]
+
+    def test_empty(self):
+        assert fingerprints_to_array([]).shape == (0, 0)
+
+    def test_rejects_mixed_lengths(self):
+        with pytest.raises(ValueError, match="row 1 has 1 bytes, expected 2"):
+            fingerprints_to_array([b"\x00\x00", b"\x00"])
+
+    def test_rejects_nulls(self):
+        with pytest.raises(ValueError, match="row 0 is NULL"):
+            fingerprints_to_array([None])
+
+
+@pytest.fixture
+def mols():
+    smiles = ["c1ccccc1O", "CC(=O)Nc1ccc(O)cc1", "C[C@H](N)C(=O)O", "CCN(CC)CC"]
+    return [Chem.MolFromSmiles(s) for s in smiles]
+
+
+def cartridge_fingerprint(kind, mol):
+    """The functions the cartridge uses, with its default sizes."""
+    if kind == "morgan":
+        return AllChem.GetMorganFingerprintAsBitVect(mol, 2, nBits=512)
+    if kind == "featmorgan":
+        return AllChem.GetMorganFingerprintAsBitVect(
+            mol, 2, nBits=512, useFeatures=True
+        )
+    if kind == "rdkit":
+        return Chem.RDKFingerprint(mol, minPath=1, maxPath=6, fpSize=1024, nBitsPerHash=2)
+    if kind == "maccs":
+        return MACCSkeys.GenMACCSKeys(mol)
+    if kind == "atompair":
+        return rdMolDescriptors.GetHashedAtomPairFingerprintAsBitVect(mol, nBits=2048)
+    return rdMolDescriptors.GetHashedTopologicalTorsionFingerprintAsBitVect(
+        mol, nBits=1024
+    )
+
+
+class TestFingerprintSpec:
+    @pytest.mark.parametrize(
+        "kind", ["morgan", "featmorgan", "rdkit", "maccs", "atompair", "torsion"]
+    )
+    def test_matches_cartridge_functions(self, mols, kind):
+        spec = FingerprintSpec("mol", kind)
+        for mol in mols:
+            expected = DataStructs.BitVectToBinaryText(cartridge_fingerprint(kind, mol))
+            assert spec.compute(mol) == expected
+
+    def test_custom_size(self, mols):
+        spec = FingerprintSpec("mol", "morgan", radius=3, nbits=2048)
+        assert len(spec.compute(mols[0])) == 256
+
+    def test_derived_fingerprint_info(self):
+        table = Table(
+            "molecules",
+            MetaData(),
+            Column("id", Integer, primary_key=True),
+            Column("mol", RdkitMol()),
+            Column("fp", RdkitBitFingerprint(), info=derived_fingerprint("mol", nbits=1024)),
+            Column("other_fp", RdkitBitFingerprint()),
+        )
+        assert derived_fingerprints(table) == {
+            "fp": FingerprintSpec("mol", "morgan", 2, 1024)
+        }
+
+    def test_derived_fingerprint_validation(self):
+        with pytest.raises(ValueError, match="167 bits"):
+            derived_fingerprint("mol", "maccs", nbits=1024)
+        with pytest.raises(ValueError, match="Invalid fingerprint kind"):
+            derived_fingerprint("mol", "ecfp")
+
+
+class TestComputeFingerprints:
+    def test_inputs_and_order(self, mols):
+        spec = FingerprintSpec("mol", "maccs")
+        values = [mols[0], Chem.MolToSmiles(mols[1]), mols[2].ToBinary(), None]
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            fps = compute_fingerprints(values, [spec], executor=executor, chunksize=1)
+        assert fps[:3] == [(spec.compute(mol),) for mol in mols[:3]]
+        assert fps[3] == (None,)
+
+    def test_invalid_smiles_reports_row(self):
+        with pytest.raises(InvalidMoleculeError, match="at row 2"):
+            compute_fingerprints(
+                ["C", "CC", "C1CC"], [FingerprintSpec("mol")], chunksize=2
+            )
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+class Molecule(Base):
+    __tablename__ = "molecules"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    mol: Mapped[str] = mapped_column(RdkitMol())
+    fp: Mapped[bytes | None] = mapped_column(
+        RdkitBitFingerprint(), info=derived_fingerprint("mol", "morgan")
+    )
+    maccs: Mapped[bytes | None] = mapped_column(
+        RdkitBitFingerprint(), info=derived_fingerprint("mol", "maccs")
+    )
+
+
+class TestFingerprintComputer:
+    def test_process_rows(self):
+        computer = FingerprintComputer(min_batch_size=100)
+        rows = [{"id": 1, "mol": "CCO"}, {"id": 2, "mol": None}]
+
+        processed = computer.process_rows(Molecule.__table__, rows)
+
+        mol = Chem.MolFromSmiles("CCO")
+        assert processed[0]["fp"] == FingerprintSpec("mol", "morgan").compute(mol)
+        assert processed[0]["maccs"] == FingerprintSpec("mol", "maccs").compute(mol)
+        assert processed[1]["fp"] is None
+        assert "fp" not in rows[0]
+
+    def test_process_rows_keeps_given_fingerprints(self):
+        computer = FingerprintComputer()
+        processed = computer.process_rows(
+            Molecule.__table__, [{"mol": "CCO", "fp": b"\x00", "maccs": b"\x01"}]
+        )
+        assert processed == [{"mol": "CCO", "fp": b"\x00", "maccs": b"\x01"}]
+
+    def test_process_rows_mixed_batch(self):
+        computer = FingerprintComputer()
+        rows = [
+            {"id": 1},
+            {"mol": "CCO", "fp": b"\x00"},
+            {"mol": "c1ccccc1"},
+        ]
+
+        processed = computer.process_rows(Molecule.__table__, rows)
+
+        benzene = Chem.MolFromSmiles("c1ccccc1")
+        assert processed[0] == {"id": 1}
+        assert processed[1]["fp"] == b"\x00"
+        assert processed[1]["maccs"] is not None
+        assert processed[2]["fp"] == FingerprintSpec("mol", "morgan").compute(benzene)
+        assert processed[2]["maccs"] == FingerprintSpec("mol", "maccs").compute(benzene)
+
+    def test_before_execute_fills_inserts(self):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            computer = FingerprintComputer(executor=executor, min_batch_size=1)
+            _, multiparams, _ = computer._before_execute(
+                None, insert(Molecule), [{"mol": "CCO"}], {}, {}
+            )
+        assert multiparams[0]["fp"] is not None
+
+    def test_before_flush_fills_new_and_changed_objects(self):
+        session = Session()
+        new = Molecule(id=1, mol="CCO")
+        given = Molecule(id=2, mol="CCN", fp=b"\x00")
+        changed = Molecule(id=3, mol="CCC", fp=b"\x00", maccs=b"\x00")
+        make_transient_to_detached(changed)
+        unchanged = Molecule(id=4, mol="CCCC", fp=b"\x00", maccs=b"\x00")
+        make_transient_to_detached(unchanged)
+        session.add_all([new, given, changed, unchanged])
+        changed.mol = "c1ccccc1"
+        unchanged.maccs = b"\x01"
+
+        FingerprintComputer()._before_flush(session, None, None)
+
+        morgan = FingerprintSpec("mol", "morgan")
+        assert new.fp == morgan.compute(Chem.MolFromSmiles("CCO"))
+        assert given.fp == b"\x00"
+        assert given.maccs is not None
+        assert changed.fp == morgan.compute(Chem.MolFromSmiles("c1ccccc1"))
+        assert unchanged.fp == b"\x00"
+
+    def test_attach_to_session_class(self):
+        computer = FingerprintComputer()
+
+        class MySession(Session):
+            pass
+
+        computer.attach(MySession)
+        assert event.contains(MySession, "before_flush", computer._before_flush)
+        computer.detach(MySession)
+        assert not event.contains(MySession, "before_flush", computer._before_flush)
@@ -0,0 +1,240 @@
+"""Tests for the in-process fingerprint similarity index."""
+
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+from rdkit import Chem, DataStructs
+from rdkit.Chem import rdFingerprintGenerator
+from sqlalchemy import Column, Integer, MetaData, Table
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine.result import IteratorResult, SimpleResultMetaData
+
+from molalchemy.rdkit.fpindex import FingerprintIndex
+from molalchemy.rdkit.types import RdkitBitFingerprint
+
+
+@pytest.fixture
+def fingerprints():
+    rng = np.random.default_rng(42)
+    # Sparse random fingerprints with varied popcounts
+    bits = rng.random((500, 128)) < rng.uniform(0.05, 0.4, size=(500, 1))
+    return np.packbits(bits, axis=1, bitorder="little")
+
+
+def brute_force(fingerprints, query, metric):
+    bits = np.unpackbits(fingerprints, axis=1, bitorder="little").astype(int)
+    q = np.unpackbits(query, bitorder="little").astype(int)
+    common = bits @ q
+    a, b = q.sum(), bits.sum(axis=1)
+    if metric == "tanimoto":
+        return common / (a + b - common)
+    return 2 * common / (a + b)
+
+
+@pytest.fixture
+def table():
+    return Table(
+        "molecules",
+        MetaData(),
+        Column("id", Integer, primary_key=True),
+        Column("fp", RdkitBitFingerprint()),
+    )
+
+
+def make_connection(rows):
+    connection = MagicMock()
+    connection.execute.side_effect = lambda stmt: IteratorResult(
+        SimpleResultMetaData(["id", "fp"]), iter(rows)
+    )
+    return connection
+
+
+class TestSearch:
+    @pytest.mark.parametrize("metric", ["tanimoto", "dice"])
+    @pytest.mark.parametrize("k", [1, 5, 50])
+    def test_matches_brute_force(self, fingerprints, metric, k):
+        keys = np.arange(1000, 1000 + len(fingerprints))
+        index = FingerprintIndex.from_arrays(keys, fingerprints)
+
+        for query in fingerprints[:20]:
+            hits = index.search(query.tobytes(), k=k, metric=metric)
+            expected = np.sort(brute_force(fingerprints, query, metric))[::-1][:k]
+            np.testing.assert_allclose(hits.scores, expected)
+            scores = brute_force(fingerprints, query, metric)
+            np.testing.assert_allclose(scores[hits.keys - 1000], hits.scores)
+
+    def test_threshold(self, fingerprints):
+        index = FingerprintIndex.from_arrays(np.arange(len(fingerprints)), fingerprints)
+        hits = index.search(fingerprints[0], k=1000, threshold=0.3)
+        expected = brute_force(fingerprints, fingerprints[0], "tanimoto")
+        assert sorted(hits.keys.tolist()) == np.flatnonzero(expected >= 0.3).tolist()
+
+    def test_segments_give_same_hits(self, fingerprints):
+        keys = np.arange(len(fingerprints))
+        single = FingerprintIndex.from_arrays(keys, fingerprints)
+        segmented = FingerprintIndex.from_arrays(keys[:200], fingerprints[:200])
+        segmented.add(keys[200:], fingerprints[200:])
+
+        assert segmented.n_segments == 2
+        query = fingerprints[300]
+        np.testing.assert_allclose(
+            segmented.search(query, k=10).scores, single.search(query, k=10).scores
+        )
+        segmented.compact()
+        assert segmented.n_segments == 1
+        assert len(segmented) == len(fingerprints)
+
+    def test_bitvect_query(self):
+        generator = rdFingerprintGenerator.GetMorganGenerator(fpSize=256)
+        fps = [generator.GetFingerprint(Chem.MolFromSmiles(s)) for s in ["CCO", "c1ccccc1O"]]
+        index = FingerprintIndex.from_arrays(
+            [1, 2],
+            np.array([np.frombuffer(DataStructs.BitVectToBinaryText(fp), np.uint8) for fp in fps]),
+        )
+
+        hits = index.search(fps[1], k=1)
+
+        assert hits.keys.tolist() == [2]
+        assert hits.scores.tolist() == [1.0]
+
+    def test_empty_query_has_no_hits(self, fingerprints):
+        index = FingerprintIndex.from_arrays(np.arange(len(fingerprints)), fingerprints)
+        hits = index.search(bytes(16))
+        assert len(hits.keys) == 0
+
+    def test_rejects_invalid_arguments(self, fingerprints):
+        index = FingerprintIndex.from_arrays(np.arange(len(fingerprints)), fingerprints)
+        with pytest.raises(ValueError, match="expected 16"):
+            index.search(bytes(8))
+        with pytest.raises(ValueError, match="Invalid metric"):
+            index.search(fingerprints[0], metric="cosine")
+        with pytest.raises(ValueError, match="k must be positive"):
+            index.search(fingerprints[0], k=0)
+
+
+class TestLoading:
+    def test_from_table_and_refresh(self, table, fingerprints):
+        rows = [(i, fingerprints[i].tobytes()) for i in range(10)]
+        index = FingerprintIndex.from_table(make_connection(rows), table.c.fp, table.c.id)
+        assert len(index) == 10
+
+        connection = make_connection([(10, fingerprints[10].tobytes())])
+        assert index.refresh(connection) == 1
+        assert index.n_segments == 2
+        assert index.search(fingerprints[10], k=1).keys.tolist() == [10]
+
+        stmt = connection.execute.call_args.args[0]
+        compiled = stmt.compile(dialect=postgresql.psycopg.dialect())
+        assert "bfp_to_binary_text(molecules.fp)" in str(compiled)
+        assert "molecules.id > %(id_1)s" in str(compiled)
+        assert compiled.params["id_1"] == 9
+        assert stmt.get_execution_options()["stream_results"] is True
+
+    def test_from_table_rejects_empty(self, table):
+        with pytest.raises(ValueError, match="No fingerprints"):
+            FingerprintIndex.from_table(make_connection([]), table.c.fp, table.c.id)
+
+    def test_refresh_requires_source(self, fingerprints):
+        index = FingerprintIndex.from_arrays([1], fingerprints[:1])
+        with pytest.raises(ValueError, match="from_table"):
+            index.refresh(MagicMock())
+
+
+class TestSnapshot:
+    @pytest.mark.parametrize("mmap", [True, False])
+    def test_round_trip(self, tmp_path, fingerprints, mmap):
+        keys = np.arange(1000, 1000 + len(fingerprints))
+        index = FingerprintIndex.from_arrays(keys, fingerprints)
+        path = index.save(tmp_path / "index.fps")
+
+        opened = FingerprintIndex.open_snapshot(path, mmap=mmap)
+
+        assert len(opened) == len(fingerprints)
+        assert opened.n_bytes == 16
+        assert isinstance(opened._segments[0].words.base, np.memmap) is mmap
+        for query in fingerprints[:5]:
+            expected = index.search(query, k=10)
+            hits = opened.search(query, k=10)
+            np.testing.assert_allclose(hits.scores, expected.scores)
+            assert hits.keys.dtype == keys.dtype
+
+    def test_increments(self, tmp_path, fingerprints):
+        keys = np.arange(len(fingerprints))
+        index = FingerprintIndex.from_arrays(keys[:300], fingerprints[:300])
+        path = tmp_path / "index.fps"
+        index.save(path)
+        assert index.save_increment() is None
+
+        index.add(keys[300:400], fingerprints[300:400])
+        assert index.save_increment() == tmp_path / "index.fps.1"
+        index.add(keys[400:], fingerprints[400:])
+        assert index.save_increment() == tmp_path / "index.fps.2"
+
+        opened = FingerprintIndex.open_snapshot(path)
+        assert opened.n_segments == 3
+        assert len(opened) == len(fingerprints)
+        assert opened.search(fingerprints[450], k=1).keys.tolist() == [450]
+
+        # Fingerprints added to an opened snapshot are appended to it
+        opened.add([1000], fingerprints[:1])
+        assert opened.save_increment() == tmp_path / "index.fps.3"
+
+    def test_save_replaces_increments(self, tmp_path, fingerprints):
+        index = FingerprintIndex.from_arrays([1], fingerprints[:1])
+        path = tmp_path / "index.fps"
+        index.save(path)
+        index.add([2], fingerprints[1:2])
+        index.save_increment()
+
+        FingerprintIndex.from_arrays([3], fingerprints[2:3]).save(path)
+
+        assert not (tmp_path / "index.fps.1").exists()
+        assert len(FingerprintIndex.open_snapshot(path)) == 1
+
+    def test_rejects_foreign_increment(self, tmp_path, fingerprints):
+        index = FingerprintIndex.from_arrays([1], fingerprints[:1])
+        index.save(tmp_path / "a.fps")
+        index.add([2], fingerprints[1:2])
+        index.save_increment()
+        FingerprintIndex.from_arrays([3], fingerprints[2:3]).save(tmp_path / "b.fps")
+        (tmp_path / "a.fps.1").rename(tmp_path / "b.fps.1")
+
+        with pytest.raises(ValueError, match="not append file 1"):
+            FingerprintIndex.open_snapshot(tmp_path / "b.fps")
+        with pytest.raises(ValueError, match="append file, not a snapshot"):
+            FingerprintIndex.open_snapshot(tmp_path / "b.fps.1")
+
+    def test_rejects_invalid_files(self, tmp_path, fingerprints):
+        path = FingerprintIndex.from_arrays([1, 2], fingerprints[:2]).save(
+            tmp_path / "index.fps"
+        )
+        data = path.read_bytes()
+
+        path.write_bytes(data[:-8])
+        with pytest.raises(ValueError, match="truncated"):
+            FingerprintIndex.open_snapshot(path)
+        path.write_bytes(data[:8] + (99).to_bytes(2, "little") + data[10:])
+        with pytest.raises(ValueError, match="version 99"):
+            FingerprintIndex.open_snapshot(path)
+        path.write_bytes(b"not a snapshot")
+        with pytest.raises(ValueError, match="not a fingerprint snapshot"):
+            FingerprintIndex.open_snapshot(path)
+
+    def test_rejects_invalid_saves(self, tmp_path, fingerprints):
+        with pytest.raises(ValueError, match="empty"):
+            FingerprintIndex(16).save(tmp_path / "index.fps")
+        with pytest.raises(ValueError, match="integer keys"):
+            FingerprintIndex.from_arrays(np.array(["a"], dtype=object), fingerprints[:1]).save(
+                tmp_path / "index.fps"
+            )
+        assert list(tmp_path.iterdir()) == []
+
+        index = FingerprintIndex.from_arrays([1], fingerprints[:1])
+        with pytest.raises(ValueError, match="save_increment"):
+            index.save_increment()
+        index.save(tmp_path / "index.fps")
+        index.add([2], fingerprints[1:2])
+        index.compact()
+        with pytest.raises(ValueError, match="compacted"):
+            index.save_increment()
@@ -0,0 +1,57 @@
+"""Tests for lazily unpickled RDKit molecules."""
+
+import pickle
+
+import pytest
+from rdkit import Chem
+
+from molalchemy.rdkit.lazy import LazyMol
+
+
+@pytest.fixture
+def payload():
+    return Chem.MolFromSmiles("c1ccccc1O").ToBinary()
+
+
+class TestLazyMol:
+    def test_from_payload(self, payload):
+        lazy = LazyMol.from_payload(payload + b"\x00Oc1ccccc1")
+        assert lazy.pickle == payload
+        assert lazy.smiles == "Oc1ccccc1"
+        assert not lazy.is_loaded
+
+    def test_mol_is_built_once(self, payload):
+        lazy = LazyMol(payload)
+        mol = lazy.mol
+        assert isinstance(mol, Chem.Mol)
+        assert lazy.is_loaded
+        assert lazy.mol is mol
+
+    def test_attribute_access_builds_mol(self, payload):
+        lazy = LazyMol(payload, "Oc1ccccc1")
+        assert lazy.GetNumAtoms() == 7
+        assert lazy.is_loaded
+
+    def test_smiles_without_payload_smiles(self, payload):
+        lazy = LazyMol(payload)
+        assert lazy.smiles == "Oc1ccccc1"
+
+    def test_private_attributes_are_not_delegated(self, payload):
+        with pytest.raises(AttributeError):
+            LazyMol(payload)._missing
+
+    def test_pickle_roundtrip(self, payload):
+        lazy = LazyMol(payload, "Oc1ccccc1")
+        lazy.GetNumAtoms()
+        restored = pickle.loads(pickle.dumps(lazy))
+        assert restored == lazy
+        assert restored.smiles == "Oc1ccccc1"
+        assert not restored.is_loaded
+
+    def test_uses_slots(self, payload):
+        with pytest.raises(AttributeError):
+            LazyMol(payload).extra = 1
+
+    def test_repr(self, payload):
+        assert repr(LazyMol(payload, "Oc1ccccc1")) == "LazyMol('Oc1ccccc1')"
+        assert repr(LazyMol(payload)) == "LazyMol()"
@@ -0,0 +1,147 @@
+"""Tests for parallel RdkitMol bind processing."""
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+from rdkit import Chem
+from sqlalchemy import Column, Integer, MetaData, String, Table, insert, select
+
+from molalchemy.exceptions import InvalidMoleculeError
+from molalchemy.rdkit.parallel import ParallelBinder, pickle_smiles
+from molalchemy.rdkit.types import RdkitMol
+
+SMILES = ["C", "CC", "CCO", "c1ccccc1", "CC(=O)O", "CCN", "C1CCCCC1"]
+
+
+@pytest.fixture
+def molecules():
+    return Table(
+        "molecules",
+        MetaData(),
+        Column("id", Integer, primary_key=True),
+        Column("name", String(100)),
+        Column("mol", RdkitMol()),
+    )
+
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        yield pool
+
+
+class TestPickleSmiles:
+    def test_preserves_order(self, executor):
+        pickles = pickle_smiles(SMILES, executor=executor, chunksize=2)
+        assert [Chem.MolToSmiles(Chem.Mol(p)) for p in pickles] == [
+            Chem.CanonSmiles(s) for s in SMILES
+        ]
+
+    def test_serial_without_executor(self):
+        pickles = pickle_smiles(SMILES, chunksize=3)
+        assert len(pickles) == len(SMILES)
+        assert all(isinstance(p, bytes) for p in pickles)
+
+    def test_process_pool(self):
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            pickles = pickle_smiles(SMILES, executor=pool, chunksize=2)
+        assert pickles == [Chem.MolFromSmiles(s).ToBinary() for s in SMILES]
+
+    def test_pickle_props(self):
+        all_props = int(Chem.PropertyPickleOptions.AllProps)
+        pickles = pickle_smiles(["CCO"], pickle_props=all_props)
+        assert pickles == [Chem.MolFromSmiles("CCO").ToBinary(all_props)]
+
+    def test_invalid_smiles_reports_row(self, executor):
+        values = [*SMILES, "not_a_smiles"]
+        with pytest.raises(InvalidMoleculeError, match="at row 7"):
+            pickle_smiles(values, executor=executor, chunksize=3)
+
+    def test_rejects_invalid_chunksize(self):
+        with pytest.raises(ValueError, match="chunksize"):
+            pickle_smiles(SMILES, chunksize=0)
+
+
+class TestParallelBinder:
+    def test_process_rows(self, molecules, executor):
+        binder = ParallelBinder(executor=executor, chunksize=2)
+        mol = Chem.MolFromSmiles("CCO")
+        rows = [{"name": s, "mol": s} for s in SMILES] + [{"name": "m", "mol": mol}]
+
+        processed = binder.process_rows(molecules, rows)
+
+        assert [r["name"] for r in processed] == [r["name"] for r in rows]
+        assert all(isinstance(r["mol"], bytes) for r in processed[:-1])
+        assert processed[-1]["mol"] is mol
+        # Input rows are not modified
+        assert rows[0]["mol"] == "C"
+
+    def test_process_rows_reports_batch_row(self, molecules, executor):
+        binder = ParallelBinder(executor=executor, chunksize=2)
+        rows = [{"mol": None}, {"mol": "CC"}, {"mol": "C1CC"}]
+
+        with pytest.raises(InvalidMoleculeError, match="at row 2"):
+            binder.process_rows(molecules, rows)
+
+    def test_process_rows_heterogeneous_batch(self, molecules, executor):
+        binder = ParallelBinder(executor=executor)
+        rows = [{"name": "a"}, {"name": "b", "mol": "CCO"}]
+
+        processed = binder.process_rows(molecules, rows)
+
+        assert processed[0] == {"name": "a"}
+        assert processed[1]["mol"] == Chem.MolFromSmiles("CCO").ToBinary()
+
+    def test_process_rows_skips_unvalidated_columns(self, executor):
+        table = Table(
+            "trusted",
+            MetaData(),
+            Column("id", Integer, primary_key=True),
+            Column("mol", RdkitMol(validate="none")),
+        )
+        binder = ParallelBinder(executor=executor)
+
+        processed = binder.process_rows(table, [{"mol": "CCO"}])
+
+        assert processed == [{"mol": "CCO"}]
+
+    def test_before_execute_processes_batches(self, molecules, executor):
+        binder = ParallelBinder(executor=executor, min_batch_size=2)
+        rows = [{"mol": s} for s in SMILES]
+
+        _, multiparams, _ = binder._before_execute(
+            None, insert(molecules), rows, {}, {}
+        )
+
+        assert all(isinstance(r["mol"], bytes) for r in multiparams)
+
+    def test_before_execute_skips_small_batches(self, molecules, executor):
+        binder = ParallelBinder(executor=executor, min_batch_size=100)
+        rows = [{"mol": s} for s in SMILES]
+
+        _, multiparams, _ = binder._before_execute(
+            None, insert(molecules), rows, {}, {}
+        )
+
+        assert multiparams is rows
+
+    def test_before_execute_skips_selects(self, molecules, executor):
+        binder = ParallelBinder(executor=executor, min_batch_size=1)
+        rows = [{"mol": s} for s in SMILES]
+
+        _, multiparams, _ = binder._before_execute(
+            None, select(molecules), rows, {}, {}
+        )
+
+        assert multiparams is rows
+
+    def test_close_keeps_external_executor(self, executor):
+        binder = ParallelBinder(executor=executor)
+        binder.close()
+        assert binder.executor is executor
+
+    def test_pickled_values_pass_bind_processor(self, molecules, executor):
+        binder = ParallelBinder(executor=executor)
+        processed = binder.process_rows(molecules, [{"mol": "CCO"}])
+        bind = RdkitMol().bind_processor(None)
+        assert bind(processed[0]["mol"]) == processed[0]["mol"]
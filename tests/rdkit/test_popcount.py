@@ -0,0 +1,152 @@
+"""Tests for popcount-bounded similarity filters."""
+
+import numpy as np
+import pytest
+from rdkit import DataStructs
+from sqlalchemy import Column, Integer, MetaData, Table, literal, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from molalchemy.rdkit import functions as rdkit_func
+from molalchemy.rdkit.popcount import (
+    find_popcount_column,
+    popcount_bounds,
+    popcount_column,
+    popcount_range,
+    similarity_filter,
+)
+from molalchemy.rdkit.types import RdkitBitFingerprint
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+class Molecule(Base):
+    __tablename__ = "molecules"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    fp: Mapped[bytes] = mapped_column(RdkitBitFingerprint())
+    fp_popcount: Mapped[int] = popcount_column("fp")
+
+
+def compile_stmt(stmt):
+    return stmt.compile(dialect=postgresql.psycopg.dialect())
+
+
+def similarity(metric, a, b, common):
+    if metric == "tanimoto":
+        return common / (a + b - common)
+    return 2 * common / (a + b)
+
+
+class TestPopcountColumn:
+    def test_ddl(self):
+        ddl = str(CreateTable(Molecule.__table__).compile(dialect=postgresql.dialect()))
+        assert (
+            "fp_popcount INTEGER GENERATED ALWAYS AS (bit_count(bfp_to_binary_text(fp))) STORED"
+            in ddl
+        )
+        (index,) = Molecule.__table__.indexes
+        assert str(CreateIndex(index).compile(dialect=postgresql.dialect())) == (
+            "CREATE INDEX ix_molecules_fp_popcount ON molecules (fp_popcount)"
+        )
+
+    def test_find_popcount_column(self):
+        assert find_popcount_column(Molecule.fp) is Molecule.__table__.c.fp_popcount
+        assert find_popcount_column(Molecule.__table__.c.fp) is not None
+        assert find_popcount_column(Molecule.id) is None
+
+    def test_named_column_in_table(self):
+        table = Table(
+            "fps",
+            MetaData(),
+            Column("fp", RdkitBitFingerprint()),
+            popcount_column("fp", "n_bits", index=False),
+        )
+        assert find_popcount_column(table.c.fp) is table.c.n_bits
+        assert not table.indexes
+
+
+class TestPopcountBounds:
+    @pytest.mark.parametrize("metric", ["tanimoto", "dice"])
+    @pytest.mark.parametrize("threshold", [0.3, 0.5, 0.7, 0.85, 1.0])
+    def test_bounds_are_exact(self, metric, threshold):
+        # The bounds keep every popcount that can reach the threshold, and no other
+        for a in range(1, 60):
+            lower, upper = popcount_bounds(a, threshold, metric)
+            reachable = [
+                b
+                for b in range(0, 400)
+                if similarity(metric, a, b, min(a, b)) >= threshold - 1e-12
+            ]
+            assert (lower, upper) == (min(reachable), max(reachable))
+
+    def test_rejects_invalid_arguments(self):
+        with pytest.raises(ValueError, match="threshold"):
+            popcount_bounds(10, 0)
+        with pytest.raises(ValueError, match="Invalid metric"):
+            popcount_bounds(10, 0.5, "cosine")
+
+
+class TestSimilarityFilter:
+    def test_query_value_bounds_computed_on_client(self):
+        fp = DataStructs.ExplicitBitVect(64)
+        for bit in range(10):
+            fp.SetBit(bit)
+
+        compiled = compile_stmt(
+            select(Molecule.id).where(Molecule.fp.tanimoto(fp, threshold=0.5))
+        )
+
+        assert "molecules.fp_popcount BETWEEN" in str(compiled)
+        assert "tanimoto_sml(molecules.fp, bfp_from_binary_text(" in str(compiled)
+        assert [compiled.params["fp_popcount_1"], compiled.params["fp_popcount_2"]] == [
+            5,
+            20,
+        ]
+
+    def test_query_expression_bounds_computed_on_server(self):
+        query = rdkit_func.morganbv_fp(literal("CCO"))
+        sql = str(compile_stmt(Molecule.fp.dice(query, threshold=0.5)))
+        assert "BETWEEN CAST(ceil(" in sql
+        assert "bit_count(bfp_to_binary_text(morganbv_fp(" in sql
+        assert "dice_sml(molecules.fp, morganbv_fp(" in sql
+
+    def test_query_expression_bounds_are_integers(self):
+        query = rdkit_func.morganbv_fp(literal("CCO"))
+        sql = str(compile_stmt(popcount_range(Molecule.fp, query, 0.7)))
+        assert sql.startswith("molecules.fp_popcount BETWEEN CAST(ceil(")
+        assert sql.count(") AS INTEGER)") == 2
+        assert "AND CAST(floor(" in sql
+
+    def test_numpy_query(self):
+        query = np.zeros(8, dtype=np.uint8)
+        query[0] = 0b111
+        compiled = compile_stmt(popcount_range(Molecule.fp, query, 1.0))
+        assert [compiled.params["fp_popcount_1"], compiled.params["fp_popcount_2"]] == [
+            3,
+            3,
+        ]
+
+    def test_without_popcount_column(self):
+        table = Table("fps", MetaData(), Column("fp", RdkitBitFingerprint()))
+        with pytest.raises(ValueError, match="No popcount column"):
+            similarity_filter(table.c.fp, b"\x01", 0.5)
+        with pytest.raises(ValueError, match="No popcount column"):
+            popcount_range(table.c.fp, b"\x01", 0.5)
+
+    def test_explicit_popcount_column(self):
+        table = Table(
+            "fps",
+            MetaData(),
+            Column("fp", RdkitBitFingerprint()),
+            Column("bits", Integer),
+        )
+        sql = str(
+            compile_stmt(
+                popcount_range(table.c.fp, b"\x03", 0.5, popcount=table.c.bits)
+            )
+        )
+        assert sql.startswith("fps.bits BETWEEN")
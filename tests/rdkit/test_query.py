@@ -0,0 +1,159 @@
+"""Tests for precompiled query molecules."""
+
+import pytest
+from rdkit import Chem
+from sqlalchemy import Column, Integer, MetaData, Table, select
+from sqlalchemy.dialects import postgresql
+
+from molalchemy.exceptions import InvalidMoleculeError
+from molalchemy.rdkit import Query
+from molalchemy.rdkit import functions as rdkit_func
+from molalchemy.rdkit import query as query_module
+from molalchemy.rdkit.types import RdkitMol
+
+
+@pytest.fixture
+def mol_column():
+    table = Table(
+        "molecules",
+        MetaData(),
+        Column("id", Integer, primary_key=True),
+        Column("structure", RdkitMol()),
+    )
+    return table.c.structure
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    query_module.set_query_cache_size(query_module._DEFAULT_CACHE_SIZE)
+    yield
+    query_module.set_query_cache_size(query_module._DEFAULT_CACHE_SIZE)
+
+
+def _compile(stmt):
+    return stmt.compile(dialect=postgresql.psycopg.dialect())
+
+
+class TestQuery:
+    def test_from_smarts_keeps_query_features(self):
+        query = Query.from_smarts("[c;H1]~[#7,#8]")
+
+        assert query.kind == "smarts"
+        assert query.text == "[c;H1]~[#7,#8]"
+        assert Chem.MolFromSmiles("c1ccncc1").HasSubstructMatch(query.mol)
+        assert not Chem.MolFromSmiles("CCC").HasSubstructMatch(query.mol)
+
+    def test_from_smiles(self):
+        query = Query.from_smiles("c1ccccc1")
+
+        assert query.kind == "smiles"
+        assert query.mol.GetNumAtoms() == 6
+
+    def test_from_mol(self):
+        query = Query.from_mol(Chem.MolFromSmarts("C=O"))
+
+        assert query.kind == "mol"
+        assert query.text is None
+        assert "bytes" in repr(query)
+
+    def test_from_mol_rejects_other_values(self):
+        with pytest.raises(InvalidMoleculeError):
+            Query.from_mol("C=O")
+
+    @pytest.mark.parametrize(
+        ("factory", "pattern"),
+        [
+            (Query.from_smarts, "[C"),
+            (Query.from_smiles, "C1CC"),
+            (Query.from_smarts, 42),
+        ],
+    )
+    def test_invalid_pattern_raises(self, factory, pattern):
+        with pytest.raises(InvalidMoleculeError):
+            factory(pattern)
+
+    def test_repr(self):
+        assert repr(Query.from_smarts("C=O")) == "Query.from_smarts('C=O')"
+
+    def test_equality_by_pickle(self):
+        assert Query.from_smiles("C=O") == Query.from_mol(Chem.MolFromSmiles("C=O"))
+        assert Query.from_smiles("C=O") != Query.from_smiles("C#N")
+        assert hash(Query.from_smiles("C=O")) == hash(
+            Query.from_mol(Chem.MolFromSmiles("C=O"))
+        )
+
+
+class TestQueryCache:
+    def test_repeated_patterns_hit_the_cache(self):
+        first = Query.from_smarts("[CX3]=[OX1]")
+        second = Query.from_smarts("[CX3]=[OX1]")
+
+        assert first is second
+        info = query_module.query_cache_info()
+        assert (info.hits, info.misses, info.currsize) == (1, 1, 1)
+
+    def test_smarts_and_smiles_are_cached_separately(self):
+        assert Query.from_smarts("CO").kind == "smarts"
+        assert Query.from_smiles("CO").kind == "smiles"
+        assert query_module.query_cache_info().currsize == 2
+
+    def test_invalid_patterns_are_not_cached(self):
+        with pytest.raises(InvalidMoleculeError):
+            Query.from_smarts("[C")
+        assert query_module.query_cache_info().currsize == 0
+
+    def test_size_bounded(self):
+        query_module.set_query_cache_size(2)
+        for smiles in ("C", "CC", "CCC"):
+            Query.from_smiles(smiles)
+
+        info = query_module.query_cache_info()
+        assert (info.maxsize, info.currsize, info.evictions) == (2, 2, 1)
+
+    def test_clear(self):
+        Query.from_smiles("C")
+        query_module.clear_query_cache()
+        assert query_module.query_cache_info().currsize == 0
+
+
+class TestQueryCompilation:
+    @pytest.mark.parametrize(
+        ("method", "operator"),
+        [("has_substructure", "@>"), ("is_substructure_of", "<@"), ("equals", "@=")],
+    )
+    def test_comparators_bind_pickle(self, mol_column, method, operator):
+        query = Query.from_smarts("C=O")
+
+        compiled = _compile(getattr(mol_column, method)(query))
+
+        assert f"molecules.structure {operator} mol_from_pkl(" in str(compiled)
+        assert list(compiled.params.values()) == [query.pickle]
+
+    def test_mol_has_substructure(self, mol_column):
+        query = Query.from_smarts("[cH]")
+
+        compiled = _compile(rdkit_func.mol_has_substructure(mol_column, query))
+
+        assert "@> mol_from_pkl(" in str(compiled)
+        assert list(compiled.params.values()) == [query.pickle]
+
+    def test_substruct_function(self, mol_column):
+        compiled = _compile(rdkit_func.substruct(mol_column, Query.from_smarts("C=O")))
+
+        assert "substruct(molecules.structure, mol_from_pkl(" in str(compiled)
+
+    def test_same_query_twice_gets_distinct_parameters(self, mol_column):
+        stmt = select(mol_column).where(
+            mol_column.has_substructure(Query.from_smarts("C=O")),
+            mol_column.has_substructure(Query.from_smarts("C#N")),
+        )
+
+        assert len(_compile(stmt).params) == 2
+
+    def test_statement_cache_key_ignores_pattern(self, mol_column):
+        def stmt(pattern):
+            return select(mol_column).where(
+                mol_column.has_substructure(Query.from_smarts(pattern))
+            )
+
+        assert stmt("C=O")._generate_cache_key() == stmt("C#N")._generate_cache_key()
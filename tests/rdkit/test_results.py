@@ -0,0 +1,65 @@
+"""Tests for thread-pool decoding of result sets."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from rdkit import Chem
+from rdkit.Chem import AllChem
+from sqlalchemy.engine.result import IteratorResult, SimpleResultMetaData
+
+from molalchemy.rdkit.results import decode_partitions, decode_rows
+
+SMILES = ["C", "CC", "CCO", "c1ccccc1", "CC(=O)O", "CCN", "C1CCCCC1"]
+
+
+def make_result(rows):
+    return IteratorResult(SimpleResultMetaData(["id", "mol"]), iter(rows))
+
+
+@pytest.fixture
+def rows():
+    return [
+        (i, memoryview(Chem.MolFromSmiles(s).ToBinary())) for i, s in enumerate(SMILES)
+    ]
+
+
+class TestDecodePartitions:
+    def test_decodes_by_name(self, rows):
+        partitions = list(
+            decode_partitions(make_result(rows), {"mol": "mol"}, size=3, chunksize=2)
+        )
+
+        assert [len(p) for p in partitions] == [3, 3, 1]
+        decoded = [row for p in partitions for row in p]
+        assert [row[0] for row in decoded] == list(range(len(SMILES)))
+        assert [Chem.MolToSmiles(row[1]) for row in decoded] == [
+            Chem.CanonSmiles(s) for s in SMILES
+        ]
+
+    def test_decodes_by_position_with_callable(self, rows):
+        decoded = list(
+            decode_rows(make_result(rows), {1: lambda v: len(v)}, size=2, prefetch=0)
+        )
+        assert decoded == [(i, len(v)) for i, v in rows]
+
+    def test_decodes_reactions_and_nulls(self):
+        rxn = AllChem.ReactionFromSmarts("[C:1](=O)[OH].[N:2]>>[C:1](=O)[N:2]")
+        result = make_result([(1, rxn.ToBinary()), (2, None)])
+
+        decoded = list(decode_rows(result, {"mol": "reaction"}))
+
+        assert decoded[0][1].GetNumReactantTemplates() == 2
+        assert decoded[1] == (2, None)
+
+    def test_external_executor_is_not_shut_down(self, rows):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            list(decode_rows(make_result(rows), {"mol": "mol"}, executor=executor))
+            assert executor.submit(int).result() == 0
+
+    def test_rejects_unknown_decoder(self, rows):
+        with pytest.raises(ValueError, match="Invalid decoder"):
+            next(decode_partitions(make_result(rows), {"mol": "smiles"}))
+
+    def test_rejects_invalid_chunksize(self, rows):
+        with pytest.raises(ValueError, match="chunksize"):
+            next(decode_partitions(make_result(rows), {"mol": "mol"}, chunksize=0))
@@ -0,0 +1,249 @@
+"""Tests for streaming RDKit structure search."""
+
+from unittest.mock import MagicMock
+
+import pytest
+from rdkit import Chem, DataStructs
+from sqlalchemy import Column, Integer, MetaData, String, Table
+from sqlalchemy.dialects import postgresql
+
+from molalchemy.exceptions import InvalidMoleculeError
+from molalchemy.rdkit import functions as rdkit_func
+from molalchemy.rdkit.fingerprints import FingerprintSpec, derived_fingerprint
+from molalchemy.rdkit.search import (
+    build_knn_search,
+    build_screen,
+    build_search,
+    knn_search,
+    screen,
+    stream_search,
+)
+from molalchemy.rdkit.types import RdkitBitFingerprint, RdkitMol
+
+
+@pytest.fixture
+def molecules():
+    return Table(
+        "molecules",
+        MetaData(),
+        Column("id", Integer, primary_key=True),
+        Column("name", String(100)),
+        Column("mol", RdkitMol()),
+        Column("fp", RdkitBitFingerprint()),
+        Column("mfp", RdkitBitFingerprint(), info=derived_fingerprint("mol", nbits=64)),
+    )
+
+
+def compile_stmt(stmt):
+    return str(stmt.compile(dialect=postgresql.psycopg.dialect()))
+
+
+class FakeResult:
+    def __init__(self, values):
+        self.values = values
+        self.closed = False
+
+    def scalars(self):
+        return iter(self.values)
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def close(self):
+        self.closed = True
+
+
+class TestBuildSearch:
+    @pytest.mark.parametrize(
+        ("search", "operator"),
+        [("substructure", "@>"), ("superstructure", "<@"), ("exact", "@=")],
+    )
+    def test_search_operators(self, molecules, search, operator):
+        compiled = compile_stmt(build_search(molecules.c.mol, "c1ccccc1", search=search))
+        assert f"molecules.mol {operator} mol_from_pkl(" in compiled
+
+    def test_decodes_with_return_type(self, molecules):
+        compiled = compile_stmt(build_search(molecules.c.mol, "c1ccccc1"))
+        assert compiled.startswith("SELECT mol_send(molecules.mol) AS mol")
+
+        compiled = compile_stmt(
+            build_search(molecules.c.mol, "c1ccccc1", return_type="smiles")
+        )
+        assert compiled.startswith("SELECT molecules.mol")
+
+    def test_extra_columns_and_limit(self, molecules):
+        stmt = build_search(
+            molecules.c.mol, "c1ccccc1", extra_columns=[molecules.c.id], limit=10
+        )
+        compiled = compile_stmt(stmt)
+        assert "molecules.id" in compiled
+        assert "LIMIT" in compiled
+
+    def test_rejects_unknown_search(self, molecules):
+        with pytest.raises(ValueError, match="Invalid search"):
+            build_search(molecules.c.mol, "c1ccccc1", search="similarity")
+
+
+class TestStreamSearch:
+    def test_exported_from_package(self):
+        from molalchemy import rdkit
+
+        assert rdkit.stream_search is stream_search
+
+    def test_uses_server_side_cursor(self, molecules):
+        connection = MagicMock()
+        connection.execute.return_value = FakeResult(["a", "b"])
+
+        hits = list(stream_search(connection, molecules.c.mol, "CC", fetch_size=50))
+
+        assert hits == ["a", "b"]
+        stmt = connection.execute.call_args.args[0]
+        options = stmt.get_execution_options()
+        assert options["stream_results"] is True
+        assert options["yield_per"] == 50
+        assert connection.execute.return_value.closed
+
+    def test_early_stop_closes_cursor(self, molecules):
+        connection = MagicMock()
+        result = FakeResult(["a", "b", "c"])
+        connection.execute.return_value = result
+
+        hits = stream_search(connection, molecules.c.mol, "CC")
+        assert next(hits) == "a"
+        hits.close()
+
+        assert result.closed
+
+    def test_rejects_invalid_fetch_size(self, molecules):
+        with pytest.raises(ValueError, match="fetch_size"):
+            next(stream_search(MagicMock(), molecules.c.mol, "CC", fetch_size=0))
+
+
+def compile_with_params(stmt):
+    return stmt.compile(dialect=postgresql.psycopg.dialect())
+
+
+class TestBuildKnnSearch:
+    def test_fingerprint_queries(self, molecules):
+        compiled = compile_with_params(
+            build_knn_search(molecules.c.fp, molecules.c.id, [b"\x01", b"\x02"], k=5)
+        )
+        sql = str(compiled)
+
+        assert sql.startswith(
+            "SELECT queries.idx - %(idx_1)s::INTEGER AS query_idx, hits.id, hits.similarity"
+        )
+        assert "unnest(%(knn_queries_1)s::BYTEA[]) WITH ORDINALITY AS anon_1(value, idx)" in sql
+        assert "bfp_from_binary_text(anon_1.value) AS fp" in sql
+        assert "JOIN LATERAL (SELECT molecules.id AS id, tanimoto_sml(molecules.fp, queries.fp)" in sql
+        assert "ORDER BY molecules.fp <%%> queries.fp" in sql
+        assert "ORDER BY queries.idx, hits.similarity DESC" in sql
+        assert compiled.params["knn_queries_1"] == [b"\x01", b"\x02"]
+        assert compiled.params["param_1"] == 5
+
+    def test_dice(self, molecules):
+        sql = str(
+            compile_with_params(
+                build_knn_search(molecules.c.fp, molecules.c.id, [b"\x01"], metric="dice")
+            )
+        )
+        assert "dice_sml(molecules.fp, queries.fp)" in sql
+        assert "ORDER BY molecules.fp <#> queries.fp" in sql
+
+    def test_bitvect_queries_are_packed(self, molecules):
+        fp = DataStructs.ExplicitBitVect(16)
+        fp.SetBit(3)
+        compiled = compile_with_params(build_knn_search(molecules.c.fp, molecules.c.id, [fp]))
+        assert compiled.params["knn_queries_1"] == [DataStructs.BitVectToBinaryText(fp)]
+
+    def test_molecule_queries_with_cartridge_function(self, molecules):
+        compiled = compile_with_params(
+            build_knn_search(
+                molecules.c.fp,
+                molecules.c.id,
+                ["CCO", Chem.MolFromSmiles("c1ccccc1")],
+                fingerprint=rdkit_func.morganbv_fp,
+            )
+        )
+        assert "morganbv_fp(mol_from_pkl(anon_1.value)" in str(compiled)
+        pickles = compiled.params["knn_queries_1"]
+        assert Chem.MolToSmiles(Chem.Mol(pickles[0])) == "CCO"
+
+    def test_molecule_queries_with_derived_fingerprint(self, molecules):
+        compiled = compile_with_params(
+            build_knn_search(molecules.c.mfp, molecules.c.id, ["CCO"])
+        )
+        expected = FingerprintSpec("mol", nbits=64).compute(Chem.MolFromSmiles("CCO"))
+        assert compiled.params["knn_queries_1"] == [expected]
+        assert "bfp_from_binary_text(anon_1.value) AS fp" in str(compiled)
+
+    def test_rejects_invalid_queries(self, molecules):
+        with pytest.raises(ValueError, match="require `fingerprint`"):
+            build_knn_search(molecules.c.fp, molecules.c.id, ["CCO"])
+        with pytest.raises(TypeError, match="all molecules or all fingerprints"):
+            build_knn_search(molecules.c.fp, molecules.c.id, ["CCO", b"\x01"])
+        with pytest.raises(InvalidMoleculeError):
+            build_knn_search(molecules.c.mfp, molecules.c.id, ["not a smiles"])
+        with pytest.raises(ValueError, match="No queries"):
+            build_knn_search(molecules.c.fp, molecules.c.id, [])
+        with pytest.raises(ValueError, match="k must be positive"):
+            build_knn_search(molecules.c.fp, molecules.c.id, [b"\x01"], k=0)
+        with pytest.raises(ValueError, match="Invalid metric"):
+            build_knn_search(molecules.c.fp, molecules.c.id, [b"\x01"], metric="cosine")
+
+
+class TestKnnSearch:
+    def test_streams_rows(self, molecules):
+        connection = MagicMock()
+        connection.execute.return_value = FakeResult([(0, 1, 1.0), (0, 7, 0.5)])
+
+        rows = list(knn_search(connection, molecules.c.fp, molecules.c.id, [b"\x01"], k=2))
+
+        assert rows == [(0, 1, 1.0), (0, 7, 0.5)]
+        stmt = connection.execute.call_args.args[0]
+        assert stmt.get_execution_options()["stream_results"] is True
+        assert connection.execute.return_value.closed
+
+
+class TestScreen:
+    @pytest.mark.parametrize(
+        ("pattern_type", "parser"), [("smarts", "qmol_from_smarts"), ("smiles", "qmol_from_smiles")]
+    )
+    def test_single_statement(self, molecules, pattern_type, parser):
+        compiled = compile_with_params(
+            build_screen(
+                molecules.c.mol, molecules.c.id, ["c1ccccc1", "CO"], pattern_type=pattern_type
+            )
+        )
+        sql = str(compiled)
+
+        assert sql.startswith("SELECT patterns.idx - %(idx_1)s::INTEGER AS query_idx, molecules.id")
+        assert f"{parser}(CAST(anon_1.value AS cstring)) AS qmol" in sql
+        assert "unnest(%(patterns_1)s::TEXT[]) WITH ORDINALITY AS anon_1(value, idx)" in sql
+        assert "WHERE molecules.mol @> patterns.qmol" in sql
+        assert sql.endswith("ORDER BY patterns.idx, molecules.id")
+        assert compiled.params["patterns_1"] == ["c1ccccc1", "CO"]
+
+    def test_candidate_keys(self, molecules):
+        compiled = compile_with_params(
+            build_screen(molecules.c.mol, molecules.c.id, ["[OH]"], keys=[5, 7])
+        )
+        assert "molecules.id = ANY (%(keys_1)s::INTEGER[])" in str(compiled)
+        assert compiled.params["keys_1"] == [5, 7]
+
+    def test_rejects_invalid_patterns(self, molecules):
+        with pytest.raises(InvalidMoleculeError, match="Pattern 1"):
+            build_screen(molecules.c.mol, molecules.c.id, ["[OH]", "[invalid"])
+        with pytest.raises(ValueError, match="No patterns"):
+            build_screen(molecules.c.mol, molecules.c.id, [])
+        with pytest.raises(ValueError, match="Invalid pattern_type"):
+            build_screen(molecules.c.mol, molecules.c.id, ["C"], pattern_type="inchi")
+
+    def test_streams_pairs(self, molecules):
+        connection = MagicMock()
+        connection.execute.return_value = FakeResult([(0, 3), (2, 3)])
+
+        pairs = list(screen(connection, molecules.c.mol, molecules.c.id, ["C", "N", "O"]))
+
+        assert pairs == [(0, 3), (2, 3)]
+        assert connection.execute.return_value.closed
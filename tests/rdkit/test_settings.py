@@ -1,12 +1,26 @@
 """Tests for RDKit similarity threshold settings helpers."""
 
-from unittest.mock import Mock
+import asyncio
+import threading
+from unittest.mock import AsyncMock, MagicMock, Mock
 
+import psycopg.errors
 import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
 
+from molalchemy import _guc
+from molalchemy.exceptions import SearchCancelledError, SearchTimeoutError
 from molalchemy.rdkit.settings import (
+    RdkitSettings,
+    aget_dice_threshold,
+    aget_tanimoto_threshold,
+    asearch_timeout,
+    aset_dice_threshold,
+    aset_tanimoto_threshold,
     get_dice_threshold,
     get_tanimoto_threshold,
+    search_timeout,
     set_dice_threshold,
     set_tanimoto_threshold,
     similarity_threshold,
@@ -118,3 +132,404 @@ class TestSimilarityThreshold:
             pass
 
         session.execute.assert_not_called()
+
+    def test_local_sets_both_in_one_statement(self, session):
+        with similarity_threshold(session, tanimoto=0.8, dice=0.3, local=True):
+            pass
+
+        session.execute.assert_called_once()
+        statement, params = session.execute.call_args[0]
+        assert str(statement) == (
+            "SELECT set_config(:name_0, :value_0, :local), "
+            "set_config(:name_1, :value_1, :local)"
+        )
+        assert params == {
+            "local": True,
+            "name_0": "rdkit.tanimoto_threshold",
+            "value_0": "0.8",
+            "name_1": "rdkit.dice_threshold",
+            "value_1": "0.3",
+        }
+
+    def test_local_validates_before_executing(self, session):
+        with pytest.raises(ValueError, match=r"between 0\.0 and 1\.0"):
+            with similarity_threshold(session, tanimoto=0.8, dice=1.5, local=True):
+                pass
+
+        session.execute.assert_not_called()
+
+    def test_local_noop_when_no_thresholds(self, session):
+        with similarity_threshold(session, local=True):
+            pass
+
+        session.execute.assert_not_called()
+
+
+@pytest.fixture
+def async_session():
+    mock = AsyncMock()
+    mock.execute.return_value = Mock()
+    mock.execute.return_value.scalar_one.return_value = "0.5"
+    return mock
+
+
+def executed(session):
+    return [str(call[0][0]) for call in session.execute.call_args_list]
+
+
+class TestAsyncThresholds:
+    def test_set_and_get(self, async_session):
+        asyncio.run(aset_tanimoto_threshold(async_session, 0.7))
+        asyncio.run(aset_dice_threshold(async_session, 0.6))
+
+        assert executed(async_session) == [
+            "SET rdkit.tanimoto_threshold = 0.7",
+            "SET rdkit.dice_threshold = 0.6",
+        ]
+        assert asyncio.run(aget_tanimoto_threshold(async_session)) == 0.5
+        assert asyncio.run(aget_dice_threshold(async_session)) == 0.5
+
+    def test_validates(self, async_session):
+        with pytest.raises(ValueError, match=r"between 0\.0 and 1\.0"):
+            asyncio.run(aset_tanimoto_threshold(async_session, 1.5))
+        with pytest.raises(TypeError, match="must be a float"):
+            asyncio.run(aset_dice_threshold(async_session, "0.5"))
+        async_session.execute.assert_not_called()
+
+
+class TestAsyncSimilarityThreshold:
+    def test_local_single_statement(self, async_session):
+        async def search():
+            async with similarity_threshold(async_session, tanimoto=0.8, local=True):
+                await async_session.execute("SELECT 1")
+
+        asyncio.run(search())
+
+        assert executed(async_session) == [
+            "SELECT set_config(:name_0, :value_0, :local)",
+            "SELECT 1",
+        ]
+
+    def test_sets_and_restores_both(self, async_session):
+        async def search():
+            async with similarity_threshold(async_session, tanimoto=0.8, dice=0.3):
+                await async_session.execute("SELECT 1")
+
+        asyncio.run(search())
+
+        assert executed(async_session) == [
+            "SHOW rdkit.tanimoto_threshold",
+            "SET rdkit.tanimoto_threshold = 0.8",
+            "SHOW rdkit.dice_threshold",
+            "SET rdkit.dice_threshold = 0.3",
+            "SELECT 1",
+            "SET rdkit.tanimoto_threshold = 0.5",
+            "SET rdkit.dice_threshold = 0.5",
+        ]
+
+    def test_restores_on_exception(self, async_session):
+        async def search():
+            async with similarity_threshold(async_session, tanimoto=0.8):
+                raise RuntimeError("test error")
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(search())
+
+        assert executed(async_session)[-1] == "SET rdkit.tanimoto_threshold = 0.5"
+
+    def test_invalid_threshold_restores_earlier_settings(self, async_session):
+        async def search():
+            async with similarity_threshold(async_session, tanimoto=0.8, dice=2.0):
+                pass
+
+        with pytest.raises(ValueError):
+            asyncio.run(search())
+
+        assert executed(async_session)[-2:] == [
+            "SET rdkit.tanimoto_threshold = 0.5",
+            "SET rdkit.dice_threshold = 0.5",
+        ]
+
+
+def cancelled_error(message="canceling statement due to statement timeout"):
+    return OperationalError("SELECT 1", {}, psycopg.errors.QueryCanceled(message))
+
+
+class TestSearchTimeout:
+    def test_sets_local_timeout_and_restores(self, session):
+        session.execute.return_value.scalar_one.return_value = "30s"
+
+        with search_timeout(session, 2.5):
+            pass
+
+        calls = [(str(c[0][0]), c[0][1]) for c in session.execute.call_args_list]
+        assert calls == [
+            ("SELECT current_setting(:name)", {"name": "statement_timeout"}),
+            (
+                "SELECT set_config(:name, :value, :local)",
+                {"name": "statement_timeout", "value": "2500", "local": True},
+            ),
+            (
+                "SELECT set_config(:name, :value, :local)",
+                {"name": "statement_timeout", "value": "30s", "local": True},
+            ),
+        ]
+
+    def test_restores_on_other_exceptions(self, session):
+        with pytest.raises(RuntimeError):
+            with search_timeout(session, 1):
+                raise RuntimeError("test error")
+
+        assert session.execute.call_count == 3
+
+    def test_timeout_raises_typed_error(self, session):
+        with pytest.raises(SearchTimeoutError) as excinfo:
+            with search_timeout(session, 1):
+                raise cancelled_error()
+
+        assert isinstance(excinfo.value, TimeoutError)
+        assert isinstance(excinfo.value.__cause__, OperationalError)
+        # The aborted transaction is not touched again
+        assert session.execute.call_count == 2
+
+    def test_timeout_with_localized_message(self, session):
+        with pytest.raises(SearchTimeoutError):
+            with search_timeout(session, 1):
+                raise cancelled_error(
+                    "storniere Anfrage wegen Zeitüberschreitung der Anweisung"
+                )
+
+    def test_cancel_from_another_thread(self, session):
+        driver_connection = session.connection.driver_connection
+
+        with pytest.raises(SearchCancelledError) as excinfo:
+            with search_timeout(session, None) as handle:
+                thread = threading.Thread(target=handle.cancel)
+                thread.start()
+                thread.join()
+                raise cancelled_error("canceling statement due to user request")
+
+        assert not isinstance(excinfo.value, SearchTimeoutError)
+        assert handle.cancelled
+        driver_connection.cancel.assert_called_once_with()
+        session.execute.assert_not_called()
+
+    def test_cancel_after_exit_is_ignored(self, session):
+        with search_timeout(session, None) as handle:
+            pass
+        handle.cancel()
+
+        session.connection.driver_connection.cancel.assert_not_called()
+        assert not handle.cancelled
+
+    def test_other_database_errors_propagate(self, session):
+        error = OperationalError("SELECT 1", {}, psycopg.errors.SyntaxError("oops"))
+
+        with pytest.raises(OperationalError):
+            with search_timeout(session, 1):
+                raise error
+
+    @pytest.mark.parametrize("seconds", [0, -1])
+    def test_rejects_non_positive(self, session, seconds):
+        with pytest.raises(ValueError, match="positive"):
+            with search_timeout(session, seconds):
+                pass
+
+
+class TestAsyncSearchTimeout:
+    def test_sets_local_timeout_and_restores(self, async_session):
+        async_session.execute.return_value.scalar_one.return_value = "30s"
+
+        async def run():
+            async with asearch_timeout(async_session, 2.5):
+                pass
+
+        asyncio.run(run())
+
+        assert [c[0][1] for c in async_session.execute.call_args_list] == [
+            {"name": "statement_timeout"},
+            {"name": "statement_timeout", "value": "2500", "local": True},
+            {"name": "statement_timeout", "value": "30s", "local": True},
+        ]
+
+    def test_timeout_raises_typed_error(self, async_session):
+        async def run():
+            async with asearch_timeout(async_session, 1):
+                raise cancelled_error()
+
+        with pytest.raises(SearchTimeoutError):
+            asyncio.run(run())
+        assert async_session.execute.await_count == 2
+
+    def test_cancel_from_another_task(self, async_session):
+        driver_connection = Mock()
+        async_session.get_raw_connection.return_value = Mock(
+            driver_connection=driver_connection
+        )
+
+        async def run():
+            async with asearch_timeout(async_session, None) as handle:
+                await asyncio.create_task(handle.acancel())
+                raise cancelled_error("canceling statement due to user request")
+
+        with pytest.raises(SearchCancelledError) as excinfo:
+            asyncio.run(run())
+
+        assert not isinstance(excinfo.value, SearchTimeoutError)
+        driver_connection.cancel.assert_called_once_with()
+
+    def test_cancel_unsupported_driver(self, async_session):
+        # asyncpg connections have no cancel()
+        async_session.get_raw_connection.return_value = Mock(
+            driver_connection=Mock(spec=[])
+        )
+
+        async def run():
+            async with asearch_timeout(async_session, None) as handle:
+                with pytest.raises(NotImplementedError, match="psycopg"):
+                    await handle.acancel()
+            return handle
+
+        assert not asyncio.run(run()).cancelled
+
+
+class TestRdkitSettings:
+    def test_gucs_skip_unset_values(self):
+        settings = RdkitSettings(
+            tanimoto_threshold=0.7, do_chiral_sss=True, morgan_fp_size=2048
+        )
+
+        assert settings.gucs() == {
+            "rdkit.tanimoto_threshold": "0.7",
+            "rdkit.do_chiral_sss": "on",
+            "rdkit.morgan_fp_size": "2048",
+        }
+
+    def test_options(self):
+        settings = RdkitSettings(dice_threshold=1, ignore_reaction_agents=False)
+
+        assert settings.options() == (
+            "-c rdkit.dice_threshold=1.0 -c rdkit.ignore_reaction_agents=off"
+        )
+
+    def test_frozen(self):
+        settings = RdkitSettings()
+        with pytest.raises(AttributeError):
+            settings.ss_fp_size = 1024
+
+    @pytest.mark.parametrize(
+        ("kwargs", "error"),
+        [
+            ({"tanimoto_threshold": 1.5}, ValueError),
+            ({"do_chiral_sss": 1}, TypeError),
+            ({"ss_fp_size": 1024.0}, TypeError),
+            ({"avalon_fp_size": True}, TypeError),
+            ({"morgan_fp_size": 0}, ValueError),
+        ],
+    )
+    def test_validation(self, kwargs, error):
+        with pytest.raises(error):
+            RdkitSettings(**kwargs)
+
+    def test_keyword_only(self):
+        with pytest.raises(TypeError):
+            RdkitSettings(0.5)
+
+    def test_apply_sets_on_connect(self):
+        engine = create_engine("sqlite://")
+        RdkitSettings(do_chiral_sss=True, ss_fp_size=4096).apply(engine)
+        dbapi_connection = MagicMock()
+        record = Mock(info={})
+
+        # The dialect's own connect listeners come first
+        on_connect = list(engine.pool.dispatch.connect)[-1]
+        on_connect(dbapi_connection, record)
+
+        cursor = dbapi_connection.cursor.return_value
+        assert [c[0][0] for c in cursor.execute.call_args_list] == [
+            "SET rdkit.do_chiral_sss = on",
+            "SET rdkit.ss_fp_size = 4096",
+        ]
+        dbapi_connection.commit.assert_called_once_with()
+        assert record.info[_guc._CONNECT] == {
+            "rdkit.do_chiral_sss": "on",
+            "rdkit.ss_fp_size": "4096",
+        }
+
+    def test_connect_settings_seed_tracked_cache(self):
+        record = Mock(info={_guc._CONNECT: {"rdkit.tanimoto_threshold": "0.7"}})
+
+        _guc._on_checkout(None, record, None)
+
+        assert _guc.cached(record.info, "rdkit.tanimoto_threshold") == "0.7"
+
+    def test_reset_on_checkin_restores_connect_settings(self):
+        record = Mock(
+            info={
+                _guc._CONNECT: {"rdkit.do_chiral_sss": "on"},
+                _guc._COMMITTED: {
+                    "rdkit.do_chiral_sss": "off",
+                    "rdkit.tanimoto_threshold": "0.7",
+                },
+            }
+        )
+        dbapi_connection = MagicMock()
+
+        _guc._reset_settings(dbapi_connection, record)
+
+        cursor = dbapi_connection.cursor.return_value
+        assert [c[0][0] for c in cursor.execute.call_args_list] == [
+            "SET rdkit.do_chiral_sss = on",
+            "RESET rdkit.tanimoto_threshold",
+        ]
+        assert record.info[_guc._COMMITTED] == {"rdkit.do_chiral_sss": "on"}
+
+    def test_override_sets_and_restores(self, session):
+        session.execute.return_value.scalar_one.return_value = "off"
+
+        with RdkitSettings(do_chiral_sss=True, ss_fp_size=4096).override(session):
+            pass
+
+        calls = [c[0][1] for c in session.execute.call_args_list]
+        assert calls == [
+            {"name": "rdkit.do_chiral_sss"},
+            {"name": "rdkit.ss_fp_size"},
+            {
+                "local": False,
+                "name_0": "rdkit.do_chiral_sss",
+                "value_0": "on",
+                "name_1": "rdkit.ss_fp_size",
+                "value_1": "4096",
+            },
+            {
+                "local": False,
+                "name_0": "rdkit.do_chiral_sss",
+                "value_0": "off",
+                "name_1": "rdkit.ss_fp_size",
+                "value_1": "off",
+            },
+        ]
+
+    def test_override_local(self, session):
+        with RdkitSettings(do_chiral_sss=True).override(session, local=True):
+            pass
+
+        session.execute.assert_called_once()
+        assert session.execute.call_args[0][1]["local"] is True
+
+    def test_override_skips_restore_after_database_error(self, session):
+        with pytest.raises(OperationalError):
+            with RdkitSettings(do_chiral_sss=True).override(session):
+                raise cancelled_error()
+
+        assert session.execute.call_count == 2
+
+    def test_async_override(self, async_session):
+        async def search():
+            async with RdkitSettings(do_chiral_sss=True).override(async_session):
+                await async_session.execute("SELECT 1")
+
+        asyncio.run(search())
+
+        assert async_session.execute.call_count == 4
+        assert str(async_session.execute.call_args_list[2][0][0]) == "SELECT 1"
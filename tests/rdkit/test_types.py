@@ -1,8 +1,9 @@
 """Tests for RDKit types."""
 
+import numpy as np
 import pytest
-from rdkit import Chem
-from rdkit.Chem import AllChem, rdChemReactions
+from rdkit import Chem, DataStructs
+from rdkit.Chem import AllChem, rdChemReactions, rdFingerprintGenerator
 from sqlalchemy import Column, Integer, MetaData, String, Table
 
 from molalchemy.rdkit.comparators import RdkitFPComparator, RdkitMolComparator
@@ -132,6 +133,184 @@ class TestRdkitMol:
         with pytest.raises(InvalidMoleculeError, match="SMILES string or an RDKit Mol"):
             processor(123)
 
+    def test_bind_processor_passes_pickles_through(self):
+        """Test that pickled molecules are sent unchanged."""
+        pickle = Chem.MolFromSmiles("CCO").ToBinary()
+        processor = RdkitMol().bind_processor(None)
+        assert processor(pickle) == pickle
+        assert processor(memoryview(pickle)) == pickle
+
+    def test_bind_cache_disabled_by_default(self):
+        """Test that no bind cache is created unless requested."""
+        assert RdkitMol().bind_cache is None
+
+    def test_bind_cache_hits(self):
+        """Test that repeated SMILES are served from the bind cache."""
+        rdkit_mol = RdkitMol(bind_cache_size=2)
+        processor = rdkit_mol.bind_processor(None)
+
+        first = processor("CCO")
+        second = processor("CCO")
+
+        assert first == second == Chem.MolFromSmiles("CCO").ToBinary()
+        info = rdkit_mol.bind_cache.info()
+        assert (info.hits, info.misses, info.currsize) == (1, 1, 1)
+
+    def test_bind_cache_evicts(self):
+        """Test that the bind cache is bounded."""
+        rdkit_mol = RdkitMol(bind_cache_size=2)
+        processor = rdkit_mol.bind_processor(None)
+        for smiles in ("C", "CC", "CCC"):
+            processor(smiles)
+
+        assert rdkit_mol.bind_cache.info().evictions == 1
+        assert "C" not in rdkit_mol.bind_cache
+
+    def test_bind_cache_skips_invalid_smiles(self):
+        """Test that invalid SMILES are not cached and still raise."""
+        from molalchemy.exceptions import InvalidMoleculeError
+
+        rdkit_mol = RdkitMol(bind_cache_size=2)
+        processor = rdkit_mol.bind_processor(None)
+        for _ in range(2):
+            with pytest.raises(InvalidMoleculeError):
+                processor("not_valid_smiles")
+        assert len(rdkit_mol.bind_cache) == 0
+
+    def test_bind_cache_size_in_repr(self):
+        """Test that a configured bind cache is part of the repr."""
+        assert (
+            repr(RdkitMol(bind_cache_size=100))
+            == "RdkitMol(return_type='smiles', bind_cache_size=100)"
+        )
+
+
+    def test_validate_defaults_to_client(self):
+        """Test that molecules are validated client-side by default."""
+        assert RdkitMol().validate == "client"
+
+    def test_validate_rejects_unknown_mode(self):
+        """Test that an unknown validation mode is rejected."""
+        with pytest.raises(ValueError, match="Invalid validate"):
+            RdkitMol(validate="strict")
+
+    @pytest.mark.parametrize("validate", ["server", "none"])
+    def test_unvalidated_bind_processor_sends_text(self, validate):
+        """Test that trusted modes send SMILES text without parsing it."""
+        processor = RdkitMol(validate=validate).bind_processor(None)
+
+        assert processor("not_valid_smiles") == "not_valid_smiles"
+        assert processor(Chem.MolFromSmiles("OCC")) == "CCO"
+        assert processor(None) is None
+
+    def test_unvalidated_bind_processor_rejects_pickles(self):
+        """Test that pickles cannot be sent as text."""
+        from molalchemy.exceptions import InvalidMoleculeError
+
+        processor = RdkitMol(validate="none").bind_processor(None)
+        with pytest.raises(InvalidMoleculeError, match="validate='none'"):
+            processor(b"pickle")
+
+    @pytest.mark.parametrize(
+        ("validate", "expected"),
+        [
+            ("client", "mol_from_pkl(%(mol)s)"),
+            ("server", "CAST(%(mol)s AS mol)"),
+            ("none", "mol_from_smiles(CAST(%(mol)s AS cstring))"),
+        ],
+    )
+    def test_validate_bind_expression(self, validate, expected):
+        """Test the bind expression used by each validation mode."""
+        from sqlalchemy import insert
+        from sqlalchemy.dialects import postgresql
+
+        table = Table("t", MetaData(), Column("mol", RdkitMol(validate=validate)))
+        compiled = str(
+            insert(table)
+            .values(mol="CCO")
+            .compile(dialect=postgresql.psycopg.dialect())
+        )
+        assert expected in compiled
+
+    def test_validate_in_repr(self):
+        """Test that a non-default validation mode is part of the repr."""
+        assert (
+            repr(RdkitMol(validate="none"))
+            == "RdkitMol(return_type='smiles', validate='none')"
+        )
+
+    @pytest.fixture
+    def embedded_mol(self):
+        """Molecule with a conformer and a property."""
+        mol = Chem.AddHs(Chem.MolFromSmiles("CCO"))
+        AllChem.EmbedMolecule(mol, randomSeed=42)
+        mol.SetProp("name", "ethanol")
+        return mol
+
+    def test_pickle_defaults_match_to_binary(self, embedded_mol):
+        """Test that the default pickling is unchanged."""
+        processor = RdkitMol().bind_processor(None)
+        assert processor(embedded_mol) == embedded_mol.ToBinary()
+
+    def test_pickle_props(self, embedded_mol):
+        """Test that pickle_props is passed to ToBinary."""
+        all_props = RdkitMol(pickle_props=Chem.PropertyPickleOptions.AllProps)
+        no_props = RdkitMol(pickle_props=Chem.PropertyPickleOptions.NoProps)
+
+        with_props = all_props.bind_processor(None)(embedded_mol)
+        without_props = no_props.bind_processor(None)(embedded_mol)
+
+        assert Chem.Mol(with_props).GetProp("name") == "ethanol"
+        assert not Chem.Mol(without_props).HasProp("name")
+        assert len(without_props) < len(with_props)
+
+    def test_keep_conformers_false(self, embedded_mol):
+        """Test that conformers can be dropped from bind payloads."""
+        processor = RdkitMol(keep_conformers=False).bind_processor(None)
+
+        pickle = processor(embedded_mol)
+
+        assert Chem.Mol(pickle).GetNumConformers() == 0
+        assert len(pickle) < len(embedded_mol.ToBinary())
+        # The input molecule is left untouched
+        assert embedded_mol.GetNumConformers() == 1
+
+    def test_pickle_options_in_repr(self):
+        """Test that pickle options are part of the repr."""
+        rdkit_mol = RdkitMol(
+            pickle_props=Chem.PropertyPickleOptions.NoProps, keep_conformers=False
+        )
+        assert (
+            repr(rdkit_mol)
+            == "RdkitMol(return_type='smiles', pickle_props=0, keep_conformers=False)"
+        )
+
+    def test_lazy_mol_column_expression(self):
+        """Test that lazy_mol selects the pickle and the SMILES in one value."""
+        from sqlalchemy import select
+        from sqlalchemy.dialects import postgresql
+
+        table = Table("t", MetaData(), Column("mol", RdkitMol(return_type="lazy_mol")))
+        compiled = str(select(table).compile(dialect=postgresql.psycopg.dialect()))
+
+        assert "mol_send(t.mol) || '\\x00'::bytea" in compiled
+        assert "convert_to(CAST(mol_to_smiles(t.mol) AS TEXT)" in compiled
+
+    def test_lazy_mol_result_processor(self):
+        """Test that lazy_mol results are not unpickled until used."""
+        from molalchemy.rdkit.lazy import LazyMol
+
+        pickle = Chem.MolFromSmiles("CCO").ToBinary()
+        processor = RdkitMol(return_type="lazy_mol").result_processor(None, None)
+
+        result = processor(memoryview(pickle + b"\x00CCO"))
+
+        assert isinstance(result, LazyMol)
+        assert result.smiles == "CCO"
+        assert result.pickle == pickle
+        assert not result.is_loaded
+        assert processor(None) is None
+
 
 class TestRdkitBitFingerprint:
     """Test RdkitBitFingerprint type."""
@@ -166,6 +345,80 @@ class TestRdkitBitFingerprint:
         assert test_table.c.fingerprint.type.__class__ == RdkitBitFingerprint
         assert isinstance(test_table.c.fingerprint.type, RdkitBitFingerprint)
 
+    def test_default_return_type_repr(self):
+        """Test that the default return type is bytes and keeps the short repr."""
+        assert RdkitBitFingerprint().return_type == "bytes"
+        assert repr(RdkitBitFingerprint()) == "RdkitBitFingerprint()"
+        assert (
+            repr(RdkitBitFingerprint(return_type="numpy"))
+            == "RdkitBitFingerprint(return_type='numpy')"
+        )
+
+    @pytest.fixture
+    def bitvect(self):
+        generator = rdFingerprintGenerator.GetMorganGenerator(radius=2, fpSize=64)
+        return generator.GetFingerprint(Chem.MolFromSmiles("c1ccccc1O"))
+
+    def test_bind_processor_inputs(self, bitvect):
+        """Test that bit vectors, arrays and bytes bind as packed bits."""
+        processor = RdkitBitFingerprint().bind_processor(None)
+        packed = DataStructs.BitVectToBinaryText(bitvect)
+        bits = np.zeros(64, dtype=bool)
+        bits[list(bitvect.GetOnBits())] = True
+
+        assert processor(bitvect) == packed
+        assert processor(packed) == packed
+        assert processor(memoryview(packed)) == packed
+        assert processor(bits) == packed
+        assert processor(np.frombuffer(packed, dtype=np.uint8)) == packed
+        assert processor(None) is None
+
+    def test_bind_processor_rejects_invalid_values(self):
+        """Test that unsupported fingerprint inputs raise."""
+        processor = RdkitBitFingerprint().bind_processor(None)
+        with pytest.raises(TypeError):
+            processor("0101")
+        with pytest.raises(TypeError, match="dtype"):
+            processor(np.zeros(8, dtype=np.int64))
+        with pytest.raises(ValueError, match="one-dimensional"):
+            processor(np.zeros((2, 8), dtype=bool))
+
+    def test_binary_text_expressions(self):
+        """Test that fingerprints are sent and selected as binary text."""
+        from sqlalchemy import insert, select
+        from sqlalchemy.dialects import postgresql
+
+        table = Table("t", MetaData(), Column("fp", RdkitBitFingerprint()))
+        dialect = postgresql.psycopg.dialect()
+
+        assert "bfp_from_binary_text(%(fp)s)" in str(
+            insert(table).values(fp=b"\\x01").compile(dialect=dialect)
+        )
+        assert "SELECT bfp_to_binary_text(t.fp) AS fp" in str(
+            select(table).compile(dialect=dialect)
+        )
+
+    @pytest.mark.parametrize("return_type", ["bytes", "bitvect", "numpy"])
+    def test_fingerprint_result_processor(self, bitvect, return_type):
+        """Test result_processor for the fingerprint return types."""
+        packed = DataStructs.BitVectToBinaryText(bitvect)
+        processor = RdkitBitFingerprint(return_type=return_type).result_processor(
+            None, None
+        )
+
+        result = processor(memoryview(packed))
+
+        if return_type == "bytes":
+            assert result == packed
+        elif return_type == "bitvect":
+            assert list(result.GetOnBits()) == list(bitvect.GetOnBits())
+        else:
+            assert result.dtype == np.uint8
+            bits = np.unpackbits(result, bitorder="little")
+            assert list(np.flatnonzero(bits)) == list(bitvect.GetOnBits())
+        assert processor(None) is None
+
+
     @pytest.mark.parametrize("return_type", ["smiles", "bytes", "mol"])
     @pytest.mark.parametrize(
         "value", ["C.C>>CC", "[C:1](=[O:2])O.[N:3]>>[C:1](=[O:2])[N:3]"]
@@ -342,6 +595,49 @@ class TestRdkitReaction:
         assert isinstance(result, AllChem.ChemicalReaction)
         assert result.GetNumReactantTemplates() == 2
 
+    def test_validate_rejects_unknown_mode(self):
+        """Test that an unknown validation mode is rejected."""
+        with pytest.raises(ValueError, match="Invalid validate"):
+            RdkitReaction(validate="strict")
+
+    @pytest.mark.parametrize("validate", ["server", "none"])
+    def test_unvalidated_bind_processor_sends_text(self, validate):
+        """Test that trusted modes send reaction SMILES without parsing them."""
+        processor = RdkitReaction(validate=validate).bind_processor(None)
+        rxn = rdChemReactions.ReactionFromSmarts("CCO>>CC=O", useSmiles=True)
+
+        assert processor("garbage") == "garbage"
+        assert processor(rxn) == rdChemReactions.ReactionToSmiles(rxn)
+
+    def test_unvalidated_bind_processor_rejects_other_types(self):
+        """Test that non-text values are rejected in trusted modes."""
+        from molalchemy.exceptions import InvalidReactionError
+
+        processor = RdkitReaction(validate="server").bind_processor(None)
+        with pytest.raises(InvalidReactionError, match="validate='server'"):
+            processor(123)
+
+    @pytest.mark.parametrize(
+        ("validate", "expected"),
+        [
+            ("client", "reaction_from_smarts(%(rxn)s)"),
+            ("server", "CAST(%(rxn)s AS reaction)"),
+            ("none", "reaction_from_smiles(CAST(%(rxn)s AS cstring))"),
+        ],
+    )
+    def test_validate_bind_expression(self, validate, expected):
+        """Test the bind expression used by each validation mode."""
+        from sqlalchemy import insert
+        from sqlalchemy.dialects import postgresql
+
+        table = Table("t", MetaData(), Column("rxn", RdkitReaction(validate=validate)))
+        compiled = str(
+            insert(table)
+            .values(rxn="CC>>CO")
+            .compile(dialect=postgresql.psycopg.dialect())
+        )
+        assert expected in compiled
+
 
 class TestTypesIntegration:
     """Integration tests for RDKit types."""
@@ -5,7 +5,9 @@ from unittest.mock import Mock, patch
 import pytest
 
 from molalchemy.alembic_helpers import (
+    add_popcount_column,
     add_rdkit_extension,
+    drop_popcount_column,
     drop_rdkit_extension,
     render_item,
 )
@@ -46,18 +48,42 @@ ALL_TYPES = [
         "RdkitMol",
         "RdkitMol(return_type='mol')",
     ),
+    (
+        RdkitMol(return_type="lazy_mol"),
+        "molalchemy.rdkit.types",
+        "RdkitMol",
+        "RdkitMol(return_type='lazy_mol')",
+    ),
     (
         RdkitMol(return_type="bytes"),
         "molalchemy.rdkit.types",
         "RdkitMol",
         "RdkitMol(return_type='bytes')",
     ),
+    (
+        RdkitMol(bind_cache_size=1000),
+        "molalchemy.rdkit.types",
+        "RdkitMol",
+        "RdkitMol(return_type='smiles', bind_cache_size=1000)",
+    ),
+    (
+        RdkitMol(validate="none", pickle_props=0, keep_conformers=False),
+        "molalchemy.rdkit.types",
+        "RdkitMol",
+        "RdkitMol(return_type='smiles', validate='none', pickle_props=0, keep_conformers=False)",
+    ),
     (
         RdkitBitFingerprint(),
         "molalchemy.rdkit.types",
         "RdkitBitFingerprint",
         "RdkitBitFingerprint()",
     ),
+    (
+        RdkitBitFingerprint(return_type="numpy"),
+        "molalchemy.rdkit.types",
+        "RdkitBitFingerprint",
+        "RdkitBitFingerprint(return_type='numpy')",
+    ),
     (
         RdkitSparseFingerprint(),
         "molalchemy.rdkit.types",
@@ -201,6 +227,41 @@ class TestExtensionFunctions:
         mock_op.execute.assert_called_once_with("DROP EXTENSION IF EXISTS rdkit;")
 
 
+class TestPopcountColumn:
+    """Test cases for popcount column migrations."""
+
+    @patch("molalchemy.alembic_helpers.op")
+    def test_add_popcount_column(self, mock_op):
+        """Test that the generated column and its index are created."""
+        add_popcount_column("molecules", "fp")
+
+        table_name, column = mock_op.add_column.call_args.args
+        assert table_name == "molecules"
+        assert column.name == "fp_popcount"
+        assert str(column.computed.sqltext) == "bit_count(bfp_to_binary_text(fp))"
+        assert column.computed.persisted is True
+        mock_op.create_index.assert_called_once_with(
+            "ix_molecules_fp_popcount", "molecules", ["fp_popcount"], schema=None
+        )
+
+    @patch("molalchemy.alembic_helpers.op")
+    def test_add_popcount_column_without_index(self, mock_op):
+        """Test custom column names and skipping the index."""
+        add_popcount_column("molecules", "fp", "n_bits", index=False, schema="chem")
+
+        assert mock_op.add_column.call_args.args[1].name == "n_bits"
+        assert mock_op.add_column.call_args.kwargs == {"schema": "chem"}
+        mock_op.create_index.assert_not_called()
+
+    @patch("molalchemy.alembic_helpers.op")
+    def test_drop_popcount_column(self, mock_op):
+        """Test that the popcount column is dropped."""
+        drop_popcount_column("molecules", "fp")
+        mock_op.drop_column.assert_called_once_with(
+            "molecules", "fp_popcount", schema=None
+        )
+
+
 # All index variants with expected module, class name, and constructor repr
 ALL_INDEXES = [
     (
@@ -0,0 +1,150 @@
+"""Tests for the binary COPY bulk loader."""
+
+from unittest.mock import MagicMock
+
+import psycopg
+import pytest
+from rdkit import Chem, DataStructs
+from rdkit.Chem import rdFingerprintGenerator
+from sqlalchemy import Column, Integer, MetaData, String, Table
+from sqlalchemy.dialects import postgresql
+
+from molalchemy.bulk import FailedRow, _convert_rows, _stage_column, bulk_load
+from molalchemy.exceptions import InvalidMoleculeError
+from molalchemy.rdkit.types import (
+    RdkitBitFingerprint,
+    RdkitMol,
+    RdkitReaction,
+    RdkitSparseFingerprint,
+)
+
+
+@pytest.fixture
+def molecules():
+    return Table(
+        "molecules",
+        MetaData(),
+        Column("id", Integer, primary_key=True),
+        Column("name", String(100)),
+        Column("mol", RdkitMol()),
+        Column("fp", RdkitBitFingerprint()),
+    )
+
+
+def compile_expression(staged):
+    column = Column(staged.column.name, staged.stage_type)
+    Table("stage", MetaData(), column)
+    return str(
+        staged.expression(column).compile(dialect=postgresql.psycopg.dialect())
+    )
+
+
+@pytest.fixture
+def connection():
+    conn = MagicMock()
+    conn.dialect = postgresql.psycopg.dialect()
+    conn.connection.driver_connection = MagicMock(spec=psycopg.Connection)
+    conn.execute.return_value = [(20,), (25,), (17,), (17,)]
+    return conn
+
+
+class TestStageColumn:
+    @pytest.mark.parametrize(
+        ("type_", "expected"),
+        [
+            (RdkitMol(), "mol_from_pkl(stage.mol)"),
+            (RdkitMol(validate="server"), "CAST(stage.mol AS mol)"),
+            (RdkitMol(validate="none"), "mol_from_smiles(CAST(stage.mol AS cstring))"),
+            (RdkitReaction(), "reaction_from_smarts(CAST(stage.mol AS cstring))"),
+            (RdkitBitFingerprint(), "bfp_from_binary_text(stage.mol)"),
+        ],
+    )
+    def test_select_expression(self, type_, expected):
+        staged = _stage_column(Column("mol", type_))
+        assert compile_expression(staged) == expected
+
+    def test_plain_columns_are_selected_unchanged(self):
+        staged = _stage_column(Column("name", String(100)))
+        assert compile_expression(staged) == "stage.name"
+        assert staged.convert is None
+
+    def test_rejects_unsupported_types(self):
+        with pytest.raises(ValueError, match="not supported"):
+            _stage_column(Column("sfp", RdkitSparseFingerprint()))
+
+
+class TestConvertRows:
+    def test_converts_molecules_and_fingerprints(self, molecules):
+        staged = [_stage_column(c) for c in molecules.columns]
+        fp = rdFingerprintGenerator.GetMorganGenerator(fpSize=64).GetFingerprint(
+            Chem.MolFromSmiles("CCO")
+        )
+
+        rows = _convert_rows(
+            [{"id": 1, "name": "ethanol", "mol": "CCO", "fp": fp}], staged, 0, "raise", []
+        )
+
+        assert rows == [
+            (
+                1,
+                "ethanol",
+                Chem.MolFromSmiles("CCO").ToBinary(),
+                DataStructs.BitVectToBinaryText(fp),
+            )
+        ]
+
+    def test_raise_reports_row_index(self, molecules):
+        staged = [_stage_column(molecules.c.mol)]
+        with pytest.raises(InvalidMoleculeError, match="Row 11"):
+            _convert_rows([{"mol": "CC"}, {"mol": "C1CC"}], staged, 10, "raise", [])
+
+    def test_skip_collects_failed_rows(self, molecules):
+        staged = [_stage_column(molecules.c.mol)]
+        failed = []
+
+        rows = _convert_rows(
+            [{"mol": "CC"}, {"mol": "C1CC"}, {"mol": None}], staged, 0, "skip", failed
+        )
+
+        assert rows == [(Chem.MolFromSmiles("CC").ToBinary(),), (None,)]
+        assert [f.index for f in failed] == [1]
+        assert isinstance(failed[0], FailedRow)
+        assert "C1CC" in failed[0].error
+
+
+class TestBulkLoad:
+    def test_batches_copy_and_insert(self, molecules, connection):
+        rows = [{"id": i, "name": s, "mol": s} for i, s in enumerate(["C", "CC", "CCO"])]
+        rows.append({"id": 3, "name": "bad", "mol": "C1CC"})
+
+        result = bulk_load(connection, molecules, rows, batch_size=2, on_error="skip")
+
+        assert result.inserted == 3
+        assert [f.index for f in result.failed] == [3]
+        statements = [
+            str(call.args[0].compile(dialect=postgresql.psycopg.dialect()))
+            for call in connection.execute.call_args_list
+        ]
+        inserts = [s for s in statements if s.startswith("INSERT")]
+        assert len(inserts) == 2
+        assert "mol_from_pkl(_molalchemy_stage_" in inserts[0]
+        assert statements[-1].startswith("DROP TABLE _molalchemy_stage_")
+        cursor = connection.connection.driver_connection.cursor.return_value.__enter__
+        copy = cursor.return_value.copy
+        assert copy.call_count == 2
+        assert "(FORMAT BINARY)" in copy.call_args.args[0]
+
+    def test_empty_rows(self, molecules, connection):
+        assert bulk_load(connection, molecules, []) == (0, [])
+        connection.execute.assert_not_called()
+
+    def test_requires_psycopg(self, molecules, connection):
+        connection.connection.driver_connection = object()
+        with pytest.raises(TypeError, match="psycopg 3"):
+            bulk_load(connection, molecules, [{"mol": "C"}])
+
+    def test_rejects_invalid_options(self, molecules, connection):
+        with pytest.raises(ValueError, match="batch_size"):
+            bulk_load(connection, molecules, [{"mol": "C"}], batch_size=0)
+        with pytest.raises(ValueError, match="on_error"):
+            bulk_load(connection, molecules, [{"mol": "C"}], on_error="ignore")
@@ -0,0 +1,69 @@
+"""Tests for the LRU cache."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from molalchemy.cache import CacheInfo, LRUCache
+
+
+class TestLRUCache:
+    def test_get_and_put(self):
+        cache = LRUCache(maxsize=2)
+        cache.put("a", 1)
+        assert cache.get("a") == 1
+        assert "a" in cache
+        assert len(cache) == 1
+
+    def test_miss_returns_default(self):
+        cache = LRUCache(maxsize=2)
+        assert cache.get("missing") is None
+        assert cache.get("missing", 42) == 42
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        assert "a" in cache
+        assert "b" not in cache
+        assert "c" in cache
+
+    def test_info_counters(self):
+        cache = LRUCache(maxsize=1)
+        cache.put("a", 1)
+        cache.get("a")
+        cache.get("b")
+        cache.put("b", 2)
+
+        assert cache.info() == CacheInfo(
+            hits=1, misses=1, evictions=1, maxsize=1, currsize=1
+        )
+
+    def test_clear_resets(self):
+        cache = LRUCache(maxsize=2)
+        cache.put("a", 1)
+        cache.get("a")
+        cache.clear()
+
+        assert cache.info() == CacheInfo(0, 0, 0, 2, 0)
+
+    def test_rejects_invalid_size(self):
+        with pytest.raises(ValueError, match="maxsize"):
+            LRUCache(maxsize=0)
+
+    def test_concurrent_access(self):
+        cache = LRUCache(maxsize=50)
+
+        def work(i):
+            cache.put(i % 100, i)
+            cache.get(i % 100)
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(work, range(1000)))
+
+        info = cache.info()
+        assert info.currsize == 50
+        assert info.hits + info.misses == 1000
@@ -3,6 +3,7 @@
 import pytest
 
 from molalchemy.exceptions import (
+    InvalidCursorError,
     InvalidMoleculeError,
     InvalidReactionError,
     MolAlchemyError,
@@ -21,6 +22,10 @@ class TestExceptionHierarchy:
     def test_invalid_reaction_error_is_molalchemy_error(self):
         assert issubclass(InvalidReactionError, MolAlchemyError)
 
+    def test_invalid_cursor_error_is_value_error(self):
+        assert issubclass(InvalidCursorError, MolAlchemyError)
+        assert issubclass(InvalidCursorError, ValueError)
+
     def test_catch_all_with_base_class(self):
         with pytest.raises(MolAlchemyError):
             raise InvalidMoleculeError("bad molecule")
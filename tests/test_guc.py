@@ -0,0 +1,206 @@
+"""Tests for the per-connection settings cache."""
+
+from unittest.mock import MagicMock, Mock
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+
+from molalchemy import _guc
+from molalchemy.rdkit.settings import (
+    get_tanimoto_threshold,
+    set_tanimoto_threshold,
+    similarity_threshold,
+    track_settings,
+)
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", poolclass=QueuePool, pool_size=1)
+    track_settings(engine)
+    yield engine
+    engine.dispose()
+
+
+def tracked_session(**committed):
+    """A mock session whose connection cache holds `committed`."""
+    session = Mock()
+    session.info = {
+        _guc._COMMITTED: dict(committed),
+        _guc._PENDING: {},
+        _guc._LOCAL: set(),
+    }
+    session.execute.return_value.scalar_one.return_value = "0.5"
+    return session
+
+
+class TestTracking:
+    def test_checkout_creates_cache(self, engine):
+        with engine.connect() as conn:
+            assert _guc.tracked(conn) is conn.info
+
+    def test_untracked_engine(self):
+        engine = create_engine("sqlite://")
+        with engine.connect() as conn:
+            assert _guc.tracked(conn) is None
+
+    def test_commit_keeps_values(self, engine):
+        with engine.connect() as conn:
+            conn.exec_driver_sql("SELECT 1")
+            _guc.remember(conn.info, "rdkit.tanimoto_threshold", 0.7)
+            conn.commit()
+
+        with engine.connect() as conn:
+            assert _guc.cached(conn.info, "rdkit.tanimoto_threshold") == "0.7"
+
+    def test_rollback_drops_pending_values(self, engine):
+        with engine.connect() as conn:
+            conn.exec_driver_sql("SELECT 1")
+            _guc.remember(conn.info, "rdkit.tanimoto_threshold", 0.7)
+            conn.commit()
+            conn.exec_driver_sql("SELECT 1")
+            _guc.remember(conn.info, "rdkit.tanimoto_threshold", 0.9)
+            assert _guc.cached(conn.info, "rdkit.tanimoto_threshold") == "0.9"
+            conn.rollback()
+
+            assert _guc.cached(conn.info, "rdkit.tanimoto_threshold") == "0.7"
+
+    def test_reset_on_return_drops_pending_values(self, engine):
+        with engine.connect() as conn:
+            _guc.remember(conn.info, "rdkit.dice_threshold", 0.4)
+
+        with engine.connect() as conn:
+            assert _guc.cached(conn.info, "rdkit.dice_threshold") is None
+
+    def test_forget(self):
+        info = {_guc._COMMITTED: {"a": "1"}, _guc._PENDING: {"b": "2"}}
+
+        _guc.forget(info, ["a", "b"])
+
+        assert info == {_guc._COMMITTED: {}, _guc._PENDING: {}}
+
+
+class TestCachedSettings:
+    def test_set_skips_unchanged_value(self):
+        session = tracked_session(**{"rdkit.tanimoto_threshold": "0.7"})
+
+        set_tanimoto_threshold(session, 0.7)
+
+        session.execute.assert_not_called()
+
+    def test_set_changed_value_is_remembered(self):
+        session = tracked_session(**{"rdkit.tanimoto_threshold": "0.7"})
+
+        set_tanimoto_threshold(session, 0.8)
+        set_tanimoto_threshold(session, 0.8)
+
+        session.execute.assert_called_once()
+        assert session.info[_guc._PENDING] == {"rdkit.tanimoto_threshold": "0.8"}
+
+    def test_get_answers_from_cache(self):
+        session = tracked_session(**{"rdkit.tanimoto_threshold": "0.7"})
+
+        assert get_tanimoto_threshold(session) == 0.7
+        session.execute.assert_not_called()
+
+    def test_get_remembers_shown_value(self):
+        session = tracked_session()
+
+        assert get_tanimoto_threshold(session) == 0.5
+        assert get_tanimoto_threshold(session) == 0.5
+        session.execute.assert_called_once()
+
+    def test_similarity_threshold_without_round_trips_in_steady_state(self):
+        session = tracked_session(**{"rdkit.tanimoto_threshold": "0.7"})
+
+        with similarity_threshold(session, tanimoto=0.7):
+            pass
+
+        session.execute.assert_not_called()
+
+    def test_local_settings_are_not_cached(self):
+        session = tracked_session(**{"rdkit.tanimoto_threshold": "0.7"})
+
+        with similarity_threshold(session, tanimoto=0.7, local=True):
+            pass
+
+        session.execute.assert_called_once()
+        assert _guc.cached(session.info, "rdkit.tanimoto_threshold") is None
+
+    def test_local_value_read_back_is_not_cached(self):
+        session = tracked_session(**{"rdkit.tanimoto_threshold": "0.5"})
+        session.execute.return_value.scalar_one.return_value = "0.9"
+
+        with similarity_threshold(session, tanimoto=0.9, local=True):
+            assert get_tanimoto_threshold(session) == 0.9
+        _guc._on_commit(session)
+
+        assert _guc.cached(session.info, "rdkit.tanimoto_threshold") is None
+        assert session.info[_guc._LOCAL] == set()
+        set_tanimoto_threshold(session, 0.9)
+        assert str(session.execute.call_args[0][0]) == (
+            "SET rdkit.tanimoto_threshold = 0.9"
+        )
+
+    def test_local_timeout_read_back_is_not_cached(self, engine):
+        with engine.connect() as conn:
+            conn.exec_driver_sql("SELECT 1")
+            _guc._changes(conn.info, {"statement_timeout": 500}, True)
+            _guc.remember(conn.info, "statement_timeout", "500ms")
+            conn.commit()
+
+            assert _guc.cached(conn.info, "statement_timeout") is None
+            # Values read in later transactions are cached again
+            conn.exec_driver_sql("SELECT 1")
+            _guc.remember(conn.info, "statement_timeout", "0")
+            conn.commit()
+            assert _guc.cached(conn.info, "statement_timeout") == "0"
+
+    def test_set_setting_skips_unchanged_value(self):
+        session = tracked_session(statement_timeout="0")
+
+        _guc.set_setting(session, "statement_timeout", 0)
+
+        session.execute.assert_not_called()
+
+
+class TestResetOnCheckin:
+    def test_resets_changed_settings(self):
+        record = Mock(info={_guc._COMMITTED: {"rdkit.tanimoto_threshold": "0.7"}})
+        dbapi_connection = MagicMock()
+
+        _guc._reset_settings(dbapi_connection, record)
+
+        cursor = dbapi_connection.cursor.return_value
+        cursor.execute.assert_called_once_with("RESET rdkit.tanimoto_threshold")
+        dbapi_connection.commit.assert_called_once_with()
+        assert record.info[_guc._COMMITTED] == {}
+
+    def test_nothing_to_reset(self):
+        record = Mock(info={_guc._COMMITTED: {}})
+        dbapi_connection = MagicMock()
+
+        _guc._reset_settings(dbapi_connection, record)
+
+        dbapi_connection.cursor.assert_not_called()
+
+    def test_failure_is_logged_and_cache_cleared(self):
+        record = Mock(info={_guc._COMMITTED: {"rdkit.dice_threshold": "0.5"}})
+        dbapi_connection = MagicMock()
+        dbapi_connection.cursor.return_value.execute.side_effect = RuntimeError
+
+        _guc._reset_settings(dbapi_connection, record)
+
+        assert record.info[_guc._COMMITTED] == {}
+
+    def test_registered_on_checkin(self):
+        engine = create_engine("sqlite://", poolclass=QueuePool)
+        track_settings(engine, reset_on_checkin=True)
+        with engine.connect() as conn:
+            conn.info[_guc._COMMITTED]["rdkit.tanimoto_threshold"] = "0.7"
+
+        # SQLite has no RESET; the failure is logged and the cache cleared
+        with engine.connect() as conn:
+            assert conn.info[_guc._COMMITTED] == {}
+        engine.dispose()
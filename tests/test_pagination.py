@@ -0,0 +1,191 @@
+"""Tests for keyset pagination of search results."""
+
+import datetime
+import decimal
+import uuid
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import Column, Integer, MetaData, String, Table, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+
+from molalchemy.exceptions import InvalidCursorError
+from molalchemy.pagination import (
+    Page,
+    decode_cursor,
+    encode_cursor,
+    fetch_page,
+    paginate,
+)
+from molalchemy.rdkit import functions as rdkit_func
+from molalchemy.rdkit.types import RdkitBitFingerprint, RdkitMol
+
+
+@pytest.fixture
+def molecules():
+    return Table(
+        "molecules",
+        MetaData(),
+        Column("id", Integer, primary_key=True),
+        Column("name", String(100)),
+        Column("mol", RdkitMol()),
+        Column("fp", RdkitBitFingerprint()),
+    )
+
+
+def compile_sql(stmt):
+    return str(stmt.compile(dialect=postgresql.psycopg.dialect()))
+
+
+class TestCursor:
+    def test_round_trip(self):
+        assert decode_cursor(encode_cursor(42)) == (42, None)
+        assert decode_cursor(encode_cursor("a", 0.75), scored=True) == ("a", 0.75)
+
+    def test_token_is_url_safe(self):
+        token = encode_cursor(2**40, 1 / 3)
+        assert token.isascii()
+        assert not set(token) & set("+/=")
+
+    @pytest.mark.parametrize("token", ["", "not a cursor!", "W10", "e30"])
+    def test_malformed(self, token):
+        with pytest.raises(InvalidCursorError, match="Malformed"):
+            decode_cursor(token)
+
+    def test_rejects_cursor_of_other_search(self):
+        with pytest.raises(InvalidCursorError, match="similarity"):
+            decode_cursor(encode_cursor(1, 0.5))
+        with pytest.raises(InvalidCursorError, match="substructure"):
+            decode_cursor(encode_cursor(1), scored=True)
+
+    @pytest.mark.parametrize(
+        "key",
+        [
+            uuid.UUID("12345678-1234-5678-1234-567812345678"),
+            decimal.Decimal("12.50"),
+            datetime.datetime(2024, 5, 1, 12, 30, tzinfo=datetime.timezone.utc),
+            datetime.date(2024, 5, 1),
+            {"$other": "value"},
+        ],
+    )
+    def test_round_trip_tagged_keys(self, key):
+        decoded, _ = decode_cursor(encode_cursor(key))
+        assert decoded == key
+        assert type(decoded) is type(key)
+
+    def test_malformed_tagged_key(self):
+        token = encode_cursor({"$uuid": "not a uuid"})
+        with pytest.raises(InvalidCursorError, match="Malformed"):
+            decode_cursor(token)
+
+    def test_rejects_unsupported_keys(self):
+        with pytest.raises(TypeError, match="cursor key of type object"):
+            encode_cursor(object())
+
+
+class TestPaginate:
+    def test_first_page_by_key(self, molecules):
+        stmt = select(molecules.c.id, molecules.c.name).where(
+            molecules.c.mol.has_substructure("c1ccccc1")
+        )
+
+        sql = compile_sql(paginate(stmt, molecules.c.id, page_size=20))
+
+        assert "ORDER BY molecules.id" in sql
+        assert "WHERE" in sql and "molecules.id >" not in sql
+        assert "LIMIT" in sql
+
+    def test_continuation_by_key(self, molecules):
+        stmt = select(molecules.c.name)
+
+        page = paginate(stmt, molecules.c.id, cursor=encode_cursor(7), page_size=20)
+        compiled = page.compile(dialect=postgresql.psycopg.dialect())
+
+        assert str(compiled).startswith("SELECT molecules.name, molecules.id")
+        assert "WHERE molecules.id > " in str(compiled)
+        assert sorted(compiled.params.values()) == [7, 21]
+
+    def test_similarity_order_and_continuation(self, molecules):
+        score = rdkit_func.tanimoto_sml(molecules.c.fp, molecules.c.fp).label("sml")
+        stmt = select(molecules.c.id, score)
+
+        sql = compile_sql(
+            paginate(stmt, molecules.c.id, score=score, cursor=encode_cursor(3, 0.8))
+        )
+
+        assert sql.count("AS sml") == 1
+        assert "ORDER BY sml DESC, molecules.id" in sql
+        assert "tanimoto_sml(molecules.fp, molecules.fp) <= " in sql
+        assert "tanimoto_sml(molecules.fp, molecules.fp) < " in sql
+        assert "molecules.id > " in sql
+
+    def test_orm_entities_select_key(self):
+        class Base(DeclarativeBase):
+            pass
+
+        class Molecule(Base):
+            __tablename__ = "molecules"
+            id: Mapped[int] = mapped_column(primary_key=True)
+            name: Mapped[str]
+
+        selected = [
+            d["name"]
+            for d in paginate(select(Molecule), Molecule.id).column_descriptions
+        ]
+        assert selected == ["Molecule", "id"]
+        selected = [
+            d["name"]
+            for d in paginate(select(Molecule.id), Molecule.id).column_descriptions
+        ]
+        assert selected == ["id"]
+
+    def test_rejects_invalid_page_size(self, molecules):
+        with pytest.raises(ValueError, match="page_size"):
+            paginate(select(molecules.c.id), molecules.c.id, page_size=0)
+
+
+class TestFetchPage:
+    def test_next_cursor_from_last_row(self, molecules):
+        key = molecules.c.id
+        rows = [SimpleNamespace(_mapping={key: i}) for i in (1, 2, 3)]
+        connection = MagicMock()
+        connection.execute.return_value = iter(rows)
+
+        page = fetch_page(connection, select(key), key, page_size=2)
+
+        assert page == Page(rows[:2], encode_cursor(2))
+
+    def test_uuid_key(self, molecules):
+        key = molecules.c.id
+        ids = [uuid.uuid4(), uuid.uuid4()]
+        connection = MagicMock()
+        connection.execute.return_value = iter(
+            [SimpleNamespace(_mapping={key: i}) for i in ids]
+        )
+
+        page = fetch_page(connection, select(key), key, page_size=1)
+
+        assert decode_cursor(page.next_cursor) == (ids[0], None)
+
+    def test_last_page_has_no_cursor(self, molecules):
+        key = molecules.c.id
+        connection = MagicMock()
+        connection.execute.return_value = iter([SimpleNamespace(_mapping={key: 1})])
+
+        assert fetch_page(connection, select(key), key, page_size=2).next_cursor is None
+
+    def test_scored_cursor(self, molecules):
+        key = molecules.c.id
+        score = rdkit_func.tanimoto_sml(molecules.c.fp, molecules.c.fp).label("sml")
+        rows = [
+            SimpleNamespace(_mapping={key: 5, score: 0.9}),
+            SimpleNamespace(_mapping={key: 2, score: 0.7}),
+        ]
+        connection = MagicMock()
+        connection.execute.return_value = iter(rows)
+
+        page = fetch_page(connection, select(key, score), key, score=score, page_size=1)
+
+        assert decode_cursor(page.next_cursor, scored=True) == (5, 0.9)